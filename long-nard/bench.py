@@ -0,0 +1,335 @@
+"""Набор тестов производительности длинных нард."""
+
+from __future__ import annotations
+
+import argparse
+import datetime
+import json
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import timeit
+from typing import Callable
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+
+import pygame  # pylint: disable=wrong-import-position
+
+from gui import Display, clear_cache, init_pygame, save_png  # pylint: disable=wrong-import-position
+from nard import (Control, Dice, GameLog, Party, Player,  # pylint: disable=wrong-import-position
+                  Record, Settings, Stage, State, TreeMove)
+from replay import Replay  # pylint: disable=wrong-import-position
+
+
+def make_position(white: dict[int, int], black: dict[int, int], player: int,
+                  dice: tuple[int, int], move: int = 10) -> State:
+    """
+    Построить позицию по расстановке шашек.
+
+    Белые ходят первыми (цвет 0), снятые шашки задаются позициями 24 и 25.
+
+    @param white: Количество белых шашек по позициям
+    @param black: Количество черных шашек по позициям
+    @param player: Номер игрока, делающего ход
+    @param dice: Значения кубиков
+    @param move: Номер хода
+    @return: Состояние доски
+    """
+    checkers = [0] * 26
+    owner = [-1] * 24 + [0, 1]
+    for side, layout in enumerate((white, black)):
+        for pos, count in layout.items():
+            checkers[pos] = count
+            if pos < 24:
+                owner[pos] = side
+    state = State()
+    state.set_board(checkers, owner)
+    state.player = player
+    state.color = 0
+    state.move = move
+    state.dice = Dice(*dice)
+    state.remained_die = []
+    return state
+
+
+def curated_positions() -> dict[str, State]:
+    """
+    Вернуть позиции для замеров генерации ходов.
+
+    @return: Позиции по названиям
+    """
+    opening = State()
+    opening.init_players(0)
+    opening.dice = Dice(6, 6)
+    return {
+        "opening_6_6": opening,
+        "midgame_blocks_4_4": make_position(
+            {0: 5, 5: 2, 6: 2, 7: 2, 8: 2, 9: 2},
+            {12: 5, 17: 2, 18: 2, 19: 2, 20: 2, 21: 2}, 0, (4, 4)),
+        "midgame_blocks_5_3": make_position(
+            {0: 5, 5: 2, 6: 2, 7: 2, 8: 2, 9: 2},
+            {12: 5, 17: 2, 18: 2, 19: 2, 20: 2, 21: 2}, 0, (5, 3)),
+        "bear_off_6_5": make_position(
+            {18: 2, 19: 3, 20: 3, 21: 2, 22: 2, 23: 1, 24: 2},
+            {6: 3, 7: 3, 8: 3, 9: 2, 10: 2, 11: 2}, 0, (6, 5), 40),
+    }
+
+
+def build_tree(state: State) -> TreeMove:
+    """
+    Построить дерево ходов для позиции.
+
+    @param state: Состояние доски с брошенными кубиками
+    @return: Корень дерева ходов
+    """
+    tree = TreeMove(State(state), -1, -1)
+    tree.next()
+    return tree
+
+
+def simulate_game(seed: int, log: GameLog | None = None) -> int:
+    """
+    Сыграть партию случайными ходами без отображения.
+
+    @param seed: Зерно генератора случайных чисел
+    @param log: Журнал, в который записывается партия
+    @return: Число сделанных ходов
+    """
+    rng = random.Random(seed)
+    party = Party()
+    control = Control(party, Settings([Player.COMPUTER, Player.COMPUTER]), Record())
+    if log is not None:
+        log.attach(party)
+    party.start_party()
+    while party.stage == Stage.TOSS:
+        party.set_dice(Dice(rng.randint(1, 6), rng.randint(1, 6)))
+    while party.stage != Stage.WIN:
+        if party.stage == Stage.NEXT:
+            party.next_player()
+        if party.stage == Stage.ROLL:
+            party.set_dice(Dice(rng.randint(1, 6), rng.randint(1, 6)))
+        if party.stage == Stage.MOVE and party.tree is not None:
+            child = rng.choice(party.tree.children[0] + party.tree.children[1])
+            control.try_move(party.state.player ^ party.state.color,
+                             child.start, child.end)
+    return party.state.move
+
+
+def engine_benchmarks() -> dict[str, Callable[[], object]]:
+    """
+    Вернуть замеры игрового движка.
+
+    @return: Функции замеров по названиям
+    """
+    positions = curated_positions()
+    opening = positions["opening_6_6"]
+    midgame = positions["midgame_blocks_5_3"]
+    position_id = midgame.position_id()
+    benchmarks: dict[str, Callable[[], object]] = {
+        "state_copy": lambda: State(opening),
+        "position_id_encode": midgame.position_id,
+        "position_id_decode": lambda: State.from_position_id(position_id),
+    }
+    for name, state in positions.items():
+        benchmarks[f"tree_next/{name}"] = lambda state=state: build_tree(state)
+    tree = build_tree(positions["midgame_blocks_4_4"])
+    targets = [(child.start, child.end)
+               for items in tree.children for child in items]
+    benchmarks["possible_move"] = lambda: [tree.possible_move(start, end)
+                                           for start, end in targets]
+    party = Party()
+    party.start_party()
+    while party.stage == Stage.TOSS:
+        party.set_dice(Dice(6, 1))
+    party.set_dice(Dice(5, 3))  # Начало хода: восстановление строит дерево ходов
+    snapshot = party.snapshot()
+    benchmarks["party_snapshot"] = party.snapshot
+    benchmarks["party_restore"] = lambda: Party().restore(snapshot)
+    if party.tree is not None:
+        party.apply_move(party.tree.children[0][0])
+    benchmarks["party_undo_redo"] = lambda: party.undo() and party.redo()
+    benchmarks["game_simulation"] = lambda: simulate_game(1)
+    log = GameLog(os.devnull)
+    benchmarks["game_simulation_logged"] = lambda: simulate_game(1, log)
+    body = bytes(range(256)) * 3  # Запись партии средней длины
+    benchmarks["game_log_write"] = lambda: log.write(body)
+    benchmarks.update(replay_benchmarks())
+    return benchmarks
+
+
+def replay_benchmarks() -> dict[str, Callable[[], object]]:
+    """
+    Вернуть замеры воспроизведения партии из журнала.
+
+    @return: Функции замеров по названиям
+    """
+    with tempfile.TemporaryDirectory() as directory:
+        filename = os.path.join(directory, "games.bin")
+        log = GameLog(filename)
+        simulate_game(1, log)
+        log.close()
+        game = GameLog.decode(next(GameLog.read(filename)))
+    replay = Replay(game)
+    linear = Replay(game, len(replay) + 1)  # Единственная сохраненная позиция - начальная
+    replay.state_at(0)  # Сохраненные позиции строятся при первом переходе
+    linear.state_at(0)
+    ply = len(replay) * 2 // 3
+    return {
+        "replay_seek_checkpoint": lambda: replay.state_at(ply),
+        "replay_seek_from_start": lambda: linear.state_at(ply),
+        "replay_validate": lambda: Replay(game).validate(),
+    }
+
+
+def display_benchmarks() -> dict[str, Callable[[], object]]:
+    """
+    Вернуть замеры отрисовки на драйвере SDL без окна.
+
+    @return: Функции замеров по названиям
+    """
+    init_pygame()
+    party = Party()
+    control = Control(party, Settings([Player.HUMAN, Player.HUMAN]), Record())
+    display = Display(party, control)
+    control.restart()
+
+    def draw() -> None:
+        display.refresh()
+        display.draw()
+
+    def move_refresh() -> None:
+        party.move_checker(24, 0)
+        display.pieces.refresh()
+        party.move_checker(0, 24)
+        display.pieces.refresh()
+
+    def draw_piece() -> None:
+        display.invalidate(pygame.Rect(300, 300, 36, 36))
+        display.draw()
+
+    return {
+        "pieces_move_refresh": move_refresh,
+        "display_draw": draw,
+        "display_draw_piece": draw_piece,
+        "frame_save_png": lambda: save_png(display.screen, os.devnull),
+    }
+
+
+## Сценарии запуска: код, выполняемый новым процессом интерпретатора
+STARTUP_SCRIPTS = {
+    "startup_python": "pass",
+    "startup_engine": "import nard",
+    "startup_gui_first_frame": "import gui, nard; gui.Game(nard.Record()).frame()",
+}
+
+
+def startup_benchmarks() -> dict[str, Callable[[], object]]:
+    """
+    Вернуть замеры запуска: каждый вызов запускает новый процесс интерпретатора.
+
+    Время включает запуск самого Python (замер startup_python),
+    импорт модулей и загрузку изображений без кэшей предыдущих вызовов.
+
+    @return: Функции замеров по названиям
+    """
+    env = dict(os.environ, PYTHONPATH=os.path.dirname(os.path.abspath(__file__)))
+    return {name: lambda script=script: subprocess.run(
+                [sys.executable, "-c", script], check=True, env=env,
+                stdout=subprocess.DEVNULL)
+            for name, script in STARTUP_SCRIPTS.items()}
+
+
+def measure(func: Callable[[], object], repeat: int) -> dict[str, float | int]:
+    """
+    Замерить время выполнения функции.
+
+    @param func: Функция замера
+    @param repeat: Число повторов серии
+    @return: Лучшее и медианное время одного вызова в секундах
+    """
+    timer = timeit.Timer(func)
+    number, _ = timer.autorange()
+    times = [total / number for total in timer.repeat(repeat, number)]
+    return {"best": min(times), "median": statistics.median(times), "number": number}
+
+
+def git_commit() -> str:
+    """
+    Вернуть текущий коммит репозитория.
+
+    @return: Короткий хеш коммита или пустая строка
+    """
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], check=True,
+                              capture_output=True, text=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return ""
+
+
+def load_previous(filename: str) -> dict:
+    """
+    Прочитать последние результаты каждого замера из истории.
+
+    @param filename: Имя файла истории
+    @return: Результаты замеров по названиям
+    """
+    results: dict = {}
+    if os.path.exists(filename):
+        with open(filename, "r", encoding="utf-8") as file:
+            for line in file:
+                if line.strip():
+                    results.update(json.loads(line)["results"])
+    return results
+
+
+def main() -> None:
+    """Точка входа."""
+    parser = argparse.ArgumentParser(
+        description="Замерить производительность движка и отрисовки.")
+    parser.add_argument("-k", "--filter", default="",
+                        help="запускать только замеры, содержащие строку")
+    parser.add_argument("-r", "--repeat", type=int, default=5,
+                        help="число повторов каждого замера (по умолчанию 5)")
+    parser.add_argument("-o", "--output", default="bench_history.jsonl",
+                        help="файл истории (по умолчанию bench_history.jsonl)")
+    parser.add_argument("--no-save", action="store_true",
+                        help="не записывать результаты в историю")
+    args = parser.parse_args()
+
+    benchmarks = engine_benchmarks()
+    benchmarks.update(display_benchmarks())
+    benchmarks.update(startup_benchmarks())
+    previous = load_previous(args.output)
+    results = {}
+    print(f"{'замер':<32} {'лучшее, мс':>12} {'медиана, мс':>12} {'изменение':>10}")
+    for name, func in benchmarks.items():
+        if args.filter not in name:
+            continue
+        results[name] = measure(func, args.repeat)
+        change = ""
+        if name in previous:
+            ratio = results[name]["best"] / previous[name]["best"] - 1
+            change = f"{ratio:+.1%}"
+        print(f"{name:<32} {results[name]['best'] * 1000:>12.3f} "
+              f"{results[name]['median'] * 1000:>12.3f} {change:>10}")
+    pygame.quit()
+    clear_cache()
+
+    if not args.no_save:
+        entry = {
+            "time": datetime.datetime.now().isoformat(timespec="seconds"),
+            "commit": git_commit(),
+            "python": platform.python_version(),
+            "pygame": pygame.version.ver,
+            "results": results,
+        }
+        with open(args.output, "a", encoding="utf-8") as file:
+            file.write(json.dumps(entry) + "\n")
+
+
+if __name__ == "__main__":
+    main()
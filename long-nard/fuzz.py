@@ -0,0 +1,418 @@
+"""Дифференциальный фаззер генератора ходов длинных нард."""
+
+from __future__ import annotations
+
+import argparse
+import importlib
+import json
+import multiprocessing
+import random
+import time
+from typing import Callable
+
+from nard import Dice, State
+from perft import plays
+
+## Ключ позиции: количество шашек и владельцы всех 26 позиций
+PositionKey = tuple[tuple[int, ...], tuple[int, ...]]
+## Генератор ходов: состояние с кубиками -> множество конечных позиций
+Generator = Callable[[State], set[PositionKey]]
+
+
+def position_key(state: State) -> PositionKey:
+    """
+    Вернуть ключ расстановки шашек.
+
+    @param state: Состояние доски
+    @return: Ключ позиции
+    """
+    return tuple(state.checkers), tuple(state.owner)
+
+
+def make_state(case: dict) -> State:
+    """
+    Построить состояние доски по описанию случая.
+
+    @param case: Описание позиции и броска
+    @return: Состояние доски в начале хода
+    """
+    state = State()
+    state.set_board(case["checkers"], case["owner"])
+    state.player = case["player"]
+    state.color = case["color"]
+    state.move = case["move"]
+    state.dice = Dice(*case["dice"])
+    state.step = 0
+    state.played_head = False
+    state.remained_die = []
+    return state
+
+
+def reference_plays(state: State) -> set[PositionKey]:
+    """
+    Эталонный генератор на основе TreeMove.
+
+    @param state: Состояние доски с брошенными кубиками
+    @return: Множество конечных позиций
+    """
+    return {position_key(leaf) for leaf in plays(state)}
+
+
+def _rules_moves(mine: list[int], theirs: list[int], die: int, heads: int,
+                 opening: bool) -> list[int]:
+    """
+    Перечислить начала шагов на кубик по правилам.
+
+    Позиции отсчитываются от головы игрока: 0 - голова, 18-23 - дом,
+    24 и дальше - снятие с доски.
+
+    @param mine: Шашки игрока по относительным позициям
+    @param theirs: Шашки соперника по относительным позициям
+    @param die: Длина шага
+    @param heads: Число шашек, уже снятых с головы за ход
+    @param opening: Флаг первого хода с дублем 6:6, 4:4 или 3:3
+    @return: Относительные позиции начала шага
+    """
+    at_home = not any(mine[:18])
+    starts = []
+    for pos in range(1, 24):
+        if not mine[pos]:
+            continue
+        target = pos + die
+        if target < 24:
+            if theirs[target]:
+                continue
+        elif not at_home or target > 24 and any(mine[18:pos]):
+            # Шашка снимается большим кубиком только с самой дальней позиции дома
+            continue
+        starts.append(pos)
+    if mine[0] and not theirs[die]:
+        # С головы берется одна шашка за ход, первым ходом с дублем 6:6, 4:4
+        # или 3:3 - вторая, если кубик не сыграть другой шашкой
+        if heads == 0 or heads == 1 and opening and not starts:
+            starts.append(0)
+    return starts
+
+
+def _rules_block(mine: list[int], theirs: list[int]) -> bool:
+    """
+    Проверить, есть ли запрещенный блок: шесть позиций игрока подряд,
+    впереди которых нет ни одной шашки соперника.
+
+    @param mine: Шашки игрока по относительным позициям
+    @param theirs: Шашки соперника по относительным позициям
+    @return: Флаг запрещенного блока
+    """
+    # Позиция pos игрока для соперника находится на (pos + 12) % 24 от его головы
+    ahead = max(((pos + 12) % 24 for pos in range(24) if theirs[pos]), default=-1)
+    run = 0
+    for pos in range(23, ahead, -1):
+        run = run + 1 if mine[(pos + 12) % 24] else 0
+        if run >= 6:
+            return True
+    return False
+
+
+def rules_plays(state: State) -> set[PositionKey]:
+    """
+    Независимый генератор: правила длинных нард без State.right_move и TreeMove.
+
+    Перебираются все последовательности шагов. Ход законен, если в конечной
+    позиции нет запрещенного блока и сыграно наибольшее возможное число
+    кубиков, а если из двух разных кубиков можно сыграть только один - старший.
+
+    @param state: Состояние доски с брошенными кубиками
+    @return: Множество конечных позиций
+    """
+    player, side = state.player, state.player ^ state.color
+    mine, theirs = [0] * 24, [0] * 24
+    for pos in range(24):
+        if state.owner[pos] == side:
+            mine[(pos + 12 * player) % 24] = state.checkers[pos]
+        elif state.owner[pos] != -1:
+            theirs[(pos + 12 * player) % 24] = state.checkers[pos]
+    first, second = state.dice.first, state.dice.second
+    dice = (first,) * 4 if first == second else (max(first, second), min(first, second))
+    opening = state.move == 0 and first == second and first in [3, 4, 6]
+    finals: dict[PositionKey, int] = {}  # Конечная позиция -> число сыгранных кубиков
+    high: set[PositionKey] = set()  # Позиции, где сыгран только старший из двух кубиков
+    visited: dict[tuple, bool] = {}
+
+    def expand(remained: tuple[int, ...], heads: int, off: int) -> bool:
+        """
+        Дописать конечные позиции продолжений.
+
+        @param remained: Несыгранные кубики
+        @param heads: Число шашек, снятых с головы
+        @param off: Число снятых с доски шашек
+        @return: Флаг того, что из позиции есть законный ход
+        """
+        key = (tuple(mine), remained, heads)
+        if key in visited:
+            return visited[key]
+        found = False
+        for die in sorted(set(remained)):
+            index = remained.index(die)
+            for pos in _rules_moves(mine, theirs, die, heads, opening):
+                mine[pos] -= 1
+                if pos + die < 24:
+                    mine[pos + die] += 1
+                found |= expand(remained[:index] + remained[index + 1:],
+                                heads + (pos == 0), off + (pos + die >= 24))
+                if pos + die < 24:
+                    mine[pos + die] -= 1
+                mine[pos] += 1
+        if not found and (len(remained) == len(dice) or not _rules_block(mine, theirs)):
+            checkers, owner = state.checkers[:], state.owner[:]
+            for pos in range(24):
+                absolute = (pos + 12 * player) % 24
+                if mine[pos]:
+                    checkers[absolute], owner[absolute] = mine[pos], side
+                elif not theirs[pos]:
+                    checkers[absolute], owner[absolute] = 0, -1
+            checkers[24 + player] = off
+            final = tuple(checkers), tuple(owner)
+            finals[final] = max(len(dice) - len(remained), finals.get(final, 0))
+            if len(remained) == 1 and dice[0] not in remained:
+                high.add(final)
+            found = True
+        visited[key] = found
+        return found
+
+    expand(dice, 0, state.checkers[24 + player])
+    best = max(finals.values())
+    result = {final for final, used in finals.items() if used == best}
+    if best == 1 and result & high:
+        # Из двух разных кубиков сыгран один: старший, если его можно сыграть
+        result &= high
+    return result
+
+
+def load_generator(spec: str) -> Generator:
+    """
+    Загрузить генератор ходов по спецификации "модуль:функция".
+
+    @param spec: Спецификация генератора или "rules"
+    @return: Функция генератора
+    """
+    if spec == "rules":
+        return rules_plays
+    module_name, _, func_name = spec.partition(":")
+    return getattr(importlib.import_module(module_name), func_name)
+
+
+def random_case(rng: random.Random) -> dict:
+    """
+    Сгенерировать случайную допустимую позицию и бросок.
+
+    Половина позиций получается случайной партией из начальной расстановки,
+    остальные - произвольной расстановкой, часто с шашками только в доме.
+    Позиции с запрещенным блоком игрока, сделавшего последний ход, отбрасываются.
+
+    @param rng: Генератор случайных чисел
+    @return: Описание позиции и броска
+    """
+    if rng.random() < 0.5:
+        state = State()
+        state.init_players(rng.randint(0, 1))
+        for _ in range(rng.randint(0, 80)):
+            previous = State(state)
+            state.dice = Dice(rng.randint(1, 6), rng.randint(1, 6))
+            state.remained_die = []
+            state.fill_dice()
+            for _ in range(8):
+                starts = state.get_checkers_pos()
+                if not state.remained_die or not starts:
+                    break
+                state.right_move(rng.choice(starts), rng.choice(state.remained_die))
+            if state.is_one_line():
+                # Случайные шаги построили запрещенный блок: партия обрывается перед ходом
+                state = previous
+                break
+            if state.is_win():
+                break
+            state.next_player()
+        case = {"checkers": state.checkers[:], "owner": state.owner[:],
+                "player": state.player, "color": state.color,
+                "move": state.move}
+    else:
+        while True:
+            case = _random_layout(rng)
+            # Блок проверяется для соперника: он сделал последний ход
+            last = make_state(dict(case, player=1 - case["player"], dice=[1, 1]))
+            if not last.is_one_line():
+                break
+    case["dice"] = [rng.randint(1, 6), rng.randint(1, 6)]
+    return case
+
+
+def _random_layout(rng: random.Random) -> dict:
+    """
+    Сгенерировать произвольную расстановку шашек.
+
+    Первый ход (move 0) начинается со всех шашек на голове, поэтому
+    произвольная расстановка получает номер хода от 1.
+
+    @param rng: Генератор случайных чисел
+    @return: Описание позиции без броска
+    """
+    color = rng.randint(0, 1)
+    checkers = [0] * 26
+    owner = [-1] * 26
+    owner[24] = color
+    owner[25] = 1 - color
+    for player in rng.sample([0, 1], 2):
+        home_only = rng.random() < 0.4
+        off = rng.randint(0, 14) if home_only else 0
+        free = [pos for pos in range(24) if owner[pos] == -1 and (
+            not home_only or (pos + 12 * player) % 24 >= 18)]
+        if not free:
+            off = 0
+            free = [pos for pos in range(24) if owner[pos] == -1]
+        chosen = rng.sample(free, rng.randint(1, min(len(free), 15 - off)))
+        for pos in chosen:
+            owner[pos] = player ^ color
+            checkers[pos] = 1
+        for _ in range(15 - off - len(chosen)):
+            checkers[rng.choice(chosen)] += 1
+        checkers[24 + player] = off
+    return {"checkers": checkers, "owner": owner,
+            "player": rng.randint(0, 1), "color": color,
+            "move": rng.randint(1, 40)}
+
+
+def compare(case: dict, candidate: Generator) -> dict | None:
+    """
+    Сравнить эталонный и альтернативный генераторы на одном случае.
+
+    @param case: Описание позиции и броска
+    @param candidate: Альтернативный генератор
+    @return: Описание расхождения или None
+    """
+    results = []
+    for generator in (reference_plays, candidate):
+        try:
+            results.append(generator(make_state(case)))
+        except Exception as error:  # pylint: disable=broad-except
+            results.append(f"{type(error).__name__}: {error}")
+    expected, actual = results
+    if expected == actual:
+        return None
+    if isinstance(expected, str) or isinstance(actual, str):
+        return {"expected": expected if isinstance(expected, str) else len(expected),
+                "actual": actual if isinstance(actual, str) else len(actual)}
+    return {"missing": len(expected - actual), "extra": len(actual - expected)}
+
+
+def minimize(case: dict, candidate: Generator) -> dict:
+    """
+    Уменьшить позицию, сохраняя расхождение генераторов.
+
+    Шашки по одной снимаются с доски, пока расхождение воспроизводится.
+
+    @param case: Описание позиции с расхождением
+    @param candidate: Альтернативный генератор
+    @return: Минимизированное описание позиции
+    """
+    changed = True
+    while changed:
+        changed = False
+        for pos in range(24):
+            if case["checkers"][pos] == 0:
+                continue
+            smaller = json.loads(json.dumps(case))
+            side = smaller["owner"][pos]
+            home = 24 if smaller["owner"][24] == side else 25
+            smaller["checkers"][pos] -= 1
+            smaller["checkers"][home] += 1
+            if smaller["checkers"][pos] == 0:
+                smaller["owner"][pos] = -1
+            if compare(smaller, candidate) is not None:
+                case = smaller
+                changed = True
+        if case["move"] > 1:
+            smaller = dict(case, move=1)
+            if compare(smaller, candidate) is not None:
+                case = smaller
+                changed = True
+    return case
+
+
+_candidate: Generator = rules_plays
+
+
+def _init_worker(spec: str) -> None:
+    """
+    Инициализировать процесс-обработчик.
+
+    @param spec: Спецификация альтернативного генератора
+    """
+    global _candidate  # pylint: disable=global-statement
+    _candidate = load_generator(spec)
+
+
+def _run_batch(args: tuple[int, int]) -> tuple[int, list[dict]]:
+    """
+    Проверить пакет случайных случаев.
+
+    @param args: Зерно генератора случайных чисел и размер пакета
+    @return: Число проверенных случаев и найденные расхождения
+    """
+    seed, size = args
+    rng = random.Random(seed)
+    failures = []
+    for _ in range(size):
+        case = random_case(rng)
+        diff = compare(case, _candidate)
+        if diff is not None:
+            failures.append({"case": minimize(case, _candidate),
+                             "original": case, "diff": diff})
+    return size, failures
+
+
+def main() -> None:
+    """Точка входа."""
+    parser = argparse.ArgumentParser(
+        description="Сравнить TreeMove с альтернативным генератором ходов "
+                    "на случайных позициях.")
+    parser.add_argument("--candidate", default="rules",
+                        help='генератор "модуль:функция" (по умолчанию rules)')
+    parser.add_argument("-n", "--cases", type=int, default=1_000_000,
+                        help="число случаев (по умолчанию 1000000)")
+    parser.add_argument("--seconds", type=float, default=0,
+                        help="ограничение по времени, с (0 - без ограничения)")
+    parser.add_argument("--seed", type=int, default=0,
+                        help="начальное зерно (по умолчанию 0)")
+    parser.add_argument("--batch", type=int, default=200,
+                        help="размер пакета на процесс (по умолчанию 200)")
+    parser.add_argument("-j", "--jobs", type=int, default=multiprocessing.cpu_count(),
+                        help="число процессов (по умолчанию все ядра)")
+    parser.add_argument("-o", "--output", default="fuzz_failures.jsonl",
+                        help="файл для расхождений (по умолчанию fuzz_failures.jsonl)")
+    args = parser.parse_args()
+
+    batches = ((args.seed + i, min(args.batch, args.cases - i * args.batch))
+               for i in range(-(-args.cases // args.batch)))
+    done = mismatches = 0
+    started = last_report = time.perf_counter()
+    with multiprocessing.Pool(args.jobs, _init_worker, (args.candidate,)) as pool, \
+            open(args.output, "a", encoding="utf-8") as output:
+        for size, failures in pool.imap_unordered(_run_batch, batches):
+            done += size
+            for failure in failures:
+                mismatches += 1
+                output.write(json.dumps(failure) + "\n")
+                output.flush()
+                print(f"расхождение {failure['diff']}: {json.dumps(failure['case'])}")
+            now = time.perf_counter()
+            if now - last_report >= 5 or done >= args.cases:
+                last_report = now
+                print(f"случаев: {done}, расхождений: {mismatches}, "
+                      f"{done / (now - started):.0f} случаев/с", flush=True)
+            if args.seconds and now - started >= args.seconds:
+                pool.terminate()
+                break
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,1922 @@
+"""Графический интерфейс длинных нард на pygame."""
+
+from __future__ import annotations
+
+import json
+import math
+import os
+import shutil
+import struct
+import time
+import zlib
+from collections import OrderedDict
+from dataclasses import dataclass
+from enum import Enum, unique
+from typing import Callable
+
+import pygame
+
+from nard import (EASINGS, ButtonStatus, Control, Event, GameLog, Party, Player,
+                  Record, Settings, Speed, Stage, time_to_text)
+
+
+##
+# @file gui.py
+#
+# @brief Long Nardy game graphical interface with Doxygen style comments.
+#
+# @startuml
+# class Game {
+# }
+# class TiledGame {
+#     + run(): void
+# }
+# class Tile {
+#     - party: Party
+#     - control: Control
+# }
+# class Display {
+#     - party: Party
+#     - control: Control
+# }
+# class AbstractLayer {
+#     - display: Display
+# }
+# class Menu extends AbstractLayer {
+# }
+# class Panel extends AbstractLayer {
+# }
+# class Pieces extends AbstractLayer {
+# }
+# class Overlay extends AbstractLayer {
+# }
+# class Profiler {
+#     + measure(phase: str, func): void
+#     + end_frame(): void
+#     + lap(): dict
+#     + write(filename: str): void
+# }
+# class Button {
+#     - status: ButtonStatus
+#     - text: String
+#     - x_pos: int
+#     - y_pos: int
+#     + init(): Button
+#     + change(): void
+# }
+# class Piece {
+#     - color: int
+#     - status: PieceStatus
+# }
+# class Layout {
+#     + coord(pos: int, hgt: int): tuple
+#     + point_at(pos: tuple): int
+#     + stack_at(pos: tuple): int
+# }
+# enum PieceStatus {
+#     STAY
+#     TO_HOME
+#     CLICKED
+# }
+# Game -- Control
+# TiledGame *-- Tile
+# TiledGame *-- Layout
+# Tile *-- Party
+# Tile *-- Control
+# Game -- Display
+# Display *-- Menu
+# Display *-- Panel
+# Display *-- Pieces
+# Display *-- Overlay
+# Display o-- Profiler
+# Display *-- Layout
+# Piece o-- Layout
+# Game *-- Profiler
+# Display -- Party
+# AbstractLayer <|-- Menu
+# AbstractLayer <|-- Panel
+# AbstractLayer <|-- Pieces
+# AbstractLayer <|-- Overlay
+# AbstractLayer o-- Display
+# @enduml
+
+
+## Загруженные и преобразованные изображения по имени файла и наличию прозрачности
+_images: dict[tuple[str, bool], pygame.Surface] = {}
+
+
+def load_image(filename: str, alpha: bool = True) -> pygame.Surface:
+    """
+    Загрузить изображение один раз и вернуть общую поверхность.
+
+    Поверхность преобразуется в формат экрана при первой загрузке,
+    поэтому окно должно быть уже создано. Поверхность общая и не должна изменяться.
+
+    @param filename: Имя файла изображения.
+    @param alpha: Сохранить прозрачность изображения.
+    @return: Поверхность изображения.
+    """
+    key = (filename, alpha)
+    if key not in _images:
+        image = pygame.image.load(filename)
+        _images[key] = image.convert_alpha() if alpha else image.convert()
+    return _images[key]
+
+
+## Масштабированные изображения по имени файла, наличию прозрачности и размеру
+_scaled: dict[tuple[str, bool, tuple[int, int]], pygame.Surface] = {}
+
+
+def load_scaled(filename: str, size: tuple[int, int], alpha: bool = True) -> pygame.Surface:
+    """
+    Вернуть изображение, масштабированное к заданному размеру.
+
+    Изображение масштабируется один раз для каждого размера.
+    Поверхность общая и не должна изменяться.
+
+    @param filename: Имя файла изображения.
+    @param size: Размер изображения.
+    @param alpha: Сохранить прозрачность изображения.
+    @return: Поверхность изображения.
+    """
+    image = load_image(filename, alpha)
+    if image.get_size() == size:
+        return image
+    key = (filename, alpha, size)
+    if key not in _scaled:
+        _scaled[key] = pygame.transform.smoothscale(image, size)
+    return _scaled[key]
+
+
+## Шрифты по размеру
+_fonts: dict[int, pygame.font.Font] = {}
+## Отрисованные надписи по тексту, цвету и размеру в порядке последнего использования
+_texts: OrderedDict[tuple[str, tuple[int, int, int], int], pygame.Surface] = OrderedDict()
+## Наибольшее число хранимых надписей
+TEXT_CACHE_SIZE = 256
+
+
+def get_font(size: int) -> pygame.font.Font:
+    """
+    Вернуть общий шрифт интерфейса заданного размера.
+
+    @param size: Размер шрифта.
+    @return: Шрифт.
+    """
+    if size not in _fonts:
+        _fonts[size] = pygame.font.Font("freesansbold.ttf", size)
+    return _fonts[size]
+
+
+def render_text(text: str, color: tuple[int, int, int], size: int = 22) -> pygame.Surface:
+    """
+    Отрисовать надпись или вернуть ранее отрисованную.
+
+    Хранится не более TEXT_CACHE_SIZE надписей, давно не использованные вытесняются.
+    Поверхность общая и не должна изменяться.
+
+    @param text: Текст надписи.
+    @param color: Цвет надписи.
+    @param size: Размер шрифта.
+    @return: Поверхность надписи.
+    """
+    key = (text, color, size)
+    if key in _texts:
+        _texts.move_to_end(key)
+        return _texts[key]
+    image = get_font(size).render(text, True, color)
+    _texts[key] = image
+    if len(_texts) > TEXT_CACHE_SIZE:
+        _texts.popitem(last=False)
+    return image
+
+
+def init_pygame() -> None:
+    """
+    Инициализировать модули pygame, нужные интерфейсу.
+
+    В отличие от pygame.init() звук, джойстики и прочие неиспользуемые подсистемы
+    SDL не запускаются, что сокращает время до первого кадра.
+    """
+    pygame.display.init()
+    pygame.font.init()
+
+
+def clear_cache() -> None:
+    """
+    Очистить кэши изображений, шрифтов и надписей.
+
+    Вызывается после pygame.quit(): шрифты и поверхности прежнего окна недействительны.
+    """
+    _images.clear()
+    _scaled.clear()
+    _fonts.clear()
+    _texts.clear()
+
+
+## Уровень сжатия кадров: быстрое сжатие важнее размера файла
+PNG_LEVEL = 1
+
+
+def save_png(surface: pygame.Surface, filename: str) -> None:
+    """
+    Сохранить поверхность в файл PNG с быстрым сжатием.
+
+    Строки записываются без фильтров и сжимаются zlib с уровнем PNG_LEVEL:
+    файл получается больше, чем у pygame.image.save, но кодируется в несколько раз быстрее.
+
+    @param surface: Поверхность.
+    @param filename: Имя файла.
+    """
+    width, height = surface.get_size()
+    pixels = pygame.image.tobytes(surface, "RGB")
+    stride = width * 3
+    rows = b"".join(b"\0" + pixels[y * stride:(y + 1) * stride] for y in range(height))
+
+    def chunk(kind: bytes, data: bytes) -> bytes:
+        return (struct.pack(">I", len(data)) + kind + data
+                + struct.pack(">I", zlib.crc32(kind + data)))
+
+    with open(filename, "wb") as file:
+        file.write(b"\x89PNG\r\n\x1a\n")
+        file.write(chunk(b"IHDR", struct.pack(">IIBBBBB", width, height, 8, 2, 0, 0, 0)))
+        file.write(chunk(b"IDAT", zlib.compress(rows, PNG_LEVEL)))
+        file.write(chunk(b"IEND", b""))
+
+
+class Button(pygame.sprite.Sprite):
+    """
+    Описывает кнопку в интерфейсе игры.
+    Класс позволяет создавать и менять состояние кнопок на экране.
+    """
+
+    ## Размер шрифта кнопок в исходном масштабе
+    FONT_SIZE = 22
+
+    def __init__(self, *groups, scale: float = 1.0):
+        """!Конструктор.
+        @param groups Группы слайда
+        @param scale Масштаб представления
+        """
+        super().__init__(*groups)
+        self.scale = scale
+        self.__idd = -1
+        self.__text = ""
+        self.x_pos = 0
+        self.y_pos = 0
+        self.status = ButtonStatus.DISABLED
+        self.color = (255, 255, 255)
+        self.image = render_text(self.__text, self.color, self.__font_size())
+        self.rect = self.image.get_rect()
+        self.damage: pygame.Rect | None = None
+        self.command = lambda *args: None
+
+    def init(
+        self,
+        idd: int,
+        text: str,
+        x_pos: int,
+        y_pos: int,
+        status: ButtonStatus = ButtonStatus.TEXT,
+    ) -> Button:
+        """Инициализировать.
+        @param idd Идентификатор кнопки
+        @param text Текст кнопки
+        @param x_pos Координата X кнопки в исходном масштабе
+        @param y_pos Координата Y кнопки в исходном масштабе
+        @param status Состояние кнопки
+        @return Экземпляр класса кнопки
+        """
+        self.status = status
+        self.color = self.__status_color()
+        self.__text = text
+        self.image = render_text(self.__text, self.color, self.__font_size())
+        self.rect = self.image.get_rect()
+        self.__idd = idd
+        self.x_pos = x_pos
+        self.y_pos = y_pos
+        self.rect.x = round(self.x_pos * self.scale)
+        self.rect.y = round(self.y_pos * self.scale)
+        self.command = lambda *args: None
+        return self
+
+    def change(
+        self,
+        x_pos: int | None = None,
+        y_pos: int | None = None,
+        text: str | None = None,
+        status: ButtonStatus | None = None,
+    ) -> None:
+        """Изменить параметры кнопки.
+        @param x_pos Координата X кнопки
+        @param y_pos Координата Y кнопки
+        @param text Текст кнопки
+        @param status Состояние кнопки
+        """
+        old = (self.__text, self.status, self.x_pos, self.y_pos)
+        old_rect = self.rect
+        if text is not None:
+            self.__text = text
+        if status is not None:
+            self.status = status
+        if x_pos is not None:
+            self.x_pos = x_pos
+        if y_pos is not None:
+            self.y_pos = y_pos
+        if old == (self.__text, self.status, self.x_pos, self.y_pos):
+            return
+        self.color = self.__status_color()
+        self.image = render_text(self.__text, self.color, self.__font_size())
+        self.rect = self.image.get_rect()
+        self.rect.x = round(self.x_pos * self.scale)
+        self.rect.y = round(self.y_pos * self.scale)
+        damage = old_rect.union(self.rect)
+        self.damage = damage if self.damage is None else self.damage.union(damage)
+
+    def __font_size(self) -> int:
+        """Вернуть размер шрифта в масштабе представления.
+        @return Размер шрифта
+        """
+        return max(1, round(self.FONT_SIZE * self.scale))
+
+    def __status_color(self) -> tuple[int, int, int]:
+        """Вернуть цвет текста для состояния кнопки.
+        @return Цвет текста
+        """
+        if self.status == ButtonStatus.ENABLED:
+            return (255, 255, 0)
+        if self.status == ButtonStatus.DISABLED:
+            return (100, 100, 100)
+        return (255, 255, 255)
+
+    def take_damage(self) -> pygame.Rect | None:
+        """Забрать область, изменившуюся с прошлого вызова.
+        @return Область кнопки для перерисовки или None
+        """
+        damage, self.damage = self.damage, None
+        return damage
+
+    def pushable(self, yes: bool) -> None:
+        """Переключить состояние кнопки.
+        @param yes Флаг нажимаемой кнопки
+        """
+        if self.status != ButtonStatus.TEXT:
+            if yes:
+                self.change(status=ButtonStatus.ENABLED)
+            else:
+                self.change(status=ButtonStatus.DISABLED)
+
+
+@unique
+class PieceStatus(Enum):
+    """
+    Перечисление состояния шашки (находится на месте, идет домой, выбрана).
+    """
+
+    STAY = 0
+    TO_HOME = 1
+    CLICKED = 2
+
+
+class Piece(pygame.sprite.Sprite):
+    """
+    Класс элемента шашки.
+    Представляет собой шашку на доске, с возможностью перемещения и взаимодействия.
+    """
+
+    def __init__(self, layout: Layout, *groups):
+        """Конструктор.
+        @param layout Геометрия доски
+        @param groups Группы слайда
+        """
+        super().__init__(*groups)
+        self.layout = layout
+        self.color = 0
+        self.image = load_scaled("./resources/white.png", (layout.piece, layout.piece))
+        self.rect = self.image.get_rect()
+        self.pos = 0
+        self.hgt = 0
+
+        self.old_x = 0
+        self.old_y = 0
+        self.home_x = 0
+        self.home_y = 0
+        self.start_x = 0  # Начало текущего движения шашки
+        self.start_y = 0
+        self.elapsed = 0.0  # Время текущего движения шашки, с
+
+        self.__idd = -1
+        self.status = PieceStatus.STAY
+
+    def init(self, idd: int, pos: int, hgt: int, color: int) -> Piece:
+        """Инициализировать.
+        @param idd Идентификатор шашки
+        @param pos Поле шашки
+        @param hgt Номер шашки в поле
+        @param color Номер цвета шашки
+        @return Экземпляр класса шашки
+        """
+        self.__idd = idd
+        self.color = color
+        size = (self.layout.piece, self.layout.piece)
+        if self.color == 0:
+            self.image = load_scaled("./resources/white.png", size)
+        else:
+            self.image = load_scaled("./resources/black.png", size)
+        self.rect = self.image.get_rect()
+        self.pos = pos
+        self.hgt = hgt
+        self.rect.x, self.rect.y = self.pos_to_coord()
+        self.old_x = self.rect.x
+        self.old_y = self.rect.y
+        self.home_x = self.rect.x
+        self.home_y = self.rect.y
+        self.status = PieceStatus.STAY
+        return self
+
+    def go_home(self) -> None:
+        """Начать движение шашки на свое место из текущих координат."""
+        self.status = PieceStatus.TO_HOME
+        self.start_x, self.start_y = self.rect.x, self.rect.y
+        self.elapsed = 0.0
+
+    def animate(self, step: float, duration: float,
+                easing: Callable[[float], float]) -> None:
+        """Продвинуть шашку к своему месту.
+        @param step Прошедшее время, с
+        @param duration Длительность движения, с
+        @param easing Функция сглаживания
+        """
+        self.elapsed += step
+        if self.elapsed >= duration:
+            self.status = PieceStatus.STAY
+            self.rect.x, self.rect.y = self.home_x, self.home_y
+            return
+        ratio = easing(self.elapsed / duration)
+        self.rect.x = self.start_x + round((self.home_x - self.start_x) * ratio)
+        self.rect.y = self.start_y + round((self.home_y - self.start_y) * ratio)
+
+    def pos_to_coord(self) -> tuple[int, int]:
+        """Вернуть координаты позиции.
+        @return Координаты шашки
+        """
+        return self.layout.coord(self.pos, self.hgt)
+
+    def get_pos(self) -> int:
+        """Вернуть позицию по координатам центра шашки.
+        @return Номер позиции
+        """
+        return self.layout.point_at(self.rect.center)
+
+
+class Layout:
+    """
+    Класс геометрии доски.
+    Хранит таблицы координат шашек по полю и высоте и индекс полей по точкам экрана,
+    построенные для доски заданного масштаба.
+    """
+
+    ## Размер доски без панели в исходном масштабе
+    WIDTH = 665
+    HEIGHT = 607
+    ## Размер шашки в исходном масштабе
+    PIECE = 39
+    ## Наибольшее число шашек в поле
+    STACK = 16
+
+    def __init__(self, scale: float = 1.0):
+        """Конструктор.
+        @param scale Масштаб доски
+        """
+        self.scale = scale
+        self.width = round(self.WIDTH * scale)
+        self.height = round(self.HEIGHT * scale)
+        self.piece = round(self.PIECE * scale)
+        self.__coords = [
+            [self.__scaled(self.__base_coord(pos, hgt)) for hgt in range(self.STACK)]
+            for pos in range(26)
+        ]
+        self.__columns = [self.__base_column(int(x / scale)) for x in range(self.width)]
+        self.__rows = [self.__base_row(int(y / scale)) for y in range(self.height)]
+        self.__stacks = [self.__base_stack(int(x / scale)) for x in range(self.width)]
+        self.__halves = [0 if y >= self.height // 2 else 1 for y in range(self.height)]
+
+    def coord(self, pos: int, hgt: int) -> tuple[int, int]:
+        """Вернуть координаты шашки.
+        @param pos Поле шашки
+        @param hgt Номер шашки в поле
+        @return Координаты левого верхнего угла шашки или (-1, -1)
+        """
+        if 0 <= pos < 26 and 0 <= hgt < self.STACK:
+            return self.__coords[pos][hgt]
+        return (-1, -1)
+
+    def point_at(self, pos: tuple[int, int]) -> int:
+        """Вернуть поле под точкой экрана.
+        @param pos Координаты точки
+        @return Номер поля или -1
+        """
+        column = self.__columns[min(max(pos[0], 0), self.width - 1)]
+        if column >= 24:
+            return column
+        row = self.__rows[min(max(pos[1], 0), self.height - 1)]
+        if column == -1 or row == -1:
+            return -1
+        return column if row == 0 else 23 - column
+
+    def stack_at(self, pos: tuple[int, int]) -> int:
+        """Вернуть поле, стопка шашек которого может лежать под точкой экрана.
+
+        В отличие от point_at, стопка занимает всю половину доски по высоте.
+        @param pos Координаты точки
+        @return Номер поля или -1
+        """
+        column = self.__stacks[min(max(pos[0], 0), self.width - 1)]
+        if column == -1 or column >= 24:
+            return column
+        row = self.__halves[min(max(pos[1], 0), self.height - 1)]
+        return column if row == 0 else 23 - column
+
+    def __scaled(self, coord: tuple[int, int]) -> tuple[int, int]:
+        """Перевести координаты исходного масштаба в масштаб доски.
+        @param coord Координаты в исходном масштабе
+        @return Координаты в масштабе доски
+        """
+        return round(coord[0] * self.scale), round(coord[1] * self.scale)
+
+    @staticmethod
+    def __base_coord(pos: int, hgt: int) -> tuple[int, int]:
+        """Вернуть координаты шашки в исходном масштабе.
+        @param pos Поле шашки
+        @param hgt Номер шашки в поле
+        @return Координаты шашки
+
+        Математические формулы для вычисления координат:
+        \f[
+        (x, y) = 
+        \begin{cases} 
+        (56 + pos \times 41, 548 - hgt \times 17) & \text{если } 0 \leq pos < 6 \\
+        (116 + pos \times 41, 548 - hgt \times 17) & \text{если } 6 \leq pos < 12 \\
+        (116 + (23 - pos) \times 41, 23 + hgt \times 17) & \text{если } 12 \leq pos < 18 \\
+        (56 + (23 - pos) \times 41, 23 + hgt \times 17) & \text{если } 18 \leq pos < 24 \\
+        (4, 4 + hgt \times 33) & \text{если } pos = 24 \\
+        (621, 563 - hgt \times 33) & \text{если } pos = 25 \\
+        \end{cases}
+        \f]
+        """
+        if pos < 6:
+            return (56 + pos * 41, 548 - hgt * 17)
+        if pos < 12:
+            return (116 + pos * 41, 548 - hgt * 17)
+        if pos < 18:
+            return (116 + (23 - pos) * 41, 23 + hgt * 17)
+        if pos < 24:
+            return (56 + (23 - pos) * 41, 23 + hgt * 17)
+        if pos == 24:
+            return (4, 4 + hgt * 33)
+        return (621, 563 - hgt * 33)
+
+    @staticmethod
+    def __base_column(x_pos: int) -> int:
+        """Вернуть столбец полей по координате X в исходном масштабе.
+        @param x_pos Координата X
+        @return Номер столбца нижней половины доски, 24, 25 для полей снятых шашек или -1
+        """
+        if 56 <= x_pos <= 56 + 6 * 41:
+            return (x_pos - 56) // 41
+        if 116 + 6 * 41 <= x_pos <= 116 + 12 * 41:
+            return (x_pos - 116) // 41
+        if x_pos <= 56:
+            return 24
+        if 116 + 13 * 41 <= x_pos:
+            return 25
+        return -1
+
+    @staticmethod
+    def __base_stack(x_pos: int) -> int:
+        """Вернуть столбец стопок шашек по координате X в исходном масштабе.
+        @param x_pos Координата X
+        @return Номер столбца нижней половины доски, 24, 25 для полей снятых шашек или -1
+        """
+        column = Layout.__base_column(x_pos)
+        if column == -1 and x_pos > 116 + 12 * 41:
+            return 25
+        return column
+
+    @staticmethod
+    def __base_row(y_pos: int) -> int:
+        """Вернуть половину доски по координате Y в исходном масштабе.
+        @param y_pos Координата Y
+        @return 0 для нижней половины, 1 для верхней или -1
+        """
+        if 548 - 16 * 16 <= y_pos <= 548 + 35:
+            return 0
+        if 23 <= y_pos <= 23 + 16 * 16:
+            return 1
+        return -1
+
+
+class AbstractLayer:
+    """
+    Абстрактный класс слоя.
+    Базовый класс для всех слоев интерфейса, определяет необходимый интерфейс методов.
+    """
+
+    def __init__(self, display: Display):
+        """Конструктор.
+        @param display Экземпляр класса представления
+        """
+        self.display = display
+
+    def init(self) -> None:
+        """Инициализировать.
+        @throw NotImplementedError
+        """
+        raise NotImplementedError()
+
+    def refresh(self) -> None:
+        """Обновить слой.
+        @throw NotImplementedError
+        """
+        raise NotImplementedError()
+
+    def click(self, pos: tuple[int, int]) -> None:
+        """Обработать нажатие кнопки мыши.
+        @throw NotImplementedError
+        """
+        raise NotImplementedError()
+
+    def draw(self) -> None:
+        """Отрисовать слой.
+        @throw NotImplementedError
+        """
+        raise NotImplementedError()
+
+    def invalidate(self, buttons: list[Button], x_pos: int = 0, y_pos: int = 0) -> None:
+        """Отметить для перерисовки изменившиеся кнопки слоя.
+        @param buttons Кнопки слоя
+        @param x_pos Координата X слоя на экране
+        @param y_pos Координата Y слоя на экране
+        """
+        for button in buttons:
+            damage = button.take_damage()
+            if damage is not None:
+                self.display.invalidate(damage.move(x_pos, y_pos))
+
+
+class Menu(AbstractLayer):
+    """
+    Класс слоя меню.
+    Отвечает за отрисовку и взаимодействие пользователя с меню игры.
+    """
+
+    def __init__(self, display: Display):
+        """Конструктор.
+        @param display Экземпляр класса представления
+        """
+        super().__init__(display)
+        self.__buttons: list[Button] = []
+        self.__group: pygame.sprite.Group[Button] = pygame.sprite.Group()
+        self.__surf = pygame.Surface((self.display.width, self.display.height))
+        self.__stale = True  # Поверхность меню требует перерисовки
+        self.init()
+
+    def init(self) -> None:
+        """Инициализировать.
+
+        Кнопки создаются при первом вызове, при перезапуске партии только обновляются.
+        """
+        self.__stale = True
+        if self.__buttons:
+            self.refresh()
+            return
+        self.__surf.set_alpha(200)
+        self.__buttons.append(Button(scale=self.display.scale).init(0, "Меню:", 293, 105))
+        self.__buttons.append(Button(scale=self.display.scale).init(1, "Игрок 1:", 120, 135))
+        self.__buttons.append(Button(scale=self.display.scale).init(2, "Игрок 2:", 120, 165))
+        self.__buttons.append(Button(scale=self.display.scale).init(
+            3, "", 380, 135, ButtonStatus.ENABLED))
+        self.__buttons.append(Button(scale=self.display.scale).init(
+            4, "", 380, 165, ButtonStatus.ENABLED))
+        self.__buttons.append(
+            Button(scale=self.display.scale).init(5, "Новая партия", 120, 195, ButtonStatus.ENABLED)
+        )
+        self.__buttons.append(
+            Button(scale=self.display.scale).init(6, "Продолжить", 380, 195, ButtonStatus.DISABLED)
+        )
+        self.__buttons.append(Button(scale=self.display.scale).init(7, "Таблица рекордов:", 213, 225))
+        self.__buttons.append(Button(scale=self.display.scale).init(8, "Сыграно партий:", 120, 255))
+        self.__buttons.append(Button(scale=self.display.scale).init(
+            9, "Не доиграно партий:", 120, 285))
+        self.__buttons.append(Button(scale=self.display.scale).init(10, "Побед 1 игрока:", 120, 315))
+        self.__buttons.append(Button(scale=self.display.scale).init(11, "Побед 2 игрока:", 120, 345))
+        self.__buttons.append(Button(scale=self.display.scale).init(
+            12, "Самая короткая партия:", 120, 375))
+        self.__buttons.append(Button(scale=self.display.scale).init(
+            13, "Самая длинная партия:", 120, 405))
+        self.__buttons.append(Button(scale=self.display.scale).init(
+            14, "Среднее время партии:", 120, 435))
+        self.__buttons.append(Button(scale=self.display.scale).init(15, "", 420, 255))
+        self.__buttons.append(Button(scale=self.display.scale).init(16, "", 420, 285))
+        self.__buttons.append(Button(scale=self.display.scale).init(17, "", 420, 315))
+        self.__buttons.append(Button(scale=self.display.scale).init(18, "", 420, 345))
+        self.__buttons.append(Button(scale=self.display.scale).init(19, "", 420, 375))
+        self.__buttons.append(Button(scale=self.display.scale).init(20, "", 420, 405))
+        self.__buttons.append(Button(scale=self.display.scale).init(21, "", 420, 435))
+        self.__buttons.append(
+            Button(scale=self.display.scale).init(22, "Обнулить", 120, 465, ButtonStatus.ENABLED)
+        )
+        self.__buttons.append(
+            Button(scale=self.display.scale).init(23, "Выход", 460, 465, ButtonStatus.ENABLED)
+        )
+        self.__buttons.append(Button(scale=self.display.scale).init(24, "Редактор:", 120, 525))
+        self.__buttons.append(Button(scale=self.display.scale).init(
+            25, "On", 380, 525, ButtonStatus.ENABLED))
+        self.__buttons.append(Button(scale=self.display.scale).init(26, "Время партии:", 120, 495))
+        self.__buttons.append(Button(scale=self.display.scale).init(27, "", 380, 495))
+        self.__buttons.append(Button(scale=self.display.scale).init(28, "Скорость:", 120, 555))
+        self.__buttons.append(Button(scale=self.display.scale).init(
+            29, "", 380, 555, ButtonStatus.ENABLED))
+        self.__group.add(self.__buttons)
+        self.refresh()
+        self.__commands()
+
+    def refresh(self) -> None:
+        """Обновить меню."""
+        text = (
+            "Человек"
+            if self.display.control.settings.players[0] == Player.HUMAN
+            else "Компьютер"
+        )
+        self.__buttons[3].change(text=text)
+        text = (
+            "Человек"
+            if self.display.control.settings.players[1] == Player.HUMAN
+            else "Компьютер"
+        )
+        self.__buttons[4].change(text=text)
+        text = "On" if self.display.control.editor else "Off"
+        self.__buttons[25].change(text=text)
+        settings = self.display.control.settings
+        texts = {
+            Speed.NORMAL: "Обычная",
+            Speed.SKIP: "Без анимации",
+            Speed.EVERY_N: f"Каждый {settings.speed_moves}-й ход",
+            Speed.FINAL: "Итоги партий",
+        }
+        self.__buttons[29].change(text=texts[settings.speed])
+
+        table = self.display.control.record.get_table()
+        for i in range(4):
+            self.__buttons[i + 15].change(text=str(table[i]))
+        for i in range(3):
+            self.__buttons[i + 19].change(text=time_to_text(table[i + 4]))
+        self.__buttons[6].pushable(self.display.resume)
+        self.__buttons[27].change(text=time_to_text(self.display.control.time))
+        if not self.__stale and all(button.damage is None for button in self.__buttons):
+            return
+        self.__stale = False
+        pygame.draw.rect(self.__surf, (0, 0, 0), (self.__surf.get_rect()), 0)
+        pygame.draw.rect(self.__surf, (100, 100, 100),
+                         (self.__surf.get_rect()), round(200 * self.display.scale))
+        self.__group.draw(self.__surf)
+        if self.display.is_menu_shown():
+            self.invalidate(self.__buttons)
+        else:
+            for button in self.__buttons:
+                button.take_damage()
+
+    def __commands(self) -> None:
+        """Привязать команды к кнопкам."""
+        self.__buttons[3].command = lambda *x: self.display.control.change_settings(
+            0)
+        self.__buttons[4].command = lambda *x: self.display.control.change_settings(
+            1)
+        self.__buttons[5].command = lambda *x: self.display.control.restart()
+        self.__buttons[6].command = lambda *x: self.display.toggle_menu()
+        self.__buttons[23].command = lambda *x: self.display.control.exit()
+        self.__buttons[22].command = lambda *x: self.display.control.reset_record()
+        self.__buttons[25].command = lambda *x: self.display.control.toggle_editor()
+        self.__buttons[29].command = lambda *x: self.display.control.change_speed()
+
+    def click(self, pos: tuple[int, int]) -> None:
+        """Обработать нажатие кнопки мыши.
+        @param pos Координаты нажатия кнопки мыши
+        """
+        for key in self.__group:
+            if key.rect.collidepoint(pos) and key.status == ButtonStatus.ENABLED:
+                key.command()
+
+    def draw(self) -> None:
+        """Отрисовать меню."""
+        self.display.screen.blit(self.__surf, (0, 0))
+
+
+class Panel(AbstractLayer):
+    """
+    Класс слоя панели.
+    Слой панели управления, отображает информацию о ходах и состоянии игры, а также кнопки управления.
+    """
+
+    def __init__(self, display: Display):
+        """Конструктор.
+        @param display Экземпляр класса модели
+        """
+        super().__init__(display)
+        self.buttons: list[Button] = []
+
+        self.__group: pygame.sprite.Group[Button] = pygame.sprite.Group()
+        self.__surf = pygame.Surface((self.display.width, self.display.panel_height))
+        self.init()
+
+    def init(self) -> None:
+        """Инициализировать."""
+        self.__group.empty()
+        self.buttons.clear()
+        self.buttons.append(Button(scale=self.display.scale).init(0, "Игрок 1", 5, 5))
+        self.buttons.append(Button(scale=self.display.scale).init(1, "0:0", 315, 5))
+        self.buttons.append(
+            Button(scale=self.display.scale).init(2, "Бросьте кости", 500, 5, ButtonStatus.ENABLED)
+        )
+        self.buttons.append(Button(scale=self.display.scale).init(3, "Начало игры", 5, 35))
+        self.buttons.append(Button(scale=self.display.scale).init(
+            4, "Меню", 590, 35, ButtonStatus.ENABLED))
+        self.__commands()
+        self.__group.add(self.buttons)
+        pygame.draw.rect(self.__surf, (0, 0, 0), (self.__surf.get_rect()))
+        self.__group.draw(self.__surf)
+        self.display.invalidate(self.__surf.get_rect().move(0, self.display.panel_y))
+
+    def toggle_throw(self, push: bool) -> None:
+        """Включить/выключить кнопку броска."""
+        self.buttons[2].pushable(push)
+        self.refresh()
+
+    def refresh(self, view_dice: bool = False) -> None:
+        """Обновить панель.
+        @param view_dice Флаг отображения состояния кубиков
+        """
+        dice = self.display.control.dice
+        text = f"{dice.first}:{dice.second}"
+        self.buttons[1].change(text=text)
+        if not view_dice:
+            player = self.display.party.state.player
+            self.buttons[2].change(
+                text="Передать ход" if self.display.control.awaits_confirm() else "Бросьте кости")
+            if self.display.party.stage == Stage.TOSS:
+                self.buttons[0].change(text=f"Игрок {player+1}")
+                self.buttons[3].change(text="Розыгрыш права первого хода")
+            if self.display.party.stage in [Stage.ROLL, Stage.MOVE, Stage.NEXT]:
+                color = (
+                    "белые"
+                    if player ^ self.display.party.state.color == 0
+                    else "черные"
+                )
+                move = self.display.party.state.move
+                step = self.display.party.state.step
+                left = self.display.party.state.left
+                self.buttons[0].change(text=f"Игрок {player+1} ({color})")
+                text = f"Ход {move+1} Шаг {step+1}/{left+step}"
+                if self.display.party.stage == Stage.ROLL:
+                    text = f"Ход {move+1}"
+                elif self.display.party.stage == Stage.NEXT:
+                    text = f"Ход {move+1} сыгран"
+                self.buttons[3].change(text=text)
+            if self.display.party.stage == Stage.WIN:
+                color = (
+                    "Белые"
+                    if player ^ self.display.party.state.color == 0
+                    else "Черные"
+                )
+                text = f"{color} выиграли! Игрок {player+1} побеждает"
+                self.buttons[3].change(text=text)
+        if all(button.damage is None for button in self.buttons):
+            return
+        pygame.draw.rect(self.__surf, (0, 0, 0), (self.__surf.get_rect()))
+        self.__group.draw(self.__surf)
+        self.invalidate(self.buttons, 0, self.display.panel_y)
+
+    def __commands(self) -> None:
+        """Привязать команды к кнопкам."""
+        self.buttons[2].command = lambda *x: self.display.control.throw_dice()
+        self.buttons[4].command = lambda *x: self.display.toggle_menu()
+
+    def click(self, pos: tuple[int, int]) -> None:
+        """Обработать нажатие кнопки мыши.
+        @param pos Координаты нажатия кнопки мыши
+        """
+        for key in self.__group:
+            if (
+                key.rect.collidepoint(
+                    (pos[0], pos[1] - self.display.panel_y))
+                and key.status == ButtonStatus.ENABLED
+            ):
+                key.command()
+
+    def draw(self) -> None:
+        """Отрисовать панель."""
+        self.display.screen.blit(self.__surf, (0, self.display.panel_y))
+
+
+class Pieces(AbstractLayer):
+    """
+    Класс слоя шашек.
+    Отвечает за отрисовку шашек на доске и их взаимодействие.
+    """
+
+    def __init__(self, display: Display):
+        """Конструктор.
+        @param display Экземпляр класса представления
+        """
+        super().__init__(display)
+        self.group: pygame.sprite.OrderedUpdates = pygame.sprite.OrderedUpdates()
+        self.stay = False
+
+        # Пул шашек, переиспользуемых между партиями
+        self.__pieces: list[Piece] = []
+        # Доска с неподвижными шашками и набор шашек, не вошедших в нее
+        self.__static = pygame.Surface(
+            (self.display.width, self.display.height)).convert()
+        self.__moving: frozenset[Piece] = frozenset()
+        self.__stale = True
+        self.changed = True  # Позиция изменилась после последнего обновления слоя
+        self.__full = True  # Расставить все шашки заново
+        self.__points: set[int] = set()  # Поля, шашки которых нужно расставить
+        self.display.party.subscribe(Event.POSITION_RESET, self.__on_position_reset)
+        self.display.party.subscribe(Event.MOVE_APPLIED, self.__on_move_applied)
+        self.display.party.subscribe(Event.MOVE_UNDONE, self.__on_move_applied)
+        self.init()
+
+    def __on_position_reset(self) -> None:
+        """Отметить, что все шашки нужно расставить заново."""
+        self.changed = True
+        self.stay = False
+        self.__full = True
+
+    def __on_move_applied(self, start: int, end: int) -> None:
+        """Отметить поля хода для обновления.
+        @param start Позиция начала хода
+        @param end Позиция конца хода
+        """
+        self.changed = True
+        self.stay = False
+        self.__points.update((start, end))
+
+    def init(self) -> None:
+        """Инициализировать."""
+        self.stay = False
+        self.__stale = True
+        self.group.empty()
+        while len(self.__pieces) < self.display.party.state.amount:
+            self.__pieces.append(Piece(self.display.layout))
+        ind = self.display.party.state.ind
+        for i, _ in enumerate(ind):
+            if ind[i][0] != -1:
+                for j in range(1, len(ind[i])):
+                    player = ind[i][0]
+                    tmp = self.__pieces[ind[i][j]]
+                    tmp.init(ind[i][j], i, 0, player)
+                    self.group.add(tmp)
+
+    def sync(self) -> None:
+        """Отметить слой неподвижных шашек устаревшим, если изменился набор движущихся.
+
+        Области шашек, которые начали или закончили движение, отмечаются для перерисовки.
+        """
+        moving = frozenset(
+            piece for piece in self.group if piece.status != PieceStatus.STAY)
+        if moving != self.__moving:
+            for piece in moving ^ self.__moving:
+                self.display.invalidate(piece.rect)
+            self.__moving = moving
+            self.__stale = True
+
+    def __build(self) -> None:
+        """Перестроить слой доски с неподвижными шашками."""
+        self.__static.fill((0, 0, 0))
+        self.__static.blit(self.display.background, (0, 0))
+        self.__static.blits([
+            (piece.image, piece.rect)
+            for piece in self.group if piece.status == PieceStatus.STAY
+        ], doreturn=False)
+        self.__stale = False
+
+    def draw(self) -> None:
+        """Отрисовать доску с неподвижными шашками и движущиеся шашки поверх."""
+        if self.__stale:
+            self.__build()
+        self.display.screen.blit(self.__static, (0, 0))
+        self.display.screen.blits([
+            (piece.image, piece.rect)
+            for piece in self.group if piece.status != PieceStatus.STAY
+        ], doreturn=False)
+
+    def click(self, pos: tuple[int, int]) -> None:
+        """Обработать нажатие кнопки мыши.
+        @param pos Координаты нажатия кнопки мыши
+        """
+        point = self.display.layout.stack_at(pos)
+        if point == -1 or len(self.display.party.state.ind[point]) < 2:
+            return
+        selected_key = self.__pieces[self.display.party.state.ind[point][-1]]
+        if selected_key.rect.collidepoint(pos):
+            selected_key.old_x = selected_key.rect.x
+            selected_key.old_y = selected_key.rect.y
+            selected_key.status = PieceStatus.CLICKED
+            selected_key.remove(self.group)
+            selected_key.add(self.group)
+            self.display.invalidate(selected_key.rect)
+
+    def release(self) -> None:
+        """Обработать отпускание кнопки мыши."""
+        for key in self.group:
+            if key.status == PieceStatus.CLICKED:
+                pos = key.get_pos()
+                if (
+                    self.display.control.settings.players[
+                        self.display.party.state.player
+                    ]
+                    == Player.COMPUTER
+                    or pos == -1
+                    or not self.display.control.try_move(key.color, key.pos, pos)
+                ):
+                    key.go_home()
+                    self.stay = False
+
+    def refresh(self) -> None:
+        """Обновить слой шашек.
+
+        Расставляются только шашки полей, затронутых ходами с прошлого обновления.
+        Шашка, еще идущая на прежнее место, получает новое место после прихода,
+        поэтому ее поле проверяется при следующих обновлениях.
+        """
+        self.changed = False
+        if self.__full:
+            self.__full = False
+            self.__points = set(range(26))
+            self.group.empty()
+            ind = self.display.party.state.ind
+            for j in range(1, 17):
+                for i in range(26):
+                    if ind[i][0] != -1 and j < len(ind[i]):
+                        self.group.add(self.__pieces[ind[i][j]])
+        points, self.__points = self.__points, set()
+        for point in points:
+            if not self.__place(point):
+                self.__points.add(point)
+        self.changed = bool(self.__points)
+
+    def __place(self, point: int) -> bool:
+        """Отправить на свои места шашки поля.
+        @param point Номер поля
+        @return Флаг того, что все шашки поля получили свои места
+        """
+        placed = True
+        ind = self.display.party.state.ind[point]
+        for hgt, piece_id in enumerate(ind[1:]):
+            piece = self.__pieces[piece_id]
+            if piece.pos == point and piece.hgt == hgt:
+                continue
+            if piece.status == PieceStatus.TO_HOME:
+                placed = False
+                continue
+            if piece.pos != point and hgt == len(ind) - 2:
+                # Пришедшая шашка лежит поверх остальных шашек поля
+                piece.remove(self.group)
+                piece.add(self.group)
+            self.stay = False
+            piece.pos = point
+            piece.hgt = hgt
+            piece.home_x, piece.home_y = piece.pos_to_coord()
+            piece.go_home()
+        return placed
+
+
+class Overlay(AbstractLayer):
+    """
+    Класс слоя профилировщика.
+    Показывает поверх доски время фаз игрового цикла и статистику кадров.
+    """
+
+    def __init__(self, display: Display):
+        """Конструктор.
+        @param display Экземпляр класса представления
+        """
+        super().__init__(display)
+        self.visible = False
+        self.__buttons: list[Button] = []
+        self.__group: pygame.sprite.Group[Button] = pygame.sprite.Group()
+        self.__surf: pygame.Surface | None = None  # Создается при первом показе
+
+    def init(self) -> None:
+        """Инициализировать."""
+        self.__surf = pygame.Surface(
+            (round(420 * self.display.scale), round(220 * self.display.scale)))
+        self.__surf.set_alpha(200)
+        self.__group.empty()
+        self.__buttons.clear()
+        for i in range(7):
+            self.__buttons.append(Button(scale=self.display.scale).init(i, "", 5, 5 + i * 30))
+        self.__group.add(self.__buttons)
+
+    def toggle(self) -> None:
+        """Показать/скрыть слой."""
+        self.visible = not self.visible
+        if self.__surf is None:
+            self.init()
+        self.display.invalidate(self.__surf.get_rect())
+        self.refresh()
+
+    def refresh(self) -> None:
+        """Обновить слой по данным профилировщика за прошедший интервал."""
+        lap = self.display.profiler.lap()
+        stats = self.display.party.stats
+        if not self.visible:
+            return
+        texts = [
+            f"Кадров/с: {lap['fps']:.0f}, кадр {lap['frame_ms']:.2f} мс",
+            f"Ввод: {lap['input_ms']:.3f} мс",
+            f"Обновление: {lap['update_ms']:.3f} мс",
+            f"Отрисовка: {lap['render_ms']:.3f} мс",
+            f"Перерисовок: {lap['redraws']}/{lap['partial']}, пропусков: {lap['skipped']}",
+            f"Кадров дольше 16 мс: {lap['slow']}",
+            f"Поиск: {stats.nodes} узлов, {stats.summary()['avg_decision_ms']:.1f} мс",
+        ]
+        for button, text in zip(self.__buttons, texts):
+            button.change(text=text)
+        if self.__surf is None or all(button.damage is None for button in self.__buttons):
+            return
+        pygame.draw.rect(self.__surf, (0, 0, 0), (self.__surf.get_rect()))
+        self.__group.draw(self.__surf)
+        self.invalidate(self.__buttons)
+
+    def click(self, pos: tuple[int, int]) -> None:
+        """Обработать нажатие кнопки мыши (слой не реагирует на нажатия).
+        @param pos Координаты нажатия кнопки мыши
+        """
+
+    def draw(self) -> None:
+        """Отрисовать слой."""
+        if self.visible and self.__surf is not None:
+            self.display.screen.blit(self.__surf, (0, 0))
+
+
+class Profiler:
+    """
+    Класс профилировщика игрового цикла.
+    Собирает время фаз кадра, гистограмму длительности кадров и число перерисовок.
+    """
+
+    PHASES = ("input", "update", "render")
+    ## Верхние границы интервалов гистограммы длительности кадра, мс
+    BUCKETS = (1, 2, 4, 8, 16, 33, 66)
+
+    def __init__(self):
+        """Конструктор."""
+        self.frames = 0
+        self.redraws = 0
+        self.partial = 0
+        self.skipped = 0
+        self.frame_total = 0.0
+        self.frame_max = 0.0
+        self.phase_total = dict.fromkeys(self.PHASES, 0.0)
+        self.phase_max = dict.fromkeys(self.PHASES, 0.0)
+        self.histogram = [0] * (len(self.BUCKETS) + 1)
+        self.__frame_start = time.perf_counter()
+        self.__lap: dict[str, float] = self.__counters()
+
+    def measure(self, phase: str, func) -> None:
+        """Выполнить фазу кадра с замером времени.
+        @param phase Название фазы
+        @param func Функция фазы
+        """
+        start = time.perf_counter()
+        func()
+        elapsed = time.perf_counter() - start
+        self.phase_total[phase] += elapsed
+        self.phase_max[phase] = max(self.phase_max[phase], elapsed)
+
+    def count_draw(self, rects: int, full: bool) -> None:
+        """Учесть полную или частичную перерисовку или пропуск кадра.
+        @param rects Число перерисованных областей
+        @param full Флаг перерисовки экрана целиком
+        """
+        if full:
+            self.redraws += 1
+        elif rects:
+            self.partial += 1
+        else:
+            self.skipped += 1
+
+    def end_frame(self) -> None:
+        """Завершить кадр."""
+        now = time.perf_counter()
+        elapsed = now - self.__frame_start
+        self.__frame_start = now
+        self.frames += 1
+        self.frame_total += elapsed
+        self.frame_max = max(self.frame_max, elapsed)
+        bucket = 0
+        while bucket < len(self.BUCKETS) and elapsed * 1000 > self.BUCKETS[bucket]:
+            bucket += 1
+        self.histogram[bucket] += 1
+
+    def __counters(self) -> dict[str, float]:
+        """Вернуть текущие значения накопительных счетчиков.
+        @return Счетчики по названиям
+        """
+        counters = {
+            "time": time.perf_counter(),
+            "frames": self.frames,
+            "frame": self.frame_total,
+            "redraws": self.redraws,
+            "partial": self.partial,
+            "skipped": self.skipped,
+            "slow": sum(self.histogram[self.BUCKETS.index(16) + 1:]),
+        }
+        for phase in self.PHASES:
+            counters[phase] = self.phase_total[phase]
+        return counters
+
+    def lap(self) -> dict[str, float]:
+        """Вернуть статистику с предыдущего вызова.
+        @return Средние значения и счетчики за интервал
+        """
+        current = self.__counters()
+        diff = {key: current[key] - self.__lap[key] for key in current}
+        self.__lap = current
+        frames = max(diff["frames"], 1)
+        lap = {
+            "fps": diff["frames"] / diff["time"] if diff["time"] > 0 else 0.0,
+            "frame_ms": diff["frame"] * 1000 / frames,
+            "redraws": int(diff["redraws"]),
+            "partial": int(diff["partial"]),
+            "skipped": int(diff["skipped"]),
+            "slow": int(diff["slow"]),
+        }
+        for phase in self.PHASES:
+            lap[f"{phase}_ms"] = diff[phase] * 1000 / frames
+        return lap
+
+    def summary(self) -> dict:
+        """Получить итоговую статистику.
+        @return Статистика за все время работы
+        """
+        frames = max(self.frames, 1)
+        labels = [f"<={limit}ms" for limit in self.BUCKETS]
+        labels.append(f">{self.BUCKETS[-1]}ms")
+        return {
+            "frames": self.frames,
+            "full_redraws": self.redraws,
+            "partial_redraws": self.partial,
+            "skipped_frames": self.skipped,
+            "frame_ms": {
+                "avg": self.frame_total * 1000 / frames,
+                "max": self.frame_max * 1000,
+            },
+            "phases_ms": {
+                phase: {
+                    "avg": self.phase_total[phase] * 1000 / frames,
+                    "max": self.phase_max[phase] * 1000,
+                }
+                for phase in self.PHASES
+            },
+            "histogram": dict(zip(labels, self.histogram)),
+        }
+
+    def write(self, filename: str) -> None:
+        """Записать итоговую статистику в файл.
+        @param filename Имя файла
+        """
+        with open(filename, "w", encoding="utf-8") as file:
+            json.dump(self.summary(), file, indent=4)
+
+
+class Display:
+    """
+    Класс представления.
+    Отвечает за визуализацию игры, управляет слоями интерфейса и отображением элементов игры на экране.
+
+    \image html board.jpg "Вид игровой доски"
+    """
+
+    ## Размер окна в исходном масштабе
+    WIDTH = 665
+    HEIGHT = 667
+
+    def __init__(self, party: Party, control: Control,
+                 profiler: Profiler | None = None,
+                 size: tuple[int, int] | None = None, fullscreen: bool = False):
+        """Конструктор.
+
+        Доска и интерфейс масштабируются под размер окна с сохранением пропорций.
+        @param party Экземпляр класса модели
+        @param control Экземпляр класса контроллера
+        @param profiler Профилировщик игрового цикла
+        @param size Размер окна (по умолчанию исходный)
+        @param fullscreen Флаг полноэкранного режима (размер берется у экрана)
+        """
+        # Инициализация переменных
+        self.party = party
+        self.control = control
+        self.profiler = profiler if profiler is not None else Profiler()
+        self.update = True
+        self.resume = False
+        if fullscreen:
+            self.screen = pygame.display.set_mode((0, 0), pygame.FULLSCREEN)
+        else:
+            self.screen = pygame.display.set_mode(size or (self.WIDTH, self.HEIGHT))
+        self.width, self.height = self.screen.get_size()
+        self.scale = min(self.width / self.WIDTH, self.height / self.HEIGHT)
+        self.layout = Layout(self.scale)
+        self.panel_y = self.layout.height  # Панель лежит под доской
+        self.panel_height = round((self.HEIGHT - Layout.HEIGHT) * self.scale)
+
+        # Приватные переменные
+        self.__view_menu = True
+        self.__full = True  # Перерисовать экран целиком
+        self.__dirty: list[pygame.Rect] = []  # Области для перерисовки
+        self.background = load_scaled(
+            "./resources/board.jpg", (self.layout.width, self.layout.height), False)
+
+        self.pieces = Pieces(self)
+        self.menu = Menu(self)
+        self.panel = Panel(self)
+        self.overlay = Overlay(self)
+
+        # Установка иконки и заголовка окна
+        pygame.display.set_icon(load_image("./resources/icon.png"))
+        pygame.display.set_caption("Длинные нарды")
+        self.control.set_display(self)
+        for event in [Event.STAGE_CHANGED, Event.DICE_ROLLED, Event.MOVE_APPLIED,
+                      Event.MOVE_UNDONE, Event.TURN_UNDONE]:
+            self.party.subscribe(event, self.__on_party_changed)
+        self.init()
+
+    def init(self) -> None:
+        """Инициализировать представление."""
+        self.menu.init()
+        self.panel.init()
+        self.pieces.refresh()
+
+    def refresh(self) -> None:
+        """Обновить представление целиком."""
+        self.update = True
+        self.__full = True
+
+    def invalidate(self, rect: pygame.Rect) -> None:
+        """Отметить область экрана для перерисовки.
+        @param rect Область экрана
+        """
+        self.update = True
+        self.__dirty.append(pygame.Rect(rect))
+
+    def toggle_menu(self, view: bool | None = None) -> None:
+        """Показать/скрыть меню.
+        @param view Флаг включения меню
+        """
+        if view is None:
+            self.__view_menu = not self.__view_menu
+        else:
+            self.__view_menu = view
+        self.refresh()
+
+    def is_menu_shown(self) -> bool:
+        """Вернуть видимость меню.
+        @return Флаг показа меню
+        """
+        return self.__view_menu
+
+    def is_animating(self) -> bool:
+        """Проверить, движется ли какая-либо шашка.
+        @return Флаг анимации шашек
+        """
+        return not self.pieces.stay or any(
+            piece.status != PieceStatus.STAY for piece in self.pieces.group
+        )
+
+    def __on_party_changed(self, **_) -> None:
+        """Обновить панель при изменении партии."""
+        self.panel.refresh()
+
+    def process(self, step: float = 1 / 60) -> None:
+        """Обновить состояние представления.
+
+        Слой шашек обновляется только после изменения позиции, двигаются только нестоящие шашки.
+        Флаг stay снимается, пока какая-либо шашка идет на место.
+        @param step Прошедшее время, с
+        """
+        if self.pieces.changed:
+            self.pieces.refresh()
+        moving = [key for key in self.pieces.group if key.status != PieceStatus.STAY]
+        for key in moving:
+            self.__process_piece(key, step)
+        if not self.pieces.stay:
+            self.pieces.stay = not self.pieces.changed and all(
+                key.status != PieceStatus.TO_HOME for key in moving)
+
+    def skip_animation(self) -> None:
+        """Завершить анимацию: все идущие на место шашки сразу встают на свои места."""
+        while True:
+            if self.pieces.changed:
+                self.pieces.refresh()
+            moving = [key for key in self.pieces.group
+                      if key.status == PieceStatus.TO_HOME]
+            if not moving:
+                break
+            for key in moving:
+                key.elapsed = math.inf
+                self.__process_piece(key, 0)
+        self.pieces.stay = True
+
+    def __process_piece(self, piece: Piece, step: float) -> None:
+        """Обработать состояние отдельной шашки.
+        @param piece Шашка
+        @param step Прошедшее время, с
+        """
+        old = piece.rect.copy()
+        if piece.status == PieceStatus.CLICKED:
+            self.__move_clicked_piece(piece)
+        elif piece.status == PieceStatus.TO_HOME:
+            self.__move_piece_to_home(piece, step)
+        if piece.rect != old:
+            self.invalidate(old.union(piece.rect))
+
+    def __move_clicked_piece(self, piece: Piece) -> None:
+        """Перемещать шашку при клике.
+        @param piece Шашка
+        """
+        pos = pygame.mouse.get_pos()
+        piece.rect.x = pos[0] - piece.rect.width // 2
+        piece.rect.y = pos[1] - piece.rect.height // 2
+
+    def __move_piece_to_home(self, piece: Piece, step: float) -> None:
+        """Отправить шашку домой.
+
+        Шашка проходит путь за время settings.animation со сглаживанием settings.easing.
+        @param piece Шашка
+        @param step Прошедшее время, с
+        """
+        settings = self.control.settings
+        piece.old_x, piece.old_y = piece.rect.x, piece.rect.y
+        piece.animate(step, settings.animation, EASINGS[settings.easing])
+
+    def draw(self) -> list[pygame.Rect]:
+        """Отрисовать изменившиеся области представления.
+
+        Каждая область перерисовывается всеми слоями с отсечением по ней.
+        @return Перерисованные области экрана
+        """
+        self.pieces.sync()
+        if not self.update:
+            return []
+        screen_rect = self.screen.get_rect()
+        if self.__full:
+            rects = [screen_rect]
+        else:
+            rects = [rect.clip(screen_rect) for rect in self.__dirty]
+            rects = [rect for rect in rects if rect.width and rect.height]
+            if len(rects) > 8:
+                rects = [rects[0].unionall(rects[1:])]
+        for rect in rects:
+            self.screen.set_clip(rect)
+            self.pieces.draw()
+            self.panel.draw()
+            if self.__view_menu:
+                self.menu.draw()
+            self.overlay.draw()
+        self.screen.set_clip(None)
+        self.update = False
+        self.__full = False
+        self.__dirty.clear()
+        return rects
+
+    def command(self, event: pygame.event.Event) -> None:
+        """Обработать события.
+        @param event Событие
+        """
+        if event.type == pygame.USEREVENT + 1:
+            self.control.timer()
+            self.overlay.refresh()
+        if event.type == pygame.KEYDOWN and event.key == pygame.K_F3:
+            self.overlay.toggle()
+        if event.type == pygame.KEYDOWN and event.key == pygame.K_SPACE:
+            self.skip_animation()
+        if event.type == pygame.KEYDOWN and pygame.key.get_mods() & pygame.KMOD_CTRL:
+            if event.key == pygame.K_c:
+                self.__copy_position()
+            elif event.key == pygame.K_v:
+                self.__paste_position()
+            elif event.key == pygame.K_z:
+                self.control.undo()
+            elif event.key == pygame.K_y:
+                self.control.redo()
+
+        if self.__view_menu:
+            self.__handle_menu_event(event)
+        else:
+            self.__handle_game_event(event)
+
+    def __copy_position(self) -> None:
+        """Скопировать идентификатор позиции в буфер обмена."""
+        try:
+            if not pygame.scrap.get_init():
+                pygame.scrap.init()
+            pygame.scrap.put(pygame.SCRAP_TEXT, self.party.state.position_id().encode())
+        except pygame.error:
+            pass  # Буфер обмена недоступен (например, драйвер SDL без окна)
+
+    def __paste_position(self) -> None:
+        """Расставить позицию из буфера обмена в режиме редактирования."""
+        try:
+            if not pygame.scrap.get_init():
+                pygame.scrap.init()
+            data = pygame.scrap.get(pygame.SCRAP_TEXT)
+        except pygame.error:
+            return
+        if data and self.control.paste_position(data.decode(errors="ignore").strip("\x00")):
+            self.refresh()
+            self.panel.refresh()
+
+    def __handle_menu_event(self, event: pygame.event.Event) -> None:
+        """Обработать события в меню.
+        @param event Событие
+        """
+        if event.type == pygame.MOUSEBUTTONDOWN:
+            pos = pygame.mouse.get_pos()
+            if event.button == 1:
+                self.menu.click(pos)
+
+    def __handle_game_event(self, event: pygame.event.Event) -> None:
+        """Обработать события в игре.
+        @param event Событие
+        """
+        if event.type == pygame.MOUSEBUTTONDOWN:
+            pos = pygame.mouse.get_pos()
+            if event.button == 1:
+                self.panel.click(pos)
+                self.pieces.click(pos)
+        elif event.type == pygame.MOUSEBUTTONUP:
+            self.pieces.release()
+
+
+class Game:
+    """
+    Основной класс игры.
+    Инициализирует и управляет основными компонентами игры, такими как модель, контроллер и представление.
+    """
+
+    ## Наибольшая частота кадров во время анимации
+    FPS = 60
+    ## Шаг обновления состояния игры, с
+    STEP = 1 / 60
+    ## Наибольшее отставание обновления от реального времени, с
+    MAX_LAG = 0.25
+    ## Доля кадра, отводимая на ходы ускоренного режима
+    BUDGET = 0.8
+
+    def __init__(self, record: Record, profile_file: str = "",
+                 telemetry_file: str = "", settings: Settings | None = None,
+                 size: tuple[int, int] | None = None, fullscreen: bool = False,
+                 headless: bool = False, frames_dir: str = "", games: int = 1,
+                 log: GameLog | None = None, snapshot_file: str = ""):
+        """Конструктор.
+
+        Без окна кадры рисуются драйвером SDL dummy, каждый кадр продвигает игру на один шаг
+        без ожидания реального времени, игра завершается после games партий.
+        Недоигранная при выходе партия сохраняется в снимок и продолжается при следующем запуске.
+        @param record Статистика
+        @param profile_file Имя файла для статистики профилировщика
+        @param telemetry_file Имя файла для сводок телеметрии поиска
+        @param settings Настройки (по умолчанию - два игрока-человека)
+        @param size Размер окна (по умолчанию исходный)
+        @param fullscreen Флаг полноэкранного режима
+        @param headless Флаг работы без окна
+        @param frames_dir Каталог для кадров в формате PNG при работе без окна
+        (пустая строка - не сохранять)
+        @param games Число партий до завершения при работе без окна
+        @param log Журнал партий
+        @param snapshot_file Имя файла снимка недоигранной партии (пустая строка - не сохранять)
+        @throw ValueError Кадры сохраняются только без окна
+        """
+        if frames_dir and not headless:
+            raise ValueError("frames_dir requires headless mode")
+        self.record = record
+        self.__profile_file = profile_file
+        self.__snapshot_file = snapshot_file
+        self.__profiler = Profiler()
+        self.__headless = headless
+        self.__frames_dir = frames_dir
+        self.__frame = 0  # Номер следующего сохраняемого кадра
+        self.__games = games  # Партии, оставшиеся до завершения без окна
+
+        os.environ["SDL_VIDEO_CENTERED"] = "1"
+        if headless:
+            os.environ["SDL_VIDEODRIVER"] = "dummy"
+        if frames_dir:
+            os.makedirs(frames_dir, exist_ok=True)
+        init_pygame()
+        pygame.time.set_timer(pygame.USEREVENT + 1, 1000)
+        # Перетаскивание шашки читает положение мыши, события движения не нужны
+        pygame.event.set_blocked(pygame.MOUSEMOTION)
+        self.__clock = pygame.time.Clock()
+        self.__previous = time.perf_counter()
+        self.__lag = 0.0
+        self.__hold = False  # Порция ходов ускоренного режима не доиграна, кадр не рисуется
+        self.__settings = (settings if settings is not None
+                           else Settings([Player.HUMAN, Player.HUMAN]))
+
+        self.__party = Party()  # Model
+        self.__control = Control(
+            self.__party, self.__settings, self.record
+        )  # Controller
+        self.__control.telemetry_file = telemetry_file
+        if log is not None:
+            log.attach(self.__party)
+        self.__display = Display(
+            self.__party, self.__control, self.__profiler, size,
+            fullscreen and not headless)  # View
+        # self.__party.display = self.display
+        if headless:
+            self.__party.subscribe(Event.GAME_WON, self.__on_game_won)
+            self.__control.restart()
+        elif snapshot_file and self.__control.load_snapshot(snapshot_file):
+            self.__resume()
+
+    def __resume(self) -> None:
+        """Показать доску продолженной из снимка партии."""
+        self.__display.resume = True
+        self.__display.init()
+        self.__display.toggle_menu(False)
+        self.__display.panel.toggle_throw(self.__party.stage == Stage.ROLL)
+        self.__display.menu.refresh()
+
+    def __on_game_won(self, **_) -> None:
+        """Завершить работу без окна после последней партии."""
+        self.__games -= 1
+        if self.__games <= 0:
+            # Оставить конечную позицию на доске вместо новой партии
+            self.__display.resume = True
+            self.__control.exit()
+
+    def __is_active(self) -> bool:
+        """Проверить, нужно ли обновлять игру без участия пользователя.
+        @return Флаг анимации, перерисовки или хода компьютера
+        """
+        return (
+            self.__display.update
+            or self.__display.is_animating()
+            or self.__control.is_busy()
+        )
+
+    def __process_input(self) -> None:
+        """Обработать события.
+
+        При простое цикл блокируется до следующего события.
+        """
+        events = pygame.event.get()
+        if not events and not self.__is_active() and not self.__headless:
+            events = [pygame.event.wait()]
+            self.__previous = time.perf_counter() - self.STEP
+        for event in events:
+            if event.type == pygame.QUIT:
+                self.__control.exit()
+            elif event.type == pygame.MOUSEBUTTONDOWN:
+                self.__display.command(event)
+            elif event.type == pygame.MOUSEBUTTONUP:
+                self.__display.command(event)
+            elif event.type == pygame.KEYDOWN:
+                self.__display.command(event)
+            elif event.type == pygame.USEREVENT + 1:
+                self.__display.command(event)
+
+    def __update(self) -> None:
+        """Обновить состояние игры с фиксированным шагом.
+
+        Ходы ускоренного режима играются один раз за кадр в пределах доли кадра,
+        кадр рисуется, только когда порция ходов доиграна.
+        """
+        now = time.perf_counter()
+        if self.__headless:
+            self.__lag += self.STEP  # Без окна кадр равен шагу, реальное время не ждем
+        else:
+            self.__lag = min(self.__lag + now - self.__previous, self.MAX_LAG)
+        self.__previous = now
+        fast = self.__control.is_fast_forward()
+        self.__hold = fast and not self.__control.fast_forward(now + self.BUDGET / self.FPS)
+        while self.__lag >= self.STEP:
+            self.__display.process(self.STEP)
+            if not fast:
+                self.__control.process()
+            self.__lag -= self.STEP
+
+    def __render(self) -> None:
+        """Отрисовать."""
+        rects = [] if self.__hold else self.__display.draw()
+        self.__profiler.count_draw(
+            len(rects), rects == [self.__display.screen.get_rect()])
+        if rects:
+            pygame.display.update(rects)
+        if self.__frames_dir:
+            self.__save_frame(bool(rects))
+
+    def __save_frame(self, changed: bool) -> None:
+        """Сохранить кадр в каталог кадров.
+
+        Неизменившийся кадр копируется из предыдущего файла без повторного кодирования,
+        так что последовательность идет без пропусков с частотой шага игры.
+        @param changed Флаг изменения экрана с прошлого кадра
+        """
+        filename = os.path.join(self.__frames_dir, f"frame_{self.__frame:06d}.png")
+        if changed or self.__frame == 0:
+            save_png(self.__display.screen, filename)
+        else:
+            previous = os.path.join(self.__frames_dir, f"frame_{self.__frame - 1:06d}.png")
+            shutil.copyfile(previous, filename)
+        self.__frame += 1
+
+    def __update_record(self) -> None:
+        """Обновить статистику."""
+        if self.__snapshot_file:
+            self.__control.save_snapshot(self.__snapshot_file)
+        elif self.__control.save:
+            self.record.underplayed += 1
+        pygame.quit()
+        clear_cache()
+
+    def frame(self) -> None:
+        """Выполнить один кадр основного цикла."""
+        self.__profiler.measure("input", self.__process_input)
+        self.__profiler.measure("update", self.__update)
+        self.__profiler.measure("render", self.__render)
+        if self.__is_active() and not self.__headless:
+            self.__clock.tick(self.FPS)
+        self.__profiler.end_frame()
+
+    def run(self) -> None:
+        """Запустить основной цикл."""
+        while self.__control.is_running() or (
+                self.__headless and self.__display.is_animating()):
+            self.frame()
+
+        self.__update_record()
+        if self.__profile_file:
+            self.__profiler.write(self.__profile_file)
+
+    def save_record_to_file(self, filename: str) -> None:
+        """Сохранить текущую статистику в файл.
+        @param filename Имя файла
+        """
+        self.record.write(filename)
+
+
+@dataclass
+class Tile:
+    """
+    Класс доски плиточного представления.
+    Хранит партию компьютера с компьютером и ее область на экране.
+    """
+
+    party: Party
+    control: Control
+    rect: pygame.Rect
+    changed: bool = True  # Доску нужно перерисовать
+    moves: int = 0  # Ходы, сыгранные с последней перерисовки
+
+
+class TiledGame:
+    """
+    Класс плиточного представления.
+    Играет несколько независимых партий компьютера с компьютером и показывает их уменьшенные доски сеткой.
+    """
+
+    ## Частота кадров
+    FPS = 30
+    ## Доля кадра, отводимая на ходы компьютера
+    BUDGET = 0.8
+    ## Наибольший размер окна
+    MAX_SIZE = (1280, 960)
+
+    def __init__(self, count: int, record: Record, settings: Settings,
+                 telemetry_file: str = "", log: GameLog | None = None):
+        """Конструктор.
+        @param count Число досок
+        @param record Статистика всех партий
+        @param settings Настройки (типы игроков заменяются на компьютер)
+        @param telemetry_file Имя файла для сводок телеметрии поиска
+        @param log Журнал партий
+        """
+        self.record = record
+        self.settings = settings
+        self.settings.players = [Player.COMPUTER, Player.COMPUTER]
+        columns = math.ceil(math.sqrt(count))
+        rows = math.ceil(count / columns)
+        scale = min(1.0, self.MAX_SIZE[0] / (columns * Layout.WIDTH),
+                    self.MAX_SIZE[1] / (rows * Layout.HEIGHT))
+        self.layout = Layout(scale)
+
+        os.environ["SDL_VIDEO_CENTERED"] = "1"
+        init_pygame()
+        self.screen = pygame.display.set_mode(
+            (columns * self.layout.width, rows * self.layout.height))
+        pygame.display.set_caption("Длинные нарды")
+        self.__clock = pygame.time.Clock()
+        self.__run = True
+        self.__next = 0  # Доска, с которой начинаются ходы следующего кадра
+
+        self.__background = load_scaled(
+            "./resources/board.jpg", (self.layout.width, self.layout.height), False)
+        size = (self.layout.piece, self.layout.piece)
+        self.__images = [load_scaled("./resources/white.png", size),
+                         load_scaled("./resources/black.png", size)]
+
+        self.tiles: list[Tile] = []
+        for i in range(count):
+            party = Party()
+            control = Control(party, self.settings, self.record)
+            control.telemetry_file = telemetry_file
+            if log is not None:
+                log.attach(party)
+            rect = pygame.Rect((i % columns) * self.layout.width,
+                               (i // columns) * self.layout.height,
+                               self.layout.width, self.layout.height)
+            tile = Tile(party, control, rect)
+            party.start_party()
+            self.tiles.append(tile)
+
+    def __play(self) -> None:
+        """Сделать ходы на досках в пределах доли кадра.
+
+        Доски обходятся по кругу, каждая продвигается не больше чем на одну порцию ходов за кадр.
+        """
+        deadline = time.perf_counter() + self.BUDGET / self.FPS
+        for i in range(len(self.tiles)):
+            if time.perf_counter() >= deadline:
+                break
+            index = (self.__next + i) % len(self.tiles)
+            self.__play_tile(self.tiles[index], deadline)
+            self.__next = (index + 1) % len(self.tiles)
+
+    def __play_tile(self, tile: Tile, deadline: float) -> None:
+        """Сыграть ходы на доске до конца порции по скорости из настроек или до конца кадра.
+
+        Доска перерисовывается после порции: хода для NORMAL и SKIP, N ходов для EVERY_N,
+        партии для FINAL. Недоигранная порция продолжается в следующем кадре.
+        @param tile Доска
+        @param deadline Время окончания ходов кадра
+        """
+        party = tile.party
+        if party.stage == Stage.WIN:
+            party.new_party()
+            party.start_party()
+            tile.moves = 0
+        while party.stage != Stage.WIN and time.perf_counter() < deadline:
+            rolled = party.stage == Stage.ROLL
+            if not tile.control.play_turn():
+                break
+            tile.moves += rolled
+            if self.settings.speed in [Speed.NORMAL, Speed.SKIP] or (
+                    self.settings.speed == Speed.EVERY_N
+                    and tile.moves >= self.settings.speed_moves):
+                tile.moves = 0
+                tile.changed = True
+                break
+        if party.stage == Stage.WIN:
+            tile.changed = True
+
+    def __render(self) -> None:
+        """Перерисовать изменившиеся доски одним пакетом."""
+        batch: list[tuple[pygame.Surface, tuple[int, int]]] = []
+        rects = []
+        for tile in self.tiles:
+            if not tile.changed:
+                continue
+            tile.changed = False
+            rects.append(tile.rect)
+            batch.append((self.__background, tile.rect.topleft))
+            for point, items in enumerate(tile.party.state.ind):
+                if items[0] == -1:
+                    continue
+                image = self.__images[items[0]]
+                for hgt in range(min(len(items) - 1, Layout.STACK)):
+                    x_pos, y_pos = self.layout.coord(point, hgt)
+                    batch.append((image, (tile.rect.x + x_pos, tile.rect.y + y_pos)))
+        if batch:
+            self.screen.blits(batch, doreturn=False)
+            pygame.display.update(rects)
+
+    def run(self) -> None:
+        """Запустить основной цикл."""
+        while self.__run:
+            for event in pygame.event.get():
+                if event.type == pygame.QUIT or (
+                        event.type == pygame.KEYDOWN and event.key == pygame.K_ESCAPE):
+                    self.__run = False
+            self.__play()
+            self.__render()
+            self.__clock.tick(self.FPS)
+            pygame.display.set_caption(
+                f"Длинные нарды: {len(self.tiles)} досок, партий {self.record.sum}, "
+                f"{self.__clock.get_fps():.0f} кадров/с")
+        pygame.quit()
+        clear_cache()
@@ -2,15 +2,21 @@
 
 from __future__ import annotations
 
+import base64
 import json
-import math
 import os
 import random
 import sys
+import time
+import weakref
 from dataclasses import dataclass, asdict, fields
 from enum import Enum, unique
+from typing import TYPE_CHECKING, Callable, Iterator
 
-import pygame
+if TYPE_CHECKING:
+    import argparse
+
+    from gui import Display
 
 
 ##
@@ -29,9 +35,28 @@ import pygame
 # @section description_doxygen_example Description
 # Long Nardy game program with Doxygen style comments.
 # @startuml
-# class Game {
-# }
 # class Party {
+#     + subscribe(event: Event, handler): void
+#     + unsubscribe(event: Event, handler): void
+#     + apply_move(tree: TreeMove, start: int): void
+#     + undo(): bool
+#     + redo(): bool
+#     + undo_to(players: set): bool
+#     + redo_to(players: set): bool
+# }
+# class MoveDelta {
+#     + start: int
+#     + end: int
+#     + dice: int[]
+#     + head: bool
+#     + player: int
+# }
+# class TurnDelta {
+#     + dice: Dice
+#     + remained: int[]
+#     + step: int
+#     + head: bool
+#     + rolled: Dice
 # }
 # class Dice {
 #     - first: int
@@ -54,12 +79,20 @@ import pygame
 #     + write(filename: str): void
 # }
 # class State {
+#     + position_id(): str
+#     + from_position_id(position_id: str): State
 #     + init_board(): void
 #     + copy(state: State): void
 #     + reset_board(): void
 # }
 # class TreeMove {
 # }
+# class SearchStats {
+#     - nodes: int
+#     - copies: int
+#     + add_decision(elapsed: float, tree_size: int): void
+#     + append(filename: str): void
+# }
 # class Control {
 #     - party: Party
 #     - settings: Settings
@@ -67,62 +100,43 @@ import pygame
 # }
 # class Settings {
 #     + players: Player[]
-# }
-# class Display {
-#     - party: Party
-#     - control: Control
-# }
-# class AbstractLayer {
-#     - display: Display
-# }
-# class Menu extends AbstractLayer {
-# }
-# class Panel extends AbstractLayer {
-# }
-# class Pieces extends AbstractLayer {
-# }
-# class Button {
-#     - status: ButtonStatus
-#     - text: String
-#     - x_pos: int
-#     - y_pos: int
-#     + init(): Button
-#     + change(): void
-# }
-# class Piece {
-#     - color: int
-#     - status: PieceStatus
+#     + speed: Speed
 # }
 # enum ButtonStatus {
 #     ENABLED
 #     DISABLED
 #     TEXT
 # }
-# enum PieceStatus {
-#     STAY
-#     TO_HOME
-#     CLICKED
-# }
 # enum Player {
 #     HUMAN
 #     COMPUTER
 # }
-# Game -- Control
-# Game -- Display
-# Display *-- Menu
-# Display *-- Panel
-# Display *-- Pieces
-# Display -- Party
+# enum Speed {
+#     NORMAL
+#     SKIP
+#     EVERY_N
+#     FINAL
+# }
+# enum Event {
+#     POSITION_RESET
+#     MOVE_APPLIED
+#     DICE_ROLLED
+#     STAGE_CHANGED
+#     GAME_WON
+#     MOVE_UNDONE
+#     TURN_UNDONE
+# }
 # Control *-- Settings
 # Control -- Record
 # Control *-- Party
 # Party *-- Dice
 # Party *-- State
 # Party o-- TreeMove
-# AbstractLayer <|-- Menu
-# AbstractLayer <|-- Panel
-# AbstractLayer <|-- Pieces
-# AbstractLayer o-- Display
+# Party *-- MoveDelta
+# Party *-- TurnDelta
+# MoveDelta o-- TreeMove
+# Party *-- SearchStats
+# Party ..> Event
 # @enduml
 
 
@@ -258,6 +272,60 @@ class Record:
             json.dump(asdict(self), file, indent=4)
 
 
+@dataclass
+class SearchStats:
+    """
+    Класс телеметрии поиска ходов.
+    Накапливает число узлов дерева ходов, копий состояния и время решений.
+    """
+    nodes: int = 0
+    copies: int = 0
+    decisions: int = 0
+    decision_time: float = 0.0
+    max_decision_time: float = 0.0
+    peak_tree: int = 0
+
+    def reset(self) -> None:
+        """
+        Сбросить счетчики.
+        """
+        self.__init__()
+
+    def add_decision(self, elapsed: float, tree_size: int) -> None:
+        """
+        Учесть построение дерева ходов.
+
+        @param elapsed: Время построения в секундах
+        @param tree_size: Число узлов дерева
+        """
+        self.decisions += 1
+        self.decision_time += elapsed
+        self.max_decision_time = max(self.max_decision_time, elapsed)
+        self.peak_tree = max(self.peak_tree, tree_size)
+
+    def summary(self) -> dict:
+        """
+        Получить сводку телеметрии.
+
+        @return: Счетчики и среднее время решения в миллисекундах
+        """
+        data = asdict(self)
+        data["avg_decision_ms"] = (
+            self.decision_time * 1000 / self.decisions if self.decisions else 0.0
+        )
+        return data
+
+    def append(self, filename: str, **extra) -> None:
+        """
+        Дописать сводку телеметрии строкой JSON в файл.
+
+        @param filename: Имя файла
+        @param extra: Дополнительные поля сводки
+        """
+        with open(filename, "a", encoding="utf-8") as file:
+            file.write(json.dumps({**extra, **self.summary()}) + "\n")
+
+
 class State:
     """
     Представляет состояние игровой доски.
@@ -285,15 +353,16 @@ class State:
         self.dice: Dice = Dice()
         self.remained_die = []
         self.played_head = False
-        self.color = self.amount = self.left = 0
+        self.color = self.left = 0
+        self.amount = 30
         self.init_board()
 
     def init_board(self) -> None:
         """
         Инициализировать начальное состояние доски.
         """
-        self.checkers[24:] = [15, 15]
-        self.owner[24:] = [0, 1]
+        self.checkers[:] = [0] * 24 + [15, 15]
+        self.owner[:] = [-1] * 24 + [0, 1]
         self.init_ind()
 
     def copy(self, state: State) -> None:
@@ -304,16 +373,164 @@ class State:
         """
         self.__dict__ = {k: v.copy() if isinstance(v, list) else v
                          for k, v in state.__dict__.items()}
+        self.ind = [item.copy() for item in state.ind]
+
+    def set_board(self, checkers: list[int], owner: list[int]) -> None:
+        """
+        Установить произвольную расстановку шашек.
+
+        @param checkers: Количество шашек в каждой из 26 позиций.
+        @param owner: Владелец каждой из 26 позиций (-1 для пустой).
+        """
+        self.checkers = checkers.copy()
+        self.owner = owner.copy()
+        self.init_ind()
+
+    def position_id(self) -> str:
+        """
+        Вернуть идентификатор позиции.
+
+        Идентификатор - base64 (URL-safe, без дополнения) битовой строки: игрок, делающий ход,
+        номер белого игрока, флаг первого хода, флаг хода с головы, старший и младший
+        кубики (по 3 бита) и оставшиеся кубики (3 бита: число для дубля, иначе маска
+        старшего и младшего), затем для каждого из 24 полей бит занятости, а для занятого
+        поля еще бит цвета и число шашек минус один (4 бита). Снятые шашки дополняют
+        шашки цвета на доске до 15. Кубики записываются, только пока есть что играть.
+        Порядок шашек (ind) в идентификатор не входит: равные позиции дают равные
+        идентификаторы, поэтому он годится ключом кэша.
+
+        @return: Идентификатор позиции
+        """
+        high = low = rest = 0
+        if self.remained_die:
+            high, low = max(self.dice.first, self.dice.second), min(self.dice.first, self.dice.second)
+            if high == low:
+                rest = len(self.remained_die)
+            else:
+                rest = (high in self.remained_die) | (low in self.remained_die) << 1
+        value = (self.player << 12 | self.color << 11 | (self.move == 0) << 10
+                 | self.played_head << 9 | high << 6 | low << 3 | rest)
+        bits = 13
+        for checkers, owner in zip(self.checkers[:24], self.owner[:24]):
+            if checkers:
+                value = value << 6 | 32 | owner << 4 | checkers - 1
+                bits += 6
+            else:
+                value <<= 1
+                bits += 1
+        value <<= -bits % 8
+        return base64.urlsafe_b64encode(value.to_bytes((bits + 7) // 8, "big")).rstrip(b"=").decode()
+
+    @staticmethod
+    def from_position_id(position_id: str) -> State:
+        """
+        Восстановить состояние доски по идентификатору позиции.
+
+        Номер хода восстанавливается только как признак первого хода (0 или 1).
+
+        @param position_id: Идентификатор позиции (см. position_id)
+        @return: Состояние доски
+        @throw ValueError Неверный идентификатор
+        """
+        text = position_id.strip()
+        data = base64.b64decode(text + "=" * (-len(text) % 4), altchars=b"-_", validate=True)
+        value, bits = int.from_bytes(data, "big"), len(data) * 8
+
+        def read(count: int) -> int:
+            nonlocal bits
+            bits -= count
+            if bits < 0:
+                raise ValueError(f"position id {position_id!r} is too short")
+            return value >> bits & (1 << count) - 1
+
+        player, color, first, played_head = read(1), read(1), read(1), read(1)
+        high, low, rest = read(3), read(3), read(3)
+        checkers = [0] * 26
+        owner = [-1] * 26
+        on_board = [0, 0]
+        for pos in range(24):
+            if read(1):
+                owner[pos] = read(1)
+                checkers[pos] = read(4) + 1
+                on_board[owner[pos]] += checkers[pos]
+        for side in range(2):
+            checkers[24 + (side ^ color)] = 15 - on_board[side]
+            owner[24 + (side ^ color)] = side
+        doubling = high == low != 0
+        if (
+            bits >= 8 or value & (1 << bits) - 1
+            or min(checkers[24:]) < 0
+            or high > 6 or low > high or (low == 0) != (high == 0) or (high == 0) != (rest == 0)
+            or rest > (4 if doubling else 3)
+        ):
+            raise ValueError(f"position id {position_id!r} is invalid")
+        state = State()
+        state.set_board(checkers, owner)
+        state.player, state.color = player, color
+        state.move = 0 if first else 1
+        state.played_head = bool(played_head)
+        state.dice = Dice(high, low)
+        if doubling:
+            state.remained_die = [high] * rest
+        else:
+            state.remained_die = [die for die, bit in ((high, 1), (low, 2)) if rest & bit]
+        if state.remained_die:
+            state.step = (4 if doubling else 2) - len(state.remained_die)
+        return state
+
+    def init_players(self, color: int) -> None:
+        """
+        Расставить шашки для начала партии.
+
+        @param color: Номер игрока, выигравшего право первого хода.
+        """
+        self.player = 0
+        self.color = color
+        for i in range(26):
+            self.checkers[i] = 0
+            self.owner[i] = -1
+        self.owner[24] = self.color
+        self.owner[25] = 1 - self.color
+        self.checkers[0] = 15
+        self.checkers[12] = 15
+        self.owner[0] = self.color
+        self.owner[12] = 1 - self.color
+        self.init_ind()
+        self.player = self.color
+        self.move = 0
+
+    def next_player(self) -> None:
+        """
+        Передать ход другому игроку.
+        """
+        if self.player == 1 - self.color:
+            self.move += 1
+        self.player = 1 - self.player
+        self.step = 0
+        self.played_head = False
+
+    def is_win(self) -> bool:
+        """
+        Проверить, сняты ли с доски все шашки одного из игроков.
+
+        @return: Флаг окончания партии
+        """
+        return len(self.ind[24]) == 16 or len(self.ind[25]) == 16
 
     def init_ind(self) -> None:
         """
         Инициализировать позиции шашек.
         """
         cnt = [0, 15]
-        for i, (owner, checkers) in enumerate(zip(self.owner, self.checkers)):
-            self.ind[i] = [owner] + \
-                list(range(cnt[owner], cnt[owner] + checkers))
-            cnt[owner] += checkers
+        ind = []
+        for owner, checkers in zip(self.owner, self.checkers):
+            if checkers:
+                start = cnt[owner]
+                ind.append([owner, *range(start, start + checkers)])
+                cnt[owner] = start + checkers
+            else:
+                ind.append([owner])
+        self.ind = ind
 
     def __relative_pos(self, pos: int) -> int:
         """
@@ -386,8 +603,11 @@ class State:
         @param number: Длина хода
         @return: Флаг снятие старшей шашки с доски
         """
-        diff = self.__relative_pos(pos) + number - 24
-        for i in range(pos - diff, pos):
+        relative = self.__relative_pos(pos)
+        if relative + number == 24:
+            return True
+        # Большим кубиком снимается только шашка с самой дальней позиции дома
+        for i in range(pos - relative + 18, pos):
             if self.__is_player_pos(i):
                 return False
         return True
@@ -472,22 +692,26 @@ class State:
 
     def __make_regular_move(self, start: int, number: int) -> bool:
         target = (start + number) % 24
-        if self.__is_opponent_pos(target) or not self.__can_play_head(start):
+        if self.__is_opponent_pos(target) or not self.__can_play_head(start, number):
             return False
         self.__move_checker(start, target)
         self.__play_die(number)
         self.step += 1
         return True
 
-    def __can_play_head(self, start: int) -> bool:
+    def __can_play_head(self, start: int, number: int) -> bool:
         if self.__relative_pos(start) != 0:
             return True
         if not self.played_head:
             self.played_head = True
             return True
-        if self.move == 0 and self.dice.is_doubling() and (self.dice.first, self.step) not in [(3, 3), (4, 2), (6, 1)]:
-            return False
-        return True
+        # Первым ходом с дублем 6:6, 4:4 или 3:3 с головы берется вторая шашка,
+        # если кубик не сыграть другой шашкой
+        return self.move == 0 and self.dice.is_doubling() and self.dice.first in [3, 4, 6] \
+            and self.checkers[start] == 14 \
+            and not any(not self.is_remove_checkers(pos, number)
+                        and not self.__is_opponent_pos((pos + number) % 24)
+                        for pos in self.get_checkers_pos() if pos != start)
 
     def __move_checker(self, start: int, target: int):
         self.ind[target].append(self.ind[start].pop())
@@ -504,6 +728,26 @@ class State:
         if self.checkers[start] == 0:
             self.owner[start] = -1
 
+    def move_checker(self, start: int, end: int) -> None:
+        """
+        Переставить шашку без проверки правил.
+
+        Кубики, номер шага и флаг хода с головы не меняются.
+
+        @param start: Позиция начала хода
+        @param end: Позиция конца хода
+        """
+        self.ind[end].append(self.ind[start].pop())
+        if len(self.ind[start]) == 1 and start not in [24, 25]:
+            self.ind[start][0] = -1
+        if self.ind[end][0] == -1:
+            self.ind[end][0] = self.owner[start]
+        self.checkers[end] += 1
+        self.owner[end] = self.owner[start]
+        self.checkers[start] -= 1
+        if self.checkers[start] == 0 and start not in [24, 25]:
+            self.owner[start] = -1
+
     def __make_removal_move(self, start: int, number: int) -> bool:
         if not self.__is_home() or not self.__is_high_order(start, number):
             return False
@@ -520,13 +764,16 @@ class TreeMove:
     Используется для анализа возможных ходов и сценариев развития игровой ситуации.
     """
 
-    def __init__(self, state: State, start: int, die: int):
+    def __init__(self, state: State, start: int, die: int,
+                 stats: SearchStats | None = None):
         """Конструктор.
         @param state Состояние доски
         @param start Позиция начала хода
         @param die Длина хода
+        @param stats Телеметрия поиска ходов
         """
         self.state: State = state
+        self.stats = stats
         self.state.left = 0
         self.start = start
         self.die = die
@@ -577,12 +824,19 @@ class TreeMove:
             for start in self.checkers:
                 v_state = State(self.state)
                 flag = v_state.right_move(start, die)
+                if self.stats is not None:
+                    self.stats.copies += 1
                 if flag:
-                    current_tree = TreeMove(v_state, start, die)
+                    current_tree = TreeMove(v_state, start, die, self.stats)
+                    if self.stats is not None:
+                        self.stats.nodes += 1
                     current_tree.next()
                     if v_state.left != 0 or not v_state.is_one_line():
                         self.children[i].append(current_tree)
                         self.value[i] = max(v_state.left + 1, self.value[i])
+            # Нужно сыграть наибольшее возможное число кубиков
+            self.children[i] = [item for item in self.children[i]
+                                if item.state.left + 1 == self.value[i]]
             if len(self.children[i]) > 1:
                 self.children[i].sort(key=lambda x: x.start)
         if last == 2:
@@ -618,51 +872,129 @@ class Stage(Enum):
     WIN = 6
 
 
+@unique
+class Event(Enum):
+    """
+    Перечисление событий партии, на которые подписываются представление и контроллер.
+    """
+
+    POSITION_RESET = 0  # Расстановка шашек задана заново
+    MOVE_APPLIED = 1  # Шашка перемещена (start, end)
+    DICE_ROLLED = 2  # Партия приняла бросок кубиков (dice)
+    STAGE_CHANGED = 3  # Сменился этап хода (old, new)
+    GAME_WON = 4  # Партия выиграна (player)
+    MOVE_UNDONE = 5  # Шаг отменен, шашка вернулась из end в start (start, end)
+    TURN_UNDONE = 6  # Передача хода отменена, ход вернулся игроку (player, rolled)
+
+
+@dataclass
+class MoveDelta:
+    """
+    Класс шага в истории ходов.
+    Хранит изменение позиции вместо копии доски и узлы дерева ходов до и после шага,
+    поэтому отмена и повтор не строят дерево заново. Узлы хранятся только для шагов
+    текущего хода.
+    """
+    start: int
+    end: int
+    dice: list[int]  # Сыгранные кубики (несколько - для хода из нескольких шагов)
+    head: bool  # Шаг сделан с головы
+    player: int  # Игрок, сделавший шаг
+    before: TreeMove | None = None
+    after: TreeMove | None = None
+
+
+@dataclass
+class TurnDelta:
+    """
+    Класс передачи хода в истории ходов.
+    Хранит то, что передача хода и бросок кубиков меняют помимо доски.
+    """
+    dice: Dice  # Кубики закончившегося хода
+    remained: list[int]  # Несыгранные кубики закончившегося хода
+    step: int  # Шаг закончившегося хода
+    head: bool  # Флаг хода с головы закончившегося хода
+    rolled: Dice | None = None  # Кубики нового хода, None - еще не брошены
+
+
 class Party:
     """
     Класс игровой доски.
     Управляет процессом игры, включая начало новой игры и выполнение ходов.
+    Об изменениях сообщает подписчикам событий Event.
     """
 
     def __init__(self):
         """Конструктор."""
-        self.stage = Stage.INIT
+        self.__listeners: dict[Event, list[Callable[..., None]]] = {
+            event: [] for event in Event
+        }
+        self.__stage = Stage.INIT
         self.count = None
         self.color = None
         self.tree: TreeMove | None = None
         self.state = State()
+        self.stats = SearchStats()
+        self.__history: list[MoveDelta | TurnDelta] = []  # Шаги и передачи хода партии
+        self.__undone: list[MoveDelta | TurnDelta] = []  # Отмененные записи для повтора
         self.new_party()
 
+    @property
+    def stage(self) -> Stage:
+        """Текущий этап хода.
+
+        Смена этапа сообщается событием STAGE_CHANGED, переход к WIN - еще и событием GAME_WON.
+        """
+        return self.__stage
+
+    @stage.setter
+    def stage(self, stage: Stage) -> None:
+        old, self.__stage = self.__stage, stage
+        if old != stage:
+            self.__emit(Event.STAGE_CHANGED, old=old, new=stage)
+            if stage == Stage.WIN:
+                self.__emit(Event.GAME_WON, player=self.state.player)
+
+    def subscribe(self, event: Event, handler: Callable[..., None]) -> None:
+        """Подписаться на событие партии.
+        @param event Событие
+        @param handler Обработчик, получающий данные события именованными аргументами
+        """
+        self.__listeners[event].append(handler)
+
+    def unsubscribe(self, event: Event, handler: Callable[..., None]) -> None:
+        """Отписаться от события партии.
+        @param event Событие
+        @param handler Обработчик
+        """
+        self.__listeners[event].remove(handler)
+
+    def __emit(self, event: Event, **data) -> None:
+        """Оповестить подписчиков о событии.
+        @param event Событие
+        @param data Данные события
+        """
+        for handler in list(self.__listeners[event]):
+            handler(**data)
+
     def new_party(self) -> None:
         """Начать новую партию."""
         self.stage = Stage.BEGIN
         self.state.init_board()
+        self.stats.reset()
         self.tree = None
+        self.__clear_history()
         self.count = 0
         self.color = None
+        self.__emit(Event.POSITION_RESET)
 
     def __init_players(self, dice: Dice) -> None:
         """Начать расстановку шашек.
         @param dice Состояние кубиков
         """
         diff = dice.first - dice.second
-        self.state.player = 0
-        if diff > 0:
-            self.state.color = 0
-        else:
-            self.state.color = 1
-        for i in range(26):
-            self.state.checkers[i] = 0
-            self.state.owner[i] = -1
-        self.state.owner[24] = self.state.color
-        self.state.owner[25] = 1 - self.state.color
-        self.state.checkers[0] = 15
-        self.state.checkers[12] = 15
-        self.state.owner[0] = self.state.color
-        self.state.owner[12] = 1 - self.state.color
-        self.state.init_ind()
-        self.state.player = self.state.color
-        self.state.move = 0
+        self.state.init_players(0 if diff > 0 else 1)
+        self.__emit(Event.POSITION_RESET)
 
     # def get_stage(self) -> Stage:
     #     """Вернуть текущий этап хода.
@@ -685,7 +1017,12 @@ class Party:
                     self.stage = Stage.ROLL
         elif self.stage == Stage.ROLL:
             self.state.dice.copy(dice)
+            if self.__history and isinstance(self.__history[-1], TurnDelta):
+                self.__history[-1].rolled = Dice(dice.first, dice.second)
             self.__init_move()
+        else:
+            return
+        self.__emit(Event.DICE_ROLLED, dice=dice)
 
     def start_party(self) -> None:
         """Начать кон."""
@@ -694,21 +1031,487 @@ class Party:
             self.stage = Stage.TOSS
 
     def next_player(self) -> None:
-        """Передать ход."""
+        """Передать ход.
+
+        Передача записывается в историю, узлы дерева закончившегося хода забываются.
+        """
+        state = self.state
+        self.__forget_trees(self.__history)
+        self.__history.append(TurnDelta(Dice(state.dice.first, state.dice.second),
+                                        state.remained_die[:], state.step, state.played_head))
+        self.__undone.clear()
+        state.next_player()
         self.stage = Stage.ROLL
-        if self.state.player == 1 - self.state.color:
-            self.state.move += 1
-        self.state.player = 1 - self.state.player
-        self.state.step = 0
-        self.state.played_head = False
 
     def __init_move(self) -> None:
         """Начать перемещение шашек."""
+        start = time.perf_counter()
+        nodes = self.stats.nodes
+        self.tree = TreeMove(self.state, -1, -1, self.stats)
+        self.tree.next()
+        self.__undone.clear()
+        self.stats.add_decision(time.perf_counter() - start,
+                                self.stats.nodes - nodes)
+        self.stage = Stage.MOVE if self.state.left != 0 else Stage.NEXT
+
+    def apply_move(self, tree: TreeMove, start: int | None = None) -> None:
+        """Сделать ход, выбранный в дереве ходов.
+        @param tree Узел дерева ходов
+        @param start Позиция начала хода, если ход составлен из нескольких шагов
+        (по умолчанию начало последнего шага)
+        """
+        start = tree.start if start is None else start
+        if self.tree is not None:
+            dice = self.state.remained_die[:]
+            for die in tree.state.remained_die:
+                dice.remove(die)
+            self.__history.append(MoveDelta(
+                start, tree.end, dice, tree.state.played_head and not self.state.played_head,
+                self.state.player, self.tree, tree))
+            self.__undone.clear()
+        # Узел сохраняет свое состояние: к нему можно вернуться отменой и повтором
+        self.state.copy(tree.state)
+        self.tree = tree
+        self.__emit(Event.MOVE_APPLIED, start=start, end=tree.end)
+        if max(tree.value) == 0:
+            self.stage = Stage.WIN if self.state.is_win() else Stage.NEXT
+
+    def can_undo(self) -> bool:
+        """Проверить, есть ли шаг или передача хода для отмены.
+        @return Флаг возможности отмены
+        """
+        return bool(self.__history) and self.stage in [Stage.ROLL, Stage.MOVE, Stage.NEXT]
+
+    def can_redo(self) -> bool:
+        """Проверить, есть ли отмененный шаг или передача хода для повтора.
+        @return Флаг возможности повтора
+        """
+        return bool(self.__undone) and self.stage in [Stage.ROLL, Stage.MOVE, Stage.NEXT]
+
+    def undo(self) -> bool:
+        """Отменить последний шаг или последнюю передачу хода.
+
+        Шашка возвращается обратным перемещением, кубики и флаг хода с головы
+        восстанавливаются из истории, дерево ходов - сохраненным узлом. Отмена передачи
+        хода возвращает ход прошлому игроку с его кубиками и строит дерево его хода заново.
+        @return Флаг отмененной записи
+        """
+        if not self.can_undo():
+            return False
+        entry = self.__history.pop()
+        if isinstance(entry, TurnDelta):
+            self.__undo_turn(entry)
+            return True
+        self.__undone.append(entry)
+        state = self.state
+        state.move_checker(entry.end, entry.start)
+        state.remained_die += entry.dice
+        state.step -= len(entry.dice)
+        if entry.head:
+            state.played_head = False
+        self.__set_tree(entry.before)
         self.stage = Stage.MOVE
+        self.__emit(Event.MOVE_UNDONE, start=entry.start, end=entry.end)
+        return True
+
+    def redo(self) -> bool:
+        """Повторить последний отмененный шаг или передачу хода.
+        @return Флаг повторенной записи
+        """
+        if not self.can_redo():
+            return False
+        entry = self.__undone.pop()
+        self.__history.append(entry)
+        if isinstance(entry, TurnDelta):
+            self.__redo_turn(entry)
+            return True
+        if entry.after is None:
+            # Дерево хода построено заново при повторе передачи хода
+            entry.before = self.tree
+            entry.after = self.tree.possible_move(entry.start, entry.end)
+        state = self.state
+        state.move_checker(entry.start, entry.end)
+        for die in entry.dice:
+            state.remained_die.remove(die)
+        state.step += len(entry.dice)
+        if entry.head:
+            state.played_head = True
+        self.__set_tree(entry.after)
+        self.__emit(Event.MOVE_APPLIED, start=entry.start, end=entry.end)
+        if max(entry.after.value) == 0:
+            self.stage = Stage.WIN if self.state.is_win() else Stage.NEXT
+        return True
+
+    def undo_to(self, players: set[int]) -> bool:
+        """Отменить записи истории до последнего шага одного из игроков включительно.
+        @param players Номера игроков
+        @return Флаг отмененного шага (без такого шага в истории ничего не отменяется)
+        """
+        if not self.can_undo() or not any(
+                isinstance(entry, MoveDelta) and entry.player in players
+                for entry in self.__history):
+            return False
+        while self.undo():
+            entry = self.__undone[-1]
+            if isinstance(entry, MoveDelta) and entry.player in players:
+                break
+        return True
+
+    def redo_to(self, players: set[int]) -> bool:
+        """Повторить записи истории до следующего шага одного из игроков включительно.
+
+        Если такого шага нет, повторяются все отмененные записи.
+        @param players Номера игроков
+        @return Флаг повторенной записи
+        """
+        if not self.can_redo():
+            return False
+        while self.redo():
+            entry = self.__history[-1]
+            if isinstance(entry, MoveDelta) and entry.player in players:
+                break
+        return True
+
+    def __undo_turn(self, turn: TurnDelta) -> None:
+        """Вернуть ход прошлому игроку.
+        @param turn Передача хода
+        """
+        self.__forget_trees(self.__undone)
+        self.__undone.append(turn)
+        state = self.state
+        state.player = 1 - state.player
+        if state.player == 1 - state.color:
+            state.move -= 1
+        state.dice.copy(turn.dice)
+        state.remained_die = turn.remained[:]
+        state.step = turn.step
+        state.played_head = turn.head
+        self.__rebuild_tree()
+        self.stage = Stage.NEXT
+        self.__emit(Event.TURN_UNDONE, player=state.player, rolled=turn.rolled is not None)
+
+    def __redo_turn(self, turn: TurnDelta) -> None:
+        """Повторить передачу хода и бросок кубиков нового хода.
+        @param turn Передача хода
+        """
+        self.__forget_trees(self.__history[:-1])
+        self.state.next_player()
+        if turn.rolled is None:
+            self.tree = None
+            self.stage = Stage.ROLL
+            return
+        self.state.dice.copy(turn.rolled)
         self.tree = TreeMove(self.state, -1, -1)
         self.tree.next()
-        if self.state.left == 0:
-            self.stage = Stage.NEXT
+        self.stage = Stage.MOVE if self.state.left != 0 else Stage.NEXT
+        self.__emit(Event.DICE_ROLLED, dice=turn.rolled)
+
+    def __rebuild_tree(self) -> None:
+        """Построить заново дерево текущего хода и узлы его шагов в истории."""
+        steps = []
+        for entry in reversed(self.__history):
+            if isinstance(entry, TurnDelta):
+                break
+            steps.append(entry)
+        steps.reverse()
+        state = State(self.state)
+        for step in reversed(steps):
+            state.move_checker(step.end, step.start)
+        state.step = 0
+        state.played_head = False
+        node = TreeMove(state, -1, -1)
+        node.next()
+        for step in steps:
+            step.before = node
+            step.after = node = node.possible_move(step.start, step.end)
+        self.__set_tree(node)
+
+    @staticmethod
+    def __forget_trees(entries: list[MoveDelta | TurnDelta]) -> None:
+        """Забыть узлы дерева у шагов последнего хода в списке записей.
+
+        Дерево хода строится заново, если к ходу вернутся отменой или повтором.
+        @param entries Записи истории
+        """
+        for entry in reversed(entries):
+            if isinstance(entry, TurnDelta):
+                break
+            entry.before = entry.after = None
+
+    def __set_tree(self, tree: TreeMove) -> None:
+        """Сделать узел дерева ходов текущим для восстановленной позиции.
+        @param tree Узел дерева ходов
+        """
+        self.tree = tree
+        self.state.left = max(tree.value)
+
+    def __clear_history(self) -> None:
+        """Забыть историю партии."""
+        self.__history.clear()
+        self.__undone.clear()
+
+    def snapshot(self) -> bytes:
+        """Сохранить недоигранную партию в компактном виде.
+
+        Снимок: этап хода (1 байт), номер хода (2 байта, little-endian),
+        кубики (первый << 4 | второй) и идентификатор позиции State.position_id,
+        в котором есть шаг хода, оставшиеся кубики и флаг хода с головы.
+        @return Снимок
+        """
+        state = self.state
+        return (bytes((self.stage.value,)) + state.move.to_bytes(2, "little")
+                + bytes((state.dice.first << 4 | state.dice.second,))
+                + state.position_id().encode())
+
+    def restore(self, data: bytes) -> None:
+        """Продолжить партию из снимка.
+
+        Дерево ходов строится заново с текущего шага хода.
+        @param data Снимок (см. snapshot)
+        @throw ValueError Снимок поврежден
+        """
+        if len(data) < 4:
+            raise ValueError("snapshot is too short")
+        stage = Stage(data[0])
+        if stage not in [Stage.ROLL, Stage.MOVE, Stage.NEXT]:
+            raise ValueError(f"cannot resume at stage {stage.name}")
+        state = State.from_position_id(data[4:].decode("ascii"))
+        state.move = int.from_bytes(data[1:3], "little")
+        dice = Dice(data[3] >> 4, data[3] & 15)
+        if state.remained_die and {dice.first, dice.second} != {state.dice.first, state.dice.second}:
+            raise ValueError("snapshot dice do not match the position")
+        state.dice = dice  # Порядок кубиков как на панели, в идентификаторе старший первым
+        self.state.copy(state)
+        self.stats.reset()
+        self.tree = None
+        self.__clear_history()
+        if stage == Stage.MOVE:
+            # Узел с начатым ходом, а не корень: корень раскладывает кубики с первого шага
+            start = -1 if state.step == 0 else 0
+            self.tree = TreeMove(self.state, start, start, self.stats)
+            self.tree.next()
+        self.stage = stage
+        self.__emit(Event.POSITION_RESET)
+
+    def set_position(self, state: State) -> None:
+        """Расставить шашки позиции перед броском кубиков (режим редактирования).
+        @param state Состояние доски
+        """
+        self.state.copy(state)
+        self.state.step = 0
+        self.state.played_head = False
+        self.state.remained_die = []
+        self.tree = None
+        self.__clear_history()
+        self.__emit(Event.POSITION_RESET)
+
+    def move_checker(self, start: int, end: int) -> None:
+        """Переставить шашку без проверки правил (режим редактирования).
+        @param start Позиция начала хода
+        @param end Позиция конца хода
+        """
+        self.state.move_checker(start, end)
+        self.__clear_history()
+        self.__emit(Event.MOVE_APPLIED, start=start, end=end)
+
+
+@dataclass
+class LoggedGame:
+    """
+    Класс партии, прочитанной из журнала.
+    Хранит розыгрыш первого хода, кубики и шаги каждого хода и итог партии.
+    """
+    toss: Dice
+    turns: list[tuple[Dice, list[tuple[int, int]]]]
+    result: int
+
+
+class GameLog:
+    """
+    Класс журнала партий.
+    Дописывает записи сыгранных партий в двоичный файл через буфер:
+    на диск данные уходят блоками, а не на каждом ходу.
+
+    Файл начинается с MAGIC, за ним следуют записи: длина тела (2 байта, little-endian) и тело.
+    Тело: байт розыгрыша первого хода (кубик игрока 1 << 4 | кубик игрока 2),
+    затем ходы: байт кубиков (первый << 4 | второй), число шагов n и n пар байтов (начало, конец),
+    последний байт - итог: номер победившего игрока, UNFINISHED или EDITED.
+    """
+
+    ## Сигнатура и версия формата
+    MAGIC = b"NRDL\x01"
+    ## Итог недоигранной партии
+    UNFINISHED = 2
+    ## Итог партии, расстановка которой менялась в редакторе
+    EDITED = 3
+    ## Размер буфера записи, байт
+    BUFFER = 1 << 16
+
+    def __init__(self, filename: str):
+        """Конструктор.
+        @param filename Имя файла журнала (дописывается)
+        """
+        self.filename = filename
+        self.games = 0  # Записано партий
+        # Записи живут, пока жива модель: журнал не удерживает завершенные партии в памяти
+        self.__recorders: weakref.WeakSet[GameRecorder] = weakref.WeakSet()
+        new = not os.path.exists(filename) or os.path.getsize(filename) == 0
+        self.__file = open(filename, "ab", buffering=self.BUFFER)  # pylint: disable=consider-using-with
+        if new:
+            self.__file.write(self.MAGIC)
+
+    def attach(self, party: Party) -> None:
+        """Записывать партии модели.
+        @param party Модель
+        """
+        self.__recorders.add(GameRecorder(party, self))
+
+    def write(self, body: bytes) -> None:
+        """Дописать запись партии.
+        @param body Тело записи
+        """
+        self.__file.write(len(body).to_bytes(2, "little") + body)
+        self.games += 1
+
+    def close(self) -> None:
+        """Записать недоигранные партии и закрыть файл."""
+        for recorder in list(self.__recorders):
+            recorder.finish(self.UNFINISHED)
+        self.__recorders.clear()
+        self.__file.close()
+
+    @classmethod
+    def read(cls, filename: str) -> Iterator[bytes]:
+        """Прочитать записи партий.
+
+        Оборванная запись в конце файла (например, после аварийного завершения) пропускается.
+        @param filename Имя файла журнала
+        @return Тела записей
+        @throw ValueError Файл не является журналом партий
+        """
+        with open(filename, "rb") as file:
+            data = file.read()
+        if not data.startswith(cls.MAGIC):
+            raise ValueError(f"{filename} is not a game log")
+        pos = len(cls.MAGIC)
+        while pos + 2 <= len(data):
+            size = int.from_bytes(data[pos:pos + 2], "little")
+            pos += 2
+            if pos + size > len(data):
+                break
+            yield data[pos:pos + size]
+            pos += size
+
+    @staticmethod
+    def decode(body: bytes) -> LoggedGame:
+        """Разобрать тело записи партии.
+        @param body Тело записи
+        @return Партия
+        @throw ValueError Запись повреждена
+        """
+        if len(body) < 2:
+            raise ValueError("game record is too short")
+        turns: list[tuple[Dice, list[tuple[int, int]]]] = []
+        pos, last = 1, len(body) - 1
+        while pos < last:
+            if pos + 2 > last or pos + 2 + 2 * body[pos + 1] > last:
+                raise ValueError(f"turn {len(turns)} is truncated")
+            count = body[pos + 1]
+            steps = [(body[i], body[i + 1]) for i in range(pos + 2, pos + 2 + 2 * count, 2)]
+            if any(start > 25 or end > 25 for start, end in steps):
+                raise ValueError(f"turn {len(turns)} has a step off the board")
+            turns.append((Dice(body[pos] >> 4, body[pos] & 15), steps))
+            pos += 2 + 2 * count
+        return LoggedGame(Dice(body[0] >> 4, body[0] & 15), turns, body[last])
+
+
+class GameRecorder:
+    """
+    Класс записи партии.
+    Собирает тело записи журнала из событий модели и передает его журналу по окончании партии.
+    """
+
+    def __init__(self, party: Party, log: GameLog):
+        """Конструктор.
+        @param party Модель
+        @param log Журнал партий
+        """
+        self.party = party
+        self.log = log
+        self.__body: bytearray | None = None  # Тело текущей партии, None - до конца розыгрыша
+        self.__turns: list[int] = []  # Смещения числа шагов каждого хода в теле
+        self.__edited = False
+        party.subscribe(Event.POSITION_RESET, self.__on_position_reset)
+        party.subscribe(Event.DICE_ROLLED, self.__on_dice_rolled)
+        party.subscribe(Event.MOVE_APPLIED, self.__on_move_applied)
+        party.subscribe(Event.MOVE_UNDONE, self.__on_move_undone)
+        party.subscribe(Event.TURN_UNDONE, self.__on_turn_undone)
+        party.subscribe(Event.GAME_WON, self.__on_game_won)
+
+    def finish(self, result: int) -> None:
+        """Передать текущую партию журналу.
+        @param result Итог партии
+        """
+        if self.__body is None:
+            return
+        self.__body.append(GameLog.EDITED if self.__edited else result)
+        self.log.write(self.__body)
+        self.__body = None
+
+    def __on_position_reset(self, **_) -> None:
+        """Записать прерванную партию при начале новой, отметить расстановку из редактора."""
+        if self.party.stage == Stage.BEGIN:
+            self.finish(GameLog.UNFINISHED)
+        elif self.__body is not None:
+            self.__edited = True
+
+    def __on_dice_rolled(self, dice: Dice) -> None:
+        """Записать бросок: розыгрыш первого хода или кубики хода.
+        @param dice Состояние кубиков
+        """
+        packed = dice.first << 4 | dice.second
+        if self.party.stage == Stage.ROLL and self.__body is None:
+            # Розыгрыш закончен, партия начинается
+            self.__body = bytearray((packed,))
+            self.__turns = []
+            self.__edited = False
+        elif self.__body is not None and self.party.stage in [Stage.MOVE, Stage.NEXT]:
+            self.__turns.append(len(self.__body) + 1)
+            self.__body += bytes((packed, 0))
+
+    def __on_move_applied(self, start: int, end: int) -> None:
+        """Записать шаг.
+        @param start Позиция начала хода
+        @param end Позиция конца хода
+        """
+        if self.__body is None:
+            return
+        if self.party.stage != Stage.MOVE:
+            self.__edited = True  # Перестановка в редакторе
+            return
+        self.__body[self.__turns[-1]] += 1
+        self.__body += bytes((start, end))
+
+    def __on_move_undone(self, **_) -> None:
+        """Убрать отмененный шаг из записи."""
+        if self.__body is None or not self.__turns or self.__body[self.__turns[-1]] == 0:
+            return
+        self.__body[self.__turns[-1]] -= 1
+        del self.__body[-2:]
+
+    def __on_turn_undone(self, rolled: bool, **_) -> None:
+        """Убрать из записи ход, передача которого отменена.
+        @param rolled Флаг брошенных кубиков отмененного хода
+        """
+        if self.__body is None or not rolled or not self.__turns:
+            return
+        del self.__body[self.__turns.pop() - 1:]
+
+    def __on_game_won(self, player: int) -> None:
+        """Записать выигранную партию.
+        @param player Номер победившего игрока
+        """
+        self.finish(player)
 
 
 @unique
@@ -722,114 +1525,26 @@ class ButtonStatus(Enum):
     TEXT = 2
 
 
-class Button(pygame.sprite.Sprite):
+@unique
+class Player(Enum):
     """
-    Описывает кнопку в интерфейсе игры.
-    Класс позволяет создавать и менять состояние кнопок на экране.
+    Перечисление типов игрока (Человек, Компьютер).
     """
 
-    def __init__(self, *groups):
-        """!Конструктор.
-        @param groups Группы слайда
-        """
-        super().__init__(*groups)
-        self.__idd = -1
-        self.__text = ""
-        self.x_pos = 0
-        self.y_pos = 0
-        self.status = ButtonStatus.DISABLED
-        self.color = (255, 255, 255)
-        self.font = pygame.font.Font("freesansbold.ttf", 22)
-        self.image = self.font.render(self.__text, True, self.color)
-        self.rect = self.image.get_rect()
-        self.command = lambda *args: None
-
-    def init(
-        self,
-        idd: int,
-        text: str,
-        x_pos: int,
-        y_pos: int,
-        status: ButtonStatus = ButtonStatus.TEXT,
-    ) -> Button:
-        """Инициализировать.
-        @param idd Идентификатор кнопки
-        @param text Текст кнопки
-        @param x_pos Координата X кнопки
-        @param y_pos Координата Y кнопки
-        @param status Состояние кнопки
-        @return Экземпляр класса кнопки
-        """
-        self.status = status
-        if self.status == ButtonStatus.ENABLED:
-            self.color = (255, 255, 0)
-        elif self.status == ButtonStatus.DISABLED:
-            self.color = (100, 100, 100)
-        else:
-            self.color = (255, 255, 255)
-        self.__text = text
-        self.font = pygame.font.Font("freesansbold.ttf", 22)
-        self.image = self.font.render(self.__text, True, self.color)
-        self.rect = self.image.get_rect()
-        self.__idd = idd
-        self.x_pos = x_pos
-        self.y_pos = y_pos
-        self.rect.x = self.x_pos
-        self.rect.y = self.y_pos
-        self.command = lambda *args: None
-        return self
-
-    def change(
-        self,
-        x_pos: int | None = None,
-        y_pos: int | None = None,
-        text: str | None = None,
-        status: ButtonStatus | None = None,
-    ) -> None:
-        """Изменить параметры кнопки.
-        @param x_pos Координата X кнопки
-        @param y_pos Координата Y кнопки
-        @param text Текст кнопки
-        @param status Состояние кнопки
-        """
-        if text is not None:
-            self.__text = text
-        if status is not None:
-            self.status = status
-        if x_pos is not None:
-            self.x_pos = x_pos
-        if y_pos is not None:
-            self.y_pos = y_pos
-        if self.status == ButtonStatus.ENABLED:
-            self.color = (255, 255, 0)
-        elif self.status == ButtonStatus.DISABLED:
-            self.color = (100, 100, 100)
-        else:
-            self.color = (255, 255, 255)
-        self.image = self.font.render(self.__text, True, self.color)
-        self.rect = self.image.get_rect()
-        self.rect.x = self.x_pos
-        self.rect.y = self.y_pos
-
-    def pushable(self, yes: bool) -> None:
-        """Переключить состояние кнопки.
-        @param yes Флаг нажимаемой кнопки
-        """
-        if self.status != ButtonStatus.TEXT:
-            if yes:
-                self.change(status=ButtonStatus.ENABLED)
-            else:
-                self.change(status=ButtonStatus.DISABLED)
+    HUMAN = 0
+    COMPUTER = 1
 
 
 @unique
-class Player(Enum):
+class Speed(Enum):
     """
-    Перечисление типов игрока (Человек, Компьютер).
+    Перечисление скоростей партии компьютера с компьютером.
     """
 
-    HUMAN = 0
-    COMPUTER = 1
+    NORMAL = 0  # С анимацией бросков и шашек
+    SKIP = 1  # Ход за кадр без анимации
+    EVERY_N = 2  # Отрисовывается каждый N-й ход
+    FINAL = 3  # Отрисовываются только конечные позиции партий
 
 
 class Settings:
@@ -838,13 +1553,23 @@ class Settings:
     Хранит настройки партии, включая типы игроков.
     """
 
-    def __init__(self, players: list[Player]) -> None:
+    def __init__(self, players: list[Player], animation: float = 0.4,
+                 easing: str = "ease_out", speed: Speed = Speed.NORMAL,
+                 speed_moves: int = 10) -> None:
         """Конструктор.
         @param players Типы игроков
+        @param animation Длительность движения шашки, с (0 - без анимации)
+        @param easing Название функции сглаживания из EASINGS
+        @param speed Скорость партии компьютера с компьютером
+        @param speed_moves Число ходов между отрисовками для скорости EVERY_N
         """
         self.players = players
         self.player_one = players[0]
         self.player_two = players[1]
+        self.animation = animation
+        self.easing = easing
+        self.speed = speed
+        self.speed_moves = speed_moves
 
 
 class Control:
@@ -853,6 +1578,9 @@ class Control:
     Реализует связь между моделью (логикой игры), представлением (интерфейс) и настройками.
     """
 
+    ## Сигнатура и версия формата снимка партии
+    SNAPSHOT = b"NRDS\x01"
+
     def __init__(self, party: Party, settings: Settings, record: Record):
         """Конструктор.
         @param party Модель
@@ -866,9 +1594,13 @@ class Control:
         self.dice: Dice = Dice()
         self.count = 0
         self.editor = False  # Режим редактирования
+        self.__moves = 0  # Ходы недоигранной порции ускоренного режима
         self.save = False
         self.time = 0
         self.run = True
+        self.telemetry_file = ""  # Файл сводок телеметрии поиска
+        self.party.subscribe(Event.STAGE_CHANGED, self.__on_stage_changed)
+        self.party.subscribe(Event.GAME_WON, self.__on_game_won)
 
     def is_running(self) -> bool:
         """Вернуть статус игры.
@@ -918,6 +1650,115 @@ class Control:
             self.display.refresh()
             self.display.menu.refresh()
 
+    def save_snapshot(self, filename: str) -> None:
+        """Сохранить недоигранную партию или удалить снимок доигранной.
+        @param filename Имя файла снимка
+        """
+        if not self.save:
+            if os.path.exists(filename):
+                os.remove(filename)
+            return
+        with open(filename, "wb") as file:
+            file.write(self.SNAPSHOT + self.time.to_bytes(4, "little") + self.party.snapshot())
+
+    def load_snapshot(self, filename: str) -> bool:
+        """Продолжить недоигранную партию из снимка.
+        @param filename Имя файла снимка
+        @return Флаг того, что партия продолжена
+        """
+        try:
+            with open(filename, "rb") as file:
+                data = file.read()
+        except OSError:
+            return False
+        header = len(self.SNAPSHOT) + 4
+        if not data.startswith(self.SNAPSHOT):
+            return False
+        try:
+            self.party.restore(data[header:])
+        except ValueError:
+            return False
+        self.time = int.from_bytes(data[len(self.SNAPSHOT):header], "little")
+        self.dice.copy(self.party.state.dice)
+        self.count = 0
+        self.editor = False
+        self.save = True
+        return True
+
+    def undo(self) -> bool:
+        """Отменить последний шаг человека.
+
+        Вместе с ним отменяются сделанные после него передачи хода и шаги компьютера,
+        поэтому отменой можно вернуться к любому шагу партии.
+        @return Флаг отмененного шага
+        """
+        if self.editor or self.count != 0 \
+                or self.settings.players[self.party.state.player] != Player.HUMAN:
+            return False
+        if not self.party.undo_to(self.__humans()):
+            return False
+        self.__sync_dice()
+        return True
+
+    def redo(self) -> bool:
+        """Повторить отмененные записи истории до следующего шага человека.
+        @return Флаг повторенной записи
+        """
+        if self.editor or self.count != 0 \
+                or self.settings.players[self.party.state.player] != Player.HUMAN:
+            return False
+        if not self.party.redo_to(self.__humans()):
+            return False
+        self.__sync_dice()
+        return True
+
+    def __humans(self) -> set[int]:
+        """Вернуть номера игроков-людей.
+        @return Номера игроков
+        """
+        return {player for player, kind in enumerate(self.settings.players) if kind == Player.HUMAN}
+
+    def __sync_dice(self) -> None:
+        """Показать кубики хода, к которому вернули отмена или повтор."""
+        self.dice.copy(self.party.state.dice)
+        if self.display is not None:
+            self.display.panel.toggle_throw(self.party.stage in [Stage.ROLL, Stage.NEXT])
+
+    def awaits_confirm(self) -> bool:
+        """Проверить, ждет ли сыгранный ход человека подтверждения.
+        @return Флаг сыгранного, но не переданного хода человека
+        """
+        return (
+            self.party.stage == Stage.NEXT
+            and self.settings.players[self.party.state.player] == Player.HUMAN
+            and not self.editor
+        )
+
+    def confirm_turn(self) -> bool:
+        """Подтвердить сыгранный ход и передать ход другому игроку.
+
+        Кубики следующего хода бросаются отдельным действием.
+        @return Флаг переданного хода
+        """
+        if self.party.stage != Stage.NEXT:
+            return False
+        self.party.next_player()
+        return True
+
+    def paste_position(self, position_id: str) -> bool:
+        """Расставить позицию по идентификатору в режиме редактирования.
+        @param position_id Идентификатор позиции (State.position_id)
+        @return Флаг того, что позиция расставлена
+        """
+        if not self.editor:
+            return False
+        try:
+            state = State.from_position_id(position_id)
+        except ValueError:
+            return False
+        self.party.set_position(state)
+        return True
+
     def restart(self, change: bool = True) -> None:
         """Перезапустить партию.
         @param change Флаг открытия меню
@@ -925,6 +1766,10 @@ class Control:
         """
         if self.display is None:
             raise ValueError("Display is None")
+        if self.save:
+            # Недоигранная партия брошена: ее снимок перезапишет новая партия
+            self.record.underplayed += 1
+            self.save = False
         self.editor = False  # Режим редактирования выключен по умолчанию
         self.party.new_party()  # Сбросить состояние партии
         self.party.start_party()  # Начать новую партию
@@ -937,13 +1782,17 @@ class Control:
         self.display.menu.refresh()  # Обновление меню
         self.display.panel.refresh()  # Обновление панели
         self.time = 0
+        self.__moves = 0
 
     def throw_dice(self) -> None:
-        """Бросить кубики.
+        """Бросить кубики или передать сыгранный ход человека.
         @throw ValueError Display is None
         """
         if self.display is None:
             raise ValueError("Display is None")
+        if self.confirm_turn():
+            # Кнопка броска после сыгранного хода только передает ход, кубики - следующим нажатием
+            return
         if self.party.stage == Stage.TOSS:
             if self.count == 0:
                 self.display.panel.toggle_throw(False)
@@ -964,45 +1813,24 @@ class Control:
         """
         if self.display is None:
             raise ValueError("Display is None")
+        if self.is_fast_forward():
+            return
         if self.party.stage in [Stage.TOSS, Stage.ROLL]:
             if self.count > 0:
                 self.throw_dice()
                 self.display.panel.refresh()
-                self.display.refresh()
             if self.count == -1 and self.display.pieces.stay != "":
                 self.count = 0
                 self.party.set_dice(self.dice)
                 if self.party.stage in [Stage.TOSS, Stage.ROLL, Stage.NEXT]:
                     self.display.panel.toggle_throw(True)
         if self.party.stage == Stage.NEXT and self.display.pieces.stay != "":
-            self.display.panel.toggle_throw(True)
-            self.party.next_player()
-        if self.party.stage == Stage.ROLL:
-            self.display.panel.refresh()
-        if self.party.stage == Stage.MOVE and self.display.pieces.stay != "":
-            self.save = True
-            self.display.panel.refresh()
-        if self.party.stage == Stage.WIN:
-            if self.display.resume:
-                self.save = False
-                if self.record.min_party == 0:
-                    self.record.min_party = self.time
-                else:
-                    self.record.min_party = min(
-                        self.record.min_party, self.time)
-                self.record.max_party = max(self.record.max_party, self.time)
-                self.record.avg_party = (
-                    self.record.avg_party * self.record.sum + self.time
-                ) // (self.record.sum + 1)
-                self.record.sum += 1
-                if self.party.state.player == 0:
-                    self.record.player_one += 1
-                else:
-                    self.record.player_two += 1
-                self.display.resume = False
-                self.display.panel.refresh()
-                self.display.menu.refresh()
-            self.display.resume = False
+            if not self.awaits_confirm():
+                self.display.panel.toggle_throw(True)
+                self.confirm_turn()
+            elif self.display.panel.buttons[2].status != ButtonStatus.ENABLED:
+                # Ход человека передается кнопкой броска, до нее можно отменить и последний шаг
+                self.display.panel.toggle_throw(True)
         if (
             self.settings.players[self.party.state.player] == Player.COMPUTER
             and not self.editor
@@ -1014,30 +1842,150 @@ class Control:
                 ):
                     self.throw_dice()
                 if self.party.stage == Stage.MOVE:
-                    if self.party.tree is None:
-                        raise ValueError("TreeMove is None")
-                    if self.party.state.player == 0:
-                        item1 = random.choice(self.party.tree.children)
-                    else:
-                        item1 = self.party.tree.children[0]
-                    if item1:
-                        if self.party.state.player == 0:
-                            item2 = random.choice(item1)
-                        else:
-                            if self.party.state.step == 0:
-                                item2 = item1[0]
-                            else:
-                                item2 = item1[-1]
-                        flag = self.try_move(
-                            self.party.state.player ^ self.party.state.color,
-                            item2.start,
-                            item2.end,
-                        )
-                        if flag:
-                            self.display.pieces.refresh()
+                    self.__computer_move()
                 if self.party.stage == Stage.WIN and not self.display.resume:
                     self.restart(False)
 
+    def __computer_move(self) -> bool:
+        """Сделать шаг хода за компьютер.
+        @return Флаг сделанного шага
+        @throw ValueError TreeMove is None
+        """
+        if self.party.tree is None:
+            raise ValueError("TreeMove is None")
+        options = [items for items in self.party.tree.children if items]
+        if not options:
+            return False
+        if self.party.state.player == 0:
+            item1 = random.choice(options)
+            item2 = random.choice(item1)
+        else:
+            item1 = options[0]
+            if self.party.state.step == 0:
+                item2 = item1[0]
+            else:
+                item2 = item1[-1]
+        return self.try_move(
+            self.party.state.player ^ self.party.state.color,
+            item2.start,
+            item2.end,
+        )
+
+    def roll_dice(self) -> None:
+        """Бросить кубики сразу, без анимации броска и без представления."""
+        if self.party.stage == Stage.TOSS:
+            if self.party.state.player == 0:
+                self.dice.reset()
+            self.dice.roll_one(self.party.state.player)
+            self.party.set_dice(self.dice)
+        elif self.party.stage == Stage.ROLL:
+            self.dice.roll_both()
+            self.party.set_dice(self.dice)
+
+    def play_turn(self) -> bool:
+        """Сыграть ход компьютера целиком, без анимации броска и без представления.
+        @return Флаг того, что ход доигран
+        """
+        self.roll_dice()
+        while self.party.stage == Stage.MOVE:
+            if not self.__computer_move():
+                return False
+        self.confirm_turn()
+        return True
+
+    def is_fast_forward(self) -> bool:
+        """Проверить, играется ли партия компьютера с компьютером в ускоренном режиме.
+        @return Флаг ускоренного режима для текущего этапа хода
+        """
+        return not (
+            self.settings.speed == Speed.NORMAL
+            or self.editor
+            or self.count != 0
+            or self.party.stage in [Stage.INIT, Stage.BEGIN, Stage.WIN]
+            or any(player != Player.COMPUTER for player in self.settings.players)
+        )
+
+    def fast_forward(self, deadline: float) -> bool:
+        """Сыграть порцию ходов партии компьютера с компьютером со скоростью из настроек.
+
+        Порция - ход для SKIP, N ходов для EVERY_N, партия для FINAL. Ходы играются до конца
+        порции или до deadline, недоигранная порция продолжается при следующем вызове.
+        В конце порции шашки сразу встают на места.
+        @param deadline Время окончания ходов (по time.perf_counter)
+        @return Флаг доигранной порции, позицию которой нужно показать
+        @throw ValueError Display is None
+        """
+        if self.display is None:
+            raise ValueError("Display is None")
+        if not self.is_fast_forward():
+            return False
+        done = False
+        while self.party.stage != Stage.WIN and time.perf_counter() < deadline:
+            rolled = self.party.stage == Stage.ROLL
+            if not self.play_turn() or self.settings.speed == Speed.SKIP:
+                done = True
+                break
+            self.__moves += rolled
+            if self.settings.speed == Speed.EVERY_N and self.__moves >= self.settings.speed_moves:
+                done = True
+                break
+        if not done and self.party.stage != Stage.WIN:
+            return False
+        self.__moves = 0
+        self.display.skip_animation()
+        if self.party.stage != Stage.WIN:
+            self.display.panel.toggle_throw(True)
+        return True
+
+    def __on_stage_changed(self, new: Stage, **_) -> None:
+        """Обработать смену этапа хода.
+        @param new Новый этап хода
+        """
+        if new == Stage.MOVE:
+            self.save = True
+
+    def __on_game_won(self, player: int) -> None:
+        """Записать итоги выигранной партии.
+        @param player Номер победившего игрока
+        """
+        self.save = False
+        if self.record.min_party == 0:
+            self.record.min_party = self.time
+        else:
+            self.record.min_party = min(self.record.min_party, self.time)
+        self.record.max_party = max(self.record.max_party, self.time)
+        self.record.avg_party = (
+            self.record.avg_party * self.record.sum + self.time
+        ) // (self.record.sum + 1)
+        self.record.sum += 1
+        if player == 0:
+            self.record.player_one += 1
+        else:
+            self.record.player_two += 1
+        if self.telemetry_file:
+            self.party.stats.append(
+                self.telemetry_file,
+                players=[item.name for item in self.settings.players],
+                winner=player + 1,
+                moves=self.party.state.move,
+                time=self.time,
+            )
+        if self.display is not None:
+            self.display.resume = False
+            self.display.menu.refresh()
+
+    def is_busy(self) -> bool:
+        """Проверить, ожидает ли партия обработки без участия пользователя.
+        @return Флаг незавершенного броска, передачи хода или хода компьютера
+        """
+        if self.count != 0 or self.party.stage == Stage.NEXT and not self.awaits_confirm():
+            return True
+        return (
+            self.party.stage in [Stage.TOSS, Stage.ROLL, Stage.MOVE, Stage.WIN]
+            and self.settings.players[self.party.state.player] == Player.COMPUTER
+            and not self.editor
+        )
+
     def change_settings(self, player: int) -> None:
         """Изменить настройки.
         @param player Номер игрока
@@ -1051,6 +1999,17 @@ class Control:
             self.settings.players[player] = Player.HUMAN
         self.display.menu.refresh()
 
+    def change_speed(self) -> None:
+        """Переключить скорость партии компьютера с компьютером.
+        @throw ValueError Display is None
+        """
+        if self.display is None:
+            raise ValueError("Display is None")
+        speeds = list(Speed)
+        index = speeds.index(self.settings.speed)
+        self.settings.speed = speeds[(index + 1) % len(speeds)]
+        self.display.menu.refresh()
+
     def try_move(self, color: int, start: int, end: int) -> bool:
         """Попытаться сходить.
         @param color Номер цвета игрока
@@ -1072,740 +2031,141 @@ class Control:
                 raise ValueError("TreeMove is None")
             tree = self.party.tree.possible_move(start, end)
             if tree is not None:
-                self.party.state.copy(tree.state)
-                self.party.tree = tree
-                self.party.tree.state = self.party.state
-                if max(tree.value) == 0:
-                    if (
-                        len(self.party.state.ind[24]) == 16
-                        or len(self.party.state.ind[25]) == 16
-                    ):
-                        self.party.stage = Stage.WIN
-                    else:
-                        self.party.stage = Stage.NEXT
+                self.party.apply_move(tree, start)
                 return True
             else:
                 return False
         else:
-            self.party.state.ind[end].append(self.party.state.ind[start].pop())
-            if len(self.party.state.ind[start]) == 1:
-                self.party.state.ind[start][0] = -1
-            if self.party.state.ind[end][0] == -1:
-                self.party.state.ind[end][0] = self.party.state.owner[start]
-            self.party.state.checkers[end] += 1
-            self.party.state.owner[end] = self.party.state.owner[start]
-            self.party.state.checkers[start] -= 1
-            if self.party.state.checkers[start] == 0 and start not in [24, 25]:
-                self.party.state.owner[start] = -1
+            self.party.move_checker(start, end)
             return True
 
 
-@unique
-class PieceStatus(Enum):
-    """
-    Перечисление состояния шашки (находится на месте, идет домой, выбрана).
-    """
-
-    STAY = 0
-    TO_HOME = 1
-    CLICKED = 2
-
-
-class Piece(pygame.sprite.Sprite):
-    """
-    Класс элемента шашки.
-    Представляет собой шашку на доске, с возможностью перемещения и взаимодействия.
-    """
-
-    def __init__(self, *groups):
-        """Конструктор.
-        @param groups Группы слайда
-        """
-        super().__init__(*groups)
-        self.color = 0
-        self.image = pygame.image.load("./resources/white.png").convert_alpha()
-        self.rect = self.image.get_rect()
-        self.pos = 0
-        self.hgt = 0
-
-        self.old_x = 0
-        self.old_y = 0
-        self.home_x = 0
-        self.home_y = 0
-
-        self.__idd = -1
-        self.status = PieceStatus.STAY
-
-    def init(self, idd: int, pos: int, hgt: int, color: int) -> Piece:
-        """Инициализировать.
-        @param idd Идентификатор шашки
-        @param pos Поле шашки
-        @param hgt Номер шашки в поле
-        @param color Номер цвета шашки
-        @return Экземпляр класса шашки
-        """
-        self.__idd = idd
-        self.color = color
-        if self.color == 0:
-            self.image = pygame.image.load(
-                "./resources/white.png").convert_alpha()
-        else:
-            self.image = pygame.image.load(
-                "./resources/black.png").convert_alpha()
-        self.rect = self.image.get_rect()
-        self.pos = pos
-        self.hgt = hgt
-        self.rect.x, self.rect.y = self.pos_to_coord()
-        self.old_x = self.rect.x
-        self.old_y = self.rect.y
-        self.home_x = self.rect.x
-        self.home_y = self.rect.y
-        self.status = PieceStatus.STAY
-        return self
-
-    def pos_to_coord(self) -> tuple[int, int]:
-        """Вернуть координаты позиции.
-
-        @return Координаты шашки.
-
-        Математические формулы для вычисления координат:
-        \f[
-        (x, y) = 
-        \begin{cases} 
-        (56 + pos \times 41, 548 - hgt \times 17) & \text{если } 0 \leq pos < 6 \\
-        (116 + pos \times 41, 548 - hgt \times 17) & \text{если } 6 \leq pos < 12 \\
-        (116 + (23 - pos) \times 41, 23 + hgt \times 17) & \text{если } 12 \leq pos < 18 \\
-        (56 + (23 - pos) \times 41, 23 + hgt \times 17) & \text{если } 18 \leq pos < 24 \\
-        (4, 4 + hgt \times 33) & \text{если } pos = 24 \\
-        (621, 563 - hgt \times 33) & \text{если } pos = 25 \\
-        \end{cases}
-        \f]
-        """
-        coord = (-1, -1)
-        pos = self.pos
-        hgt = self.hgt
-        if pos in range(6):
-            coord = (56 + pos * 41, 548 - hgt * 17)
-        elif pos in range(6, 12):
-            coord = (116 + pos * 41, 548 - hgt * 17)
-        elif pos in range(12, 18):
-            coord = (116 + (23 - pos) * 41, 23 + hgt * 17)
-        elif pos in range(18, 24):
-            coord = (56 + (23 - pos) * 41, 23 + hgt * 17)
-        elif pos == 24:
-            coord = (4, 4 + hgt * 33)
-        elif pos == 25:
-            coord = (621, 563 - hgt * 33)
-        return coord
-
-    def get_pos(self) -> int:
-        """Вернуть позицию по координатам (2 варианта).
-        @return Номер позиции
-        """
-        pos = -1
-        x_pos = self.rect.x + self.rect.width // 2
-        y_pos = self.rect.y + self.rect.height // 2
-        if 56 + 0 * 41 <= x_pos <= 56 + 6 * 41:
-            if 548 - 16 * 16 <= y_pos <= 548 + 35:
-                pos = (x_pos - 56) // 41
-            elif 23 + 16 * 16 >= y_pos >= 23:
-                pos = 23 - (x_pos - 56) // 41
-        elif 116 + 6 * 41 <= x_pos <= 116 + 12 * 41:
-            if 548 - 16 * 16 <= y_pos <= 548 + 35:
-                pos = (x_pos - 116) // 41
-            elif 23 + 16 * 16 >= y_pos >= 23:
-                pos = 23 - (x_pos - 116) // 41
-        elif x_pos <= 56 + 0 * 41:
-            pos = 24
-        elif 116 + 13 * 41 <= x_pos:
-            pos = 25
-        return pos
-
-
-class AbstractLayer:
-    """
-    Абстрактный класс слоя.
-    Базовый класс для всех слоев интерфейса, определяет необходимый интерфейс методов.
-    """
-
-    def __init__(self, display: Display):
-        """Конструктор.
-        @param display Экземпляр класса представления
-        """
-        self.display = display
-
-    def init(self) -> None:
-        """Инициализировать.
-        @throw NotImplementedError
-        """
-        raise NotImplementedError()
-
-    def refresh(self) -> None:
-        """Обновить слой.
-        @throw NotImplementedError
-        """
-        raise NotImplementedError()
+## Функции сглаживания анимации: доля прошедшего времени -> доля пройденного пути
+EASINGS: dict[str, Callable[[float], float]] = {
+    "linear": lambda t: t,
+    "ease_out": lambda t: 1 - (1 - t) ** 3,
+    "ease_in_out": lambda t: t * t * (3 - 2 * t),
+}
 
-    def click(self, pos: tuple[int, int]) -> None:
-        """Обработать нажатие кнопки мыши.
-        @throw NotImplementedError
-        """
-        raise NotImplementedError()
 
-    def draw(self) -> None:
-        """Отрисовать слой.
-        @throw NotImplementedError
-        """
-        raise NotImplementedError()
-
-
-class Menu(AbstractLayer):
-    """
-    Класс слоя меню.
-    Отвечает за отрисовку и взаимодействие пользователя с меню игры.
+def window_size(text: str) -> tuple[int, int]:
     """
+    Разобрать размер окна из ключа --size.
 
-    def __init__(self, display: Display):
-        """Конструктор.
-        @param display Экземпляр класса представления
-        """
-        super().__init__(display)
-        self.__buttons: list[Button] = []
-        self.__group: pygame.sprite.Group[Button] = pygame.sprite.Group()
-        self.__surf = pygame.Surface((self.display.width, self.display.height))
-        self.init()
-
-    def init(self) -> None:
-        """Инициализировать."""
-        self.__surf.set_alpha(200)
-        self.__group.empty()
-        self.__buttons.clear()
-        pygame.draw.rect(self.__surf, (0, 0, 0), (self.__surf.get_rect()), 0)
-        pygame.draw.rect(self.__surf, (100, 100, 100),
-                         (self.__surf.get_rect()), 200)
-        self.__buttons.append(Button().init(0, "Меню:", 293, 105))
-        self.__buttons.append(Button().init(1, "Игрок 1:", 120, 135))
-        self.__buttons.append(Button().init(2, "Игрок 2:", 120, 165))
-        self.__buttons.append(Button().init(
-            3, "", 380, 135, ButtonStatus.ENABLED))
-        self.__buttons.append(Button().init(
-            4, "", 380, 165, ButtonStatus.ENABLED))
-        self.__buttons.append(
-            Button().init(5, "Новая партия", 120, 195, ButtonStatus.ENABLED)
-        )
-        self.__buttons.append(
-            Button().init(6, "Продолжить", 380, 195, ButtonStatus.DISABLED)
-        )
-        self.__buttons.append(Button().init(7, "Таблица рекордов:", 213, 225))
-        self.__buttons.append(Button().init(8, "Сыграно партий:", 120, 255))
-        self.__buttons.append(Button().init(
-            9, "Не доиграно партий:", 120, 285))
-        self.__buttons.append(Button().init(10, "Побед 1 игрока:", 120, 315))
-        self.__buttons.append(Button().init(11, "Побед 2 игрока:", 120, 345))
-        self.__buttons.append(Button().init(
-            12, "Самая короткая партия:", 120, 375))
-        self.__buttons.append(Button().init(
-            13, "Самая длинная партия:", 120, 405))
-        self.__buttons.append(Button().init(
-            14, "Среднее время партии:", 120, 435))
-        self.__buttons.append(Button().init(15, "", 420, 255))
-        self.__buttons.append(Button().init(16, "", 420, 285))
-        self.__buttons.append(Button().init(17, "", 420, 315))
-        self.__buttons.append(Button().init(18, "", 420, 345))
-        self.__buttons.append(Button().init(19, "", 420, 375))
-        self.__buttons.append(Button().init(20, "", 420, 405))
-        self.__buttons.append(Button().init(21, "", 420, 435))
-        self.__buttons.append(
-            Button().init(22, "Обнулить", 120, 465, ButtonStatus.ENABLED)
-        )
-        self.__buttons.append(
-            Button().init(23, "Выход", 460, 465, ButtonStatus.ENABLED)
-        )
-        self.__buttons.append(Button().init(24, "Редактор:", 120, 525))
-        self.__buttons.append(Button().init(
-            25, "On", 380, 525, ButtonStatus.ENABLED))
-        self.__buttons.append(Button().init(26, "Время партии:", 120, 495))
-        self.__buttons.append(Button().init(27, "", 380, 495))
-        self.__group.add(self.__buttons)
-        self.refresh()
-        self.__commands()
-
-    def refresh(self) -> None:
-        """Обновить меню."""
-        text = (
-            "Человек"
-            if self.display.control.settings.players[0] == Player.HUMAN
-            else "Компьютер"
-        )
-        self.__buttons[3].change(text=text)
-        text = (
-            "Человек"
-            if self.display.control.settings.players[1] == Player.HUMAN
-            else "Компьютер"
-        )
-        self.__buttons[4].change(text=text)
-        text = "On" if self.display.control.editor else "Off"
-        self.__buttons[25].change(text=text)
-
-        table = self.display.control.record.get_table()
-        for i in range(4):
-            self.__buttons[i + 15].change(text=str(table[i]))
-        for i in range(3):
-            self.__buttons[i + 19].change(text=time_to_text(table[i + 4]))
-        self.__buttons[6].pushable(self.display.resume)
-        self.__buttons[27].change(text=time_to_text(self.display.control.time))
-        self.__group.draw(self.__surf)
-        self.display.refresh()
-
-    def __commands(self) -> None:
-        """Привязать команды к кнопкам."""
-        self.__buttons[3].command = lambda *x: self.display.control.change_settings(
-            0)
-        self.__buttons[4].command = lambda *x: self.display.control.change_settings(
-            1)
-        self.__buttons[5].command = lambda *x: self.display.control.restart()
-        self.__buttons[6].command = lambda *x: self.display.toggle_menu()
-        self.__buttons[23].command = lambda *x: self.display.control.exit()
-        self.__buttons[22].command = lambda *x: self.display.control.reset_record()
-        self.__buttons[25].command = lambda *x: self.display.control.toggle_editor()
-
-    def click(self, pos: tuple[int, int]) -> None:
-        """Обработать нажатие кнопки мыши.
-        @param pos Координаты нажатия кнопки мыши
-        """
-        for key in self.__group:
-            if key.rect.collidepoint(pos) and key.status == ButtonStatus.ENABLED:
-                key.command()
-
-    def draw(self) -> None:
-        """Отрисовать меню."""
-        pygame.draw.rect(self.__surf, (0, 0, 0), (self.__surf.get_rect()), 0)
-        pygame.draw.rect(self.__surf, (100, 100, 100),
-                         (self.__surf.get_rect()), 200)
-        self.__group.draw(self.__surf)
-        self.display.screen.blit(self.__surf, (0, 0))
-
-
-class Panel(AbstractLayer):
-    """
-    Класс слоя панели.
-    Слой панели управления, отображает информацию о ходах и состоянии игры, а также кнопки управления.
-    """
-
-    def __init__(self, display: Display):
-        """Конструктор.
-        @param display Экземпляр класса модели
-        """
-        super().__init__(display)
-        self.buttons: list[Button] = []
-
-        self.__group: pygame.sprite.Group[Button] = pygame.sprite.Group()
-        self.__surf = pygame.Surface((self.display.width, self.display.height))
-        self.init()
-
-    def init(self) -> None:
-        """Инициализировать."""
-        self.__group.empty()
-        self.buttons.clear()
-        pygame.draw.rect(self.__surf, (0, 0, 0), (self.__surf.get_rect()))
-        self.buttons.append(Button().init(0, "Игрок 1", 5, 5))
-        self.buttons.append(Button().init(1, "0:0", 315, 5))
-        self.buttons.append(
-            Button().init(2, "Бросьте кости", 500, 5, ButtonStatus.ENABLED)
-        )
-        self.buttons.append(Button().init(3, "Начало игры", 5, 35))
-        self.buttons.append(Button().init(
-            4, "Меню", 590, 35, ButtonStatus.ENABLED))
-        self.__commands()
-        self.__group.add(self.buttons)
-        self.__group.draw(self.__surf)
-
-    def toggle_throw(self, push: bool) -> None:
-        """Включить/выключить кнопку броска."""
-        self.buttons[2].pushable(push)
-        self.refresh()
-
-    def refresh(self, view_dice: bool = False) -> None:
-        """Обновить панель.
-        @param view_dice Флаг отображения состояния кубиков
-        """
-        dice = self.display.control.dice
-        text = f"{dice.first}:{dice.second}"
-        self.buttons[1].change(text=text)
-        if not view_dice:
-            player = self.display.party.state.player
-            if self.display.party.stage == Stage.TOSS:
-                self.buttons[0].change(text=f"Игрок {player+1}")
-                self.buttons[3].change(text="Розыгрыш права первого хода")
-            if self.display.party.stage in [Stage.ROLL, Stage.MOVE]:
-                color = (
-                    "белые"
-                    if player ^ self.display.party.state.color == 0
-                    else "черные"
-                )
-                move = self.display.party.state.move
-                step = self.display.party.state.step
-                left = self.display.party.state.left
-                self.buttons[0].change(text=f"Игрок {player+1} ({color})")
-                text = (
-                    f"Ход {move+1}"
-                    if self.display.party.stage == Stage.ROLL
-                    else f"Ход {move+1} Шаг {step+1}/{left+step}"
-                )
-                self.buttons[3].change(text=text)
-            if self.display.party.stage == Stage.WIN:
-                color = (
-                    "Белые"
-                    if player ^ self.display.party.state.color == 0
-                    else "Черные"
-                )
-                text = f"{color} выиграли! Игрок {player+1} побеждает"
-                self.buttons[3].change(text=text)
-        self.__group.draw(self.__surf)
-        self.display.refresh()
-
-    def __commands(self) -> None:
-        """Привязать команды к кнопкам."""
-        self.buttons[2].command = lambda *x: self.display.control.throw_dice()
-        self.buttons[4].command = lambda *x: self.display.toggle_menu()
-
-    def click(self, pos: tuple[int, int]) -> None:
-        """Обработать нажатие кнопки мыши.
-        @param pos Координаты нажатия кнопки мыши
-        """
-        for key in self.__group:
-            if (
-                key.rect.collidepoint(
-                    (pos[0], pos[1] - self.display.height + 60))
-                and key.status == ButtonStatus.ENABLED
-            ):
-                key.command()
-
-    def draw(self) -> None:
-        """Отрисовать панель."""
-        pygame.draw.rect(self.__surf, (0, 0, 0), (self.__surf.get_rect()))
-        self.__group.draw(self.__surf)
-        self.display.screen.blit(self.__surf, (0, self.display.height - 60))
-
-
-class Pieces(AbstractLayer):
-    """
-    Класс слоя шашек.
-    Отвечает за отрисовку шашек на доске и их взаимодействие.
+    @param text: Размер в виде WxH, например 1330x1334.
+    @return: Ширина и высота окна.
+    @throw argparse.ArgumentTypeError: Размер задан неверно.
     """
+    import argparse  # pylint: disable=import-outside-toplevel
+    width, _, height = text.lower().partition("x")
+    if not (width.isdigit() and height.isdigit() and int(width) > 0 and int(height) > 0):
+        raise argparse.ArgumentTypeError(f"ожидается WxH, например 1330x1334: {text!r}")
+    return int(width), int(height)
 
-    def __init__(self, display: Display):
-        """Конструктор.
-        @param display Экземпляр класса представления
-        """
-        super().__init__(display)
-        self.group: pygame.sprite.OrderedUpdates = pygame.sprite.OrderedUpdates()
-        self.stay = False
-
-        # self.__white = pygame.image.load("./resources/white.png").convert_alpha()
-        # self.__black = pygame.image.load("./resources/black.png").convert_alpha()
-        self.__pieces: list[Piece] = []
-        self.__ind = self.display.party.state.ind
-        self.init()
-
-    def init(self) -> None:
-        """Инициализировать."""
-        self.stay = False
-        self.group.empty()
-        self.__pieces.clear()
-        self.__pieces = [Piece()
-                         for _ in range(self.display.party.state.amount)]
-        for i, _ in enumerate(self.__ind):
-            if self.__ind[i][0] != -1:
-                for j in range(1, len(self.__ind[i])):
-                    player = self.__ind[i][0]
-                    tmp = self.__pieces[self.__ind[i][j]]
-                    tmp.init(self.__ind[i][j], i, 0, player)
-                    self.group.add(tmp)
-
-    def draw(self) -> None:
-        """Отрисовать слой шашек."""
-        self.group.draw(self.display.screen)
-
-    def click(self, pos: tuple[int, int]) -> None:
-        """Обработать нажатие кнопки мыши.
-        @param pos Координаты нажатия кнопки мыши
-        """
-        tops = [self.__pieces[x[-1]] for x in self.__ind if len(x) > 1]
-        selected_idx = -1
-        for idx, _ in enumerate(tops):
-            if tops[idx].rect.collidepoint(pos):
-                selected_idx = idx
-        if selected_idx != -1:
-            selected_key = tops[selected_idx]
-            selected_key.old_x = selected_key.rect.x
-            selected_key.old_y = selected_key.rect.y
-            selected_key.status = PieceStatus.CLICKED
-            selected_key.remove(self.group)
-            selected_key.add(self.group)
-
-    def release(self) -> None:
-        """Обработать отпускание кнопки мыши."""
-        for key in self.group:
-            if key.status == PieceStatus.CLICKED:
-                pos = key.get_pos()
-                if (
-                    self.display.control.settings.players[
-                        self.display.party.state.player
-                    ]
-                    == Player.COMPUTER
-                    or pos == -1
-                    or not self.display.control.try_move(key.color, key.pos, pos)
-                ):
-                    key.status = PieceStatus.TO_HOME
-                    self.stay = False
-
-    def refresh(self) -> None:
-        """Обновить слой шашек."""
-        self.stay = True
-        self.group.empty()
-        for j in range(1, 17):
-            for i in range(26):
-                if self.__ind[i][0] != -1:
-                    if j < len(self.__ind[i]):
-                        piece_id = self.__ind[i][j]
-                        piece = self.__pieces[piece_id]
-                        self.group.add(piece)
-                        if piece.status != PieceStatus.TO_HOME:
-                            if piece.pos != i or piece.hgt != j - 1:
-                                piece.status = PieceStatus.TO_HOME
-                                self.stay = False
-                                piece.pos = i
-                                piece.hgt = j - 1
-                                piece.home_x, piece.home_y = piece.pos_to_coord()
-                        else:
-                            self.stay = False
-
-
-class Display:
-    """
-    Класс представления.
-    Отвечает за визуализацию игры, управляет слоями интерфейса и отображением элементов игры на экране.
 
-    \image html board.jpg "Вид игровой доски"
+def main() -> None:
+    """Точка входа."""
+    import argparse  # pylint: disable=import-outside-toplevel
+    parser = argparse.ArgumentParser(description="Длинные нарды.")
+    parser.add_argument("--players", nargs=2, default=["human", "human"],
+                        choices=[player.name.lower() for player in Player],
+                        metavar="PLAYER", help="игроки 1 и 2: human или computer")
+    parser.add_argument("--terminal", action="store_true",
+                        help="играть в терминале без pygame")
+    parser.add_argument("--delay", type=float, default=0.5, metavar="SECONDS",
+                        help="пауза после хода компьютера в терминале, с (по умолчанию 0.5)")
+    parser.add_argument("--log", default="./resources/games.bin", metavar="FILE",
+                        help="журнал партий (по умолчанию resources/games.bin, "
+                             "пустая строка - не вести)")
+    parser.add_argument("--snapshot", default="./resources/snapshot.bin", metavar="FILE",
+                        help="снимок недоигранной партии: сохраняется при выходе и "
+                             "продолжается при запуске (по умолчанию resources/snapshot.bin, "
+                             "пустая строка - не сохранять)")
+    parser.add_argument("--profile", default="", metavar="FILE",
+                        help="записать статистику профилировщика в файл при выходе")
+    parser.add_argument("--animation", type=float, default=0.4, metavar="SECONDS",
+                        help="длительность движения шашки, с (0 - без анимации)")
+    parser.add_argument("--easing", choices=sorted(EASINGS), default="ease_out",
+                        help="сглаживание движения шашек")
+    parser.add_argument("--speed", choices=[speed.name.lower() for speed in Speed],
+                        default="normal",
+                        help="скорость партии компьютера с компьютером: normal, "
+                             "skip - без анимации, every_n - отрисовка каждого N-го хода, "
+                             "final - только конечные позиции")
+    parser.add_argument("--every", type=int, default=10, metavar="N",
+                        help="число ходов между отрисовками для every_n (по умолчанию 10)")
+    parser.add_argument("--size", type=window_size, metavar="WxH",
+                        help="размер окна, например 1330x1334 (по умолчанию 665x667)")
+    parser.add_argument("--fullscreen", action="store_true",
+                        help="полноэкранный режим")
+    parser.add_argument("--boards", type=int, default=0, metavar="K",
+                        help="показать K партий компьютера с компьютером сеткой досок")
+    parser.add_argument("--headless", action="store_true",
+                        help="сыграть партии компьютера с компьютером без окна "
+                             "с максимальной скоростью")
+    parser.add_argument("--games", type=int, default=1, metavar="N",
+                        help="число партий без окна (по умолчанию 1)")
+    parser.add_argument("--frames", default="", metavar="DIR",
+                        help="сохранять кадры в каталог в формате PNG (только с --headless)")
+    args = parser.parse_args()
+    if args.frames and not args.headless:
+        # С окном цикл ждет событий при простое, и частота кадров не постоянна
+        parser.error("--frames работает только вместе с --headless")
+
+    settings = Settings([Player[player.upper()] for player in args.players],
+                        args.animation, args.easing, Speed[args.speed.upper()], args.every)
+    log = GameLog(args.log) if args.log else None
+    try:
+        play(args, settings, log)
+    finally:
+        if log is not None:
+            log.close()
+
+
+def play(args: argparse.Namespace, settings: Settings, log: GameLog | None) -> None:
     """
+    Запустить интерфейс, выбранный ключами командной строки.
 
-    def __init__(self, party: Party, control: Control):
-        """Конструктор.
-        @param party Экземпляр класса модели
-        @param control Экземпляр класса контроллера
-        """
-        # Инициализация переменных
-        self.party = party
-        self.control = control
-        self.update = True
-        self.resume = False
-        self.width = 665
-        self.height = 667
-        self.screen = pygame.display.set_mode((self.width, self.height))
-        self.pieces = Pieces(self)
-        self.menu = Menu(self)
-        self.panel = Panel(self)
-
-        # Приватные переменные
-        self.__view_menu = True
-        self.__back = pygame.image.load("./resources/board.jpg").convert()
-
-        # Установка иконки и заголовка окна
-        pygame.display.set_icon(pygame.image.load("./resources/icon.png"))
-        pygame.display.set_caption("Длинные нарды")
-        self.control.set_display(self)
-        self.init()
-
-    def init(self) -> None:
-        """Инициализировать представление."""
-        self.menu.init()
-        self.panel.init()
-        self.pieces.refresh()
-
-    def refresh(self) -> None:
-        """Обновить представление."""
-        self.update = True
-
-    def toggle_menu(self, view: bool | None = None) -> None:
-        """Показать/скрыть меню.
-        @param view Флаг включения меню
-        """
-        if view is None:
-            self.__view_menu = not self.__view_menu
-        else:
-            self.__view_menu = view
-
-    def process(self) -> None:
-        """Обновить состояние представления."""
-        self.pieces.refresh()
-        for key in self.pieces.group:
-            self.__process_piece(key)
-
-    def __process_piece(self, piece: Piece) -> None:
-        """Обработать состояние отдельной шашки.
-        @param piece Шашка
-        """
-        if piece.status == PieceStatus.CLICKED:
-            self.update = True
-            self.__move_clicked_piece(piece)
-        elif piece.status == PieceStatus.TO_HOME:
-            self.update = True
-            self.__move_piece_to_home(piece)
-
-    def __move_clicked_piece(self, piece: Piece) -> None:
-        """Перемещать шашку при клике.
-        @param piece Шашка
-        """
-        pos = pygame.mouse.get_pos()
-        piece.rect.x = pos[0] - piece.rect.width // 2
-        piece.rect.y = pos[1] - piece.rect.height // 2
-
-    def __move_piece_to_home(self, piece: Piece) -> None:
-        """Отправить шашку домой.
-        @param piece Шашка
-        """
-        piece.old_x, piece.old_y = piece.rect.x, piece.rect.y
-        dist = math.hypot(piece.home_x - piece.rect.x,
-                          piece.home_y - piece.rect.y)
-        if dist <= 5:
-            piece.status = PieceStatus.STAY
-            piece.rect.x, piece.rect.y = piece.home_x, piece.home_y
-        else:
-            ratio = 5 / dist
-            piece.rect.x += math.floor((piece.home_x - piece.rect.x) * ratio)
-            piece.rect.y += math.floor((piece.home_y - piece.rect.y) * ratio)
-
-    def draw(self) -> None:
-        """Отрисовать представление."""
-        if self.update:
-            self.screen.blit(self.__back, (0, 0))
-            self.pieces.draw()
-            self.panel.draw()
-            if self.__view_menu:
-                self.menu.draw()
-
-    def command(self, event: pygame.event.Event) -> None:
-        """Обработать события.
-        @param event Событие
-        """
-        self.update = True
-        if event.type == pygame.USEREVENT + 1:
-            self.control.timer()
-
-        if self.__view_menu:
-            self.__handle_menu_event(event)
-        else:
-            self.__handle_game_event(event)
-
-    def __handle_menu_event(self, event: pygame.event.Event) -> None:
-        """Обработать события в меню.
-        @param event Событие
-        """
-        if event.type == pygame.MOUSEBUTTONDOWN:
-            pos = pygame.mouse.get_pos()
-            if event.button == 1:
-                self.menu.click(pos)
-
-    def __handle_game_event(self, event: pygame.event.Event) -> None:
-        """Обработать события в игре.
-        @param event Событие
-        """
-        if event.type == pygame.MOUSEBUTTONDOWN:
-            pos = pygame.mouse.get_pos()
-            if event.button == 1:
-                self.panel.click(pos)
-                self.pieces.click(pos)
-        elif event.type == pygame.MOUSEBUTTONUP:
-            self.pieces.release()
-
-
-class Game:
-    """
-    Основной класс игры.
-    Инициализирует и управляет основными компонентами игры, такими как модель, контроллер и представление.
+    @param args: Ключи командной строки
+    @param settings: Настройки
+    @param log: Журнал партий
     """
+    if args.terminal:
+        from terminal import TerminalGame  # pylint: disable=import-outside-toplevel
+        filename = "./resources/record.json"
+        record = Record().load_from_file(filename)
+        TerminalGame(record, settings, "./resources/telemetry.jsonl", args.delay,
+                     log=log, snapshot_file=args.snapshot).run()
+        record.write(filename)
+        return
+
+    # Графический интерфейс импортирует pygame
+    from gui import Game, TiledGame  # pylint: disable=import-outside-toplevel
+    if args.boards > 0:
+        # Партии на сетке досок не попадают в таблицу рекордов
+        TiledGame(args.boards, Record(), settings, "./resources/telemetry.jsonl", log).run()
+        return
+
+    if args.headless:
+        # Партии без окна не попадают в таблицу рекордов
+        settings.players = [Player.COMPUTER, Player.COMPUTER]
+        Game(Record(), args.profile, "./resources/telemetry.jsonl", settings, args.size,
+             headless=True, frames_dir=args.frames, games=args.games, log=log).run()
+        return
 
-    def __init__(self, record: Record):
-        """Конструктор.
-        @param record Статистика
-        """
-        self.record = record
-
-        os.environ["SDL_VIDEO_CENTERED"] = "1"
-        pygame.init()
-        pygame.time.set_timer(pygame.USEREVENT + 1, 1000)
-        self.__clock = pygame.time.Clock()
-        self.__settings = Settings([Player.HUMAN, Player.HUMAN])
-
-        self.__party = Party()  # Model
-        self.__control = Control(
-            self.__party, self.__settings, self.record
-        )  # Controller
-        self.__display = Display(self.__party, self.__control)  # View
-        # self.__party.display = self.display
-        self.__upd = False
-
-    def __process_input(self) -> None:
-        """Обработать события."""
-        for event in pygame.event.get():
-            if event.type == pygame.QUIT:
-                self.__control.exit()
-            elif event.type == pygame.MOUSEBUTTONDOWN:
-                self.__display.command(event)
-            elif event.type == pygame.MOUSEBUTTONUP:
-                self.__display.command(event)
-            elif event.type == pygame.USEREVENT + 1:
-                self.__display.command(event)
-                self.__upd = True
-
-    def __update(self) -> None:
-        """Обновить состояние игры."""
-        self.__display.process()
-        self.__control.process()
-
-    def __render(self) -> None:
-        """Отрисовать."""
-        self.__display.draw()
-        self.__display.update = False
-        if self.__upd:
-            pygame.display.update()
-            self.__clock.tick(60)
-            self.__upd = False
-
-    def __update_record(self) -> None:
-        """Обновить статистику."""
-        if self.__control.save:
-            self.record.underplayed += 1
-        pygame.quit()
-
-    def run(self) -> None:
-        """Запустить основной цикл."""
-        while self.__control.is_running():
-            self.__process_input()
-            self.__update()
-            self.__render()
-
-        self.__update_record()
-
-    def save_record_to_file(self, filename: str) -> None:
-        """Сохранить текущую статистику в файл.
-        @param filename Имя файла
-        """
-        self.record.write(filename)
-
-
-def main() -> None:
-    """Точка входа."""
     filename = "./resources/record.json"
     record = Record().load_from_file(filename)
 
-    game = Game(record)
+    game = Game(record, args.profile, "./resources/telemetry.jsonl", settings,
+                args.size, args.fullscreen, log=log,
+                snapshot_file=args.snapshot)
     game.run()
 
     game.save_record_to_file(filename)
 
 
 if __name__ == "__main__":
-    main()
+    # Интерфейсы импортируют движок как модуль nard: его классы должны совпадать с классами main
+    from nard import main as nard_main  # pylint: disable=import-self
+    nard_main()
     sys.exit()
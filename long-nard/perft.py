@@ -0,0 +1,91 @@
+"""Счетчик генерации ходов (perft) для длинных нард."""
+
+from __future__ import annotations
+
+import argparse
+import time
+
+from nard import Dice, State, TreeMove
+
+
+def dice_outcomes() -> list[Dice]:
+    """
+    Вернуть все различные броски двух кубиков.
+
+    @return: Список из 21 броска
+    """
+    return [Dice(first, second)
+            for first in range(1, 7) for second in range(1, first + 1)]
+
+
+def plays(state: State) -> list[State]:
+    """
+    Перечислить позиции после всех возможных ходов на выпавших кубиках.
+
+    Позиции берутся из листьев дерева TreeMove. Если ходов нет, возвращается
+    исходная позиция: игрок пропускает ход.
+
+    @param state: Состояние доски с брошенными кубиками
+    @return: Список конечных состояний доски
+    """
+    root = TreeMove(State(state), -1, -1)
+    root.next()
+    leaves: list[State] = []
+    stack = [root]
+    while stack:
+        node = stack.pop()
+        if node.children[0] or node.children[1]:
+            for items in node.children:
+                stack.extend(items)
+        else:
+            leaves.append(node.state)
+    return leaves
+
+
+def perft(state: State, depth: int, counts: list[int], level: int = 0) -> None:
+    """
+    Посчитать число узлов дерева игры до заданной глубины.
+
+    @param state: Состояние доски перед броском кубиков
+    @param depth: Глубина перебора в ходах
+    @param counts: Счетчики узлов по глубинам (дополняются)
+    @param level: Текущая глубина
+    """
+    for dice in dice_outcomes():
+        current = State(state)
+        current.dice = dice
+        current.remained_die = []
+        for leaf in plays(current):
+            counts[level] += 1
+            if level + 1 < depth and not leaf.is_win():
+                following = State(leaf)
+                following.next_player()
+                perft(following, depth, counts, level + 1)
+
+
+def main() -> None:
+    """Точка входа."""
+    parser = argparse.ArgumentParser(
+        description="Перечислить броски и ходы до глубины N "
+                    "и измерить скорость генерации ходов.")
+    parser.add_argument("-d", "--depth", type=int, default=2,
+                        help="глубина перебора в ходах (по умолчанию 2)")
+    parser.add_argument("--first", type=int, choices=[1, 2], default=1,
+                        help="игрок, делающий первый ход (по умолчанию 1)")
+    args = parser.parse_args()
+
+    state = State()
+    state.init_players(args.first - 1)
+
+    print(f"{'глубина':>7} {'узлов':>12} {'время, с':>10} {'узлов/с':>10}")
+    for depth in range(1, args.depth + 1):
+        counts = [0] * depth
+        started = time.perf_counter()
+        perft(state, depth, counts)
+        elapsed = time.perf_counter() - started
+        speed = sum(counts) / elapsed if elapsed > 0 else 0.0
+        print(f"{depth:>7} {counts[-1]:>12} {elapsed:>10.3f} {speed:>10.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,261 @@
+"""Воспроизведение и проверка партий из журнала длинных нард."""
+
+from __future__ import annotations
+
+import argparse
+import multiprocessing
+import sys
+import time
+
+from nard import Dice, GameLog, LoggedGame, State, TreeMove
+from terminal import board_lines, step_text
+
+## Ошибка записи: номер хода, номер шага (-1 - ход целиком) и описание
+Error = tuple[int, int, str]
+
+
+class Replay:
+    """
+    Класс воспроизведения партии.
+    Восстанавливает состояние доски перед любым ходом партии без отрисовки.
+    Позиции сохраняются каждые interval ходов: переход к ходу проигрывает
+    от ближайшей сохраненной позиции не больше interval - 1 ходов.
+    """
+
+    ## Число ходов между сохраненными позициями
+    INTERVAL = 16
+
+    def __init__(self, game: LoggedGame, interval: int = INTERVAL):
+        """Конструктор.
+
+        Ходы не проигрываются до первого вызова state_at: для проверки записи
+        сохраненные позиции не нужны.
+        @param game Партия из журнала
+        @param interval Число ходов между сохраненными позициями
+        """
+        self.game = game
+        self.interval = interval
+        self.__checkpoints: list[State] = []  # Сохраненные позиции, строятся при первом переходе
+
+    def __build(self) -> None:
+        """Проиграть партию целиком и сохранить позиции каждые interval ходов."""
+        state = self.start()
+        for ply in range(len(self) + 1):
+            if ply % self.interval == 0:
+                self.__checkpoints.append(State(state))
+            if ply < len(self):
+                self.__play(state, ply)
+
+    def __len__(self) -> int:
+        """Вернуть число ходов партии.
+        @return Число ходов
+        """
+        return len(self.game.turns)
+
+    def start(self) -> State:
+        """Расставить шашки по итогу розыгрыша первого хода.
+        @return Начальное состояние доски
+        """
+        state = State()
+        state.init_players(0 if self.game.toss.first > self.game.toss.second else 1)
+        return state
+
+    def __play(self, state: State, ply: int) -> None:
+        """Переставить шашки хода без проверки правил и передать ход.
+        @param state Состояние доски перед ходом (изменяется)
+        @param ply Номер хода
+        """
+        state.dice, steps = self.game.turns[ply]
+        for start, end in steps:
+            state.move_checker(start, end)
+        state.next_player()
+
+    def state_at(self, ply: int) -> State:
+        """Восстановить состояние доски перед ходом.
+        @param ply Номер хода от 0 до len(self); len(self) - позиция после последнего хода
+        @return Состояние доски с брошенными кубиками хода
+        @throw IndexError Нет такого хода
+        """
+        if not 0 <= ply <= len(self):
+            raise IndexError(f"ply {ply} is out of range 0..{len(self)}")
+        if not self.__checkpoints:
+            self.__build()
+        state = State(self.__checkpoints[ply // self.interval])
+        for turn in range(ply - ply % self.interval, ply):
+            self.__play(state, turn)
+        state.remained_die = []
+        if ply < len(self):
+            dice = self.game.turns[ply][0]
+            state.dice = Dice(dice.first, dice.second)
+            state.fill_dice()
+        return state
+
+    def validate(self) -> Error | None:
+        """Проверить партию по правилам.
+
+        Ход, в котором сыграны все кубики простыми шагами, проверяется
+        последовательностью State.right_move, остальные - по дереву ходов TreeMove.
+        @return Первая ошибка или None
+        """
+        toss = self.game.toss
+        if not (1 <= toss.first <= 6 and 1 <= toss.second <= 6) or toss.is_doubling():
+            return -1, -1, f"неверный розыгрыш {toss.first}:{toss.second}"
+        state = self.start()
+        for ply, (dice, steps) in enumerate(self.game.turns):
+            if state.is_win():
+                return ply, -1, "ход после окончания партии"
+            if not (1 <= dice.first <= 6 and 1 <= dice.second <= 6):
+                return ply, -1, f"неверные кубики {dice.first}:{dice.second}"
+            state.dice = dice
+            following = self.__simple_turn(state, steps)
+            if following is None:
+                # Недоигранная партия может оборваться посреди хода
+                complete = ply < len(self) - 1 or self.game.result != GameLog.UNFINISHED
+                following, error = self.__tree_turn(state, steps, ply, complete)
+                if error is not None:
+                    return error
+            state = following
+            if ply < len(self) - 1 or not state.is_win():
+                state.next_player()
+        result = self.game.result
+        if result in [0, 1] and (not state.is_win() or state.player != result):
+            return len(self), -1, f"итог {result} не совпадает с позицией"
+        if result == GameLog.UNFINISHED and state.is_win():
+            return len(self), -1, "выигранная партия записана недоигранной"
+        if result not in [0, 1, GameLog.UNFINISHED, GameLog.EDITED]:
+            return len(self), -1, f"неизвестный итог {result}"
+        return None
+
+    @staticmethod
+    def __simple_turn(state: State, steps: list[tuple[int, int]]) -> State | None:
+        """Сыграть ход, в котором все кубики сыграны простыми шагами без снятия шашек.
+
+        Такой ход законен, если законен каждый шаг и итоговая позиция не содержит
+        запрещенного блока: дерево ходов для него не нужно.
+        @param state Состояние доски перед ходом
+        @param steps Шаги хода
+        @return Состояние после хода или None, если ход нужно проверить по дереву
+        """
+        following = State(state)
+        following.remained_die = []
+        following.fill_dice()
+        if len(steps) != len(following.remained_die):
+            return None
+        for start, end in steps:
+            die = (end - start) % 24
+            if end >= 24 or following.is_remove_checkers(start, die) \
+                    or not following.right_move(start, die):
+                return None
+        if following.is_one_line():
+            return None
+        return following
+
+    @staticmethod
+    def __tree_turn(state: State, steps: list[tuple[int, int]], ply: int,
+                    complete: bool = True) -> tuple[State, Error | None]:
+        """Проверить ход по дереву ходов.
+        @param state Состояние доски перед ходом
+        @param steps Шаги хода
+        @param ply Номер хода
+        @param complete Флаг того, что ход должен быть доигран
+        @return Состояние после хода и ошибка или None
+        """
+        node = TreeMove(State(state), -1, -1)
+        node.next()
+        for step, (start, end) in enumerate(steps):
+            following = node.possible_move(start, end)
+            if following is None:
+                return state, (ply, step, f"невозможный шаг {step_text(start, end)}")
+            node = following
+        if complete and max(node.value) != 0:
+            return state, (ply, len(steps), "ход не доигран")
+        return node.state, None
+
+
+def check_record(args: tuple[int, bytes]) -> tuple[int, str | None]:
+    """
+    Проверить запись журнала.
+
+    @param args: Номер партии и тело записи.
+    @return: Номер партии и описание ошибки, "" для партии из редактора или None.
+    """
+    index, body = args
+    try:
+        game = GameLog.decode(body)
+    except ValueError as error:
+        return index, f"запись повреждена: {error}"
+    if game.result == GameLog.EDITED:
+        return index, ""
+    error = Replay(game).validate()
+    if error is None:
+        return index, None
+    ply, step, text = error
+    return index, f"ход {ply + 1}" + (f", шаг {step + 1}" if step >= 0 else "") + f": {text}"
+
+
+def main() -> None:
+    """Точка входа."""
+    parser = argparse.ArgumentParser(
+        description="Показать позицию партии из журнала или проверить записи по правилам.")
+    parser.add_argument("log", help="файл журнала партий")
+    parser.add_argument("-g", "--game", type=int,
+                        help="номер партии с 1 (по умолчанию все партии)")
+    parser.add_argument("-p", "--ply", type=int,
+                        help="показать позицию перед ходом K с 1 (по умолчанию после последнего)")
+    parser.add_argument("--validate", action="store_true",
+                        help="проверить ходы по правилам")
+    parser.add_argument("-j", "--jobs", type=int, default=multiprocessing.cpu_count(),
+                        help="число процессов проверки (по умолчанию все ядра)")
+    args = parser.parse_args()
+
+    try:
+        bodies = list(GameLog.read(args.log))
+    except (OSError, ValueError) as error:
+        parser.error(str(error))
+    if args.game is not None:
+        if not 1 <= args.game <= len(bodies):
+            parser.error(f"в журнале {len(bodies)} партий")
+        records = [(args.game - 1, bodies[args.game - 1])]
+    else:
+        records = list(enumerate(bodies))
+
+    if args.validate:
+        errors = skipped = 0
+        started = time.perf_counter()
+        with multiprocessing.Pool(args.jobs) as pool:
+            for index, error in pool.imap(check_record, records, chunksize=16):
+                if error == "":
+                    skipped += 1
+                elif error is not None:
+                    errors += 1
+                    print(f"партия {index + 1}: {error}")
+        print(f"партий: {len(records)}, ошибок: {errors}, пропущено (редактор): {skipped}, "
+              f"{time.perf_counter() - started:.2f} с")
+        sys.exit(1 if errors else 0)
+
+    if args.game is None:
+        results = {0: "игрок 1", 1: "игрок 2", GameLog.UNFINISHED: "не доиграна",
+                   GameLog.EDITED: "редактор"}
+        for index, body in records:
+            game = GameLog.decode(body)
+            print(f"{index + 1:>6} ходов: {len(game.turns):>4} "
+                  f"итог: {results.get(game.result, game.result)}")
+        return
+
+    replay = Replay(GameLog.decode(records[0][1]))
+    ply = len(replay) if args.ply is None else args.ply - 1
+    if not 0 <= ply <= len(replay):
+        parser.error(f"в партии {len(replay)} ходов")
+    state = replay.state_at(ply)
+    print("\n".join(board_lines(state)))
+    if ply < len(replay):
+        dice, steps = replay.game.turns[ply]
+        print(f"Ход {ply + 1}: игрок {state.player + 1}, кости {dice.first}:{dice.second}, "
+              f"шаги: {' '.join(step_text(start, end) for start, end in steps)}")
+    else:
+        print(f"После хода {ply}")
+    print(f"Позиция: {state.position_id()}")
+
+
+if __name__ == "__main__":
+    main()
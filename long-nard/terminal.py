@@ -0,0 +1,327 @@
+"""Терминальный интерфейс длинных нард без pygame."""
+
+from __future__ import annotations
+
+import sys
+import time
+from typing import TextIO
+
+from nard import Control, GameLog, Party, Player, Record, Settings, Stage, State
+
+## Поля верхней половины доски слева направо
+TOP = list(range(23, 17, -1)) + list(range(17, 11, -1))
+## Поля нижней половины доски слева направо
+BOTTOM = list(range(0, 12))
+## Высота стопки шашек на экране
+STACK = 5
+## Символы шашек по цвету
+SYMBOLS = ("O", "X")
+
+
+def point_label(pos: int) -> int:
+    """
+    Вернуть номер поля, нарисованный на доске.
+
+    @param pos: Поле в нумерации State.
+    @return: Номер поля от 1 до 24.
+    """
+    return 12 - pos if pos < 12 else 36 - pos
+
+
+def label_point(label: int) -> int:
+    """
+    Вернуть поле State по номеру, нарисованному на доске.
+
+    @param label: Номер поля от 1 до 24.
+    @return: Поле в нумерации State.
+    """
+    return 12 - label if label <= 12 else 36 - label
+
+
+def board_lines(state: State) -> list[str]:
+    """
+    Построить строки доски.
+
+    @param state: Состояние доски.
+    @return: Строки с номерами полей, стопками шашек и снятыми шашками.
+    """
+    lines = ["  " + "".join(f"{point_label(pos):>3}" for pos in TOP[:6]) + "  "
+             + "".join(f"{point_label(pos):>3}" for pos in TOP[6:])]
+    for row in range(STACK):
+        lines.append("  " + _row(state, TOP, row))
+    off = "   ".join(f"{SYMBOLS[state.owner[pos]]} снято: {state.checkers[pos]}"
+                     for pos in (24, 25))
+    lines.append(f"  {off}")
+    for row in reversed(range(STACK)):
+        lines.append("  " + _row(state, BOTTOM, row))
+    lines.append("  " + "".join(f"{point_label(pos):>3}" for pos in BOTTOM[:6]) + "  "
+                 + "".join(f"{point_label(pos):>3}" for pos in BOTTOM[6:]))
+    return lines
+
+
+def _row(state: State, points: list[int], row: int) -> str:
+    """
+    Построить строку стопок шашек половины доски.
+
+    @param state: Состояние доски.
+    @param points: Поля половины доски слева направо.
+    @param row: Высота строки от края доски.
+    @return: Строка стопок.
+    """
+    cells = []
+    for pos in points:
+        count = state.checkers[pos]
+        if count > STACK and row == STACK - 1:
+            cells.append(f"{count:>3}")
+        elif count > row:
+            cells.append(f"{SYMBOLS[state.owner[pos]]:>3}")
+        else:
+            cells.append("  .")
+    return "".join(cells[:6]) + " |" + "".join(cells[6:])
+
+
+def step_text(start: int, end: int) -> str:
+    """
+    Вернуть шаг в нумерации доски.
+
+    @param start: Позиция начала хода.
+    @param end: Позиция конца хода.
+    @return: Шаг вида "13-9" или "20-off".
+    """
+    return f"{point_label(start)}-{'off' if end >= 24 else point_label(end)}"
+
+
+class Screen:
+    """
+    Класс экрана терминала.
+    Помнит выведенные строки и перерисовывает управляющими последовательностями ANSI
+    только изменившиеся символы.
+    """
+
+    ## Наибольший промежуток неизменившихся символов, который выгоднее перерисовать,
+    ## чем перемещать курсор
+    GAP = 8
+
+    def __init__(self, stream: TextIO = sys.stdout):
+        """Конструктор.
+        @param stream Поток вывода
+        """
+        self.stream = stream
+        self.__lines: list[str] | None = None  # Выведенные строки, None - экран не очищен
+
+    def draw(self, lines: list[str]) -> int:
+        """Вывести строки, перерисовав только изменившиеся символы.
+        @param lines Строки экрана
+        @return Число выведенных символов
+        """
+        out = []
+        if self.__lines is None:
+            out.append("\x1b[2J")
+            self.__lines = []
+        written = 0
+        for row in range(max(len(lines), len(self.__lines))):
+            new = lines[row] if row < len(lines) else ""
+            old = self.__lines[row] if row < len(self.__lines) else ""
+            width = max(len(new), len(old))
+            new, old = new.ljust(width), old.ljust(width)
+            col = 0
+            while col < width:
+                if new[col] == old[col]:
+                    col += 1
+                    continue
+                end = col + 1
+                last = col  # Последний изменившийся символ
+                while end < width and end - last <= self.GAP:
+                    if new[end] != old[end]:
+                        last = end
+                    end += 1
+                out.append(f"\x1b[{row + 1};{col + 1}H{new[col:last + 1]}")
+                written += last + 1 - col
+                col = last + 1
+        self.__lines = list(lines)
+        if out:
+            self.stream.write("".join(out))
+            self.stream.flush()
+        return written
+
+    def prompt(self, text: str) -> str:
+        """Прочитать строку под выведенными строками.
+        @param text Приглашение
+        @return Введенная строка
+        @throw EOFError Поток ввода закрыт
+        """
+        row = len(self.__lines or []) + 1
+        self.stream.write(f"\x1b[{row};1H\x1b[J{text}")
+        self.stream.flush()
+        return input()
+
+    def close(self) -> None:
+        """Перевести курсор под выведенные строки."""
+        self.stream.write(f"\x1b[{len(self.__lines or []) + 1};1H\x1b[J")
+        self.stream.flush()
+
+
+class TerminalGame:
+    """
+    Класс игры в терминале.
+    Ведет партию через Party и Control так же, как графический интерфейс, но рисует доску
+    символами и принимает ходы текстом.
+    """
+
+    def __init__(self, record: Record, settings: Settings, telemetry_file: str = "",
+                 delay: float = 0.5, screen: Screen | None = None,
+                 log: GameLog | None = None, snapshot_file: str = ""):
+        """Конструктор.
+
+        Недоигранная при выходе партия сохраняется в снимок и продолжается при следующем запуске.
+        @param record Статистика
+        @param settings Настройки
+        @param telemetry_file Имя файла для сводок телеметрии поиска
+        @param delay Пауза после хода компьютера, с
+        @param screen Экран терминала (по умолчанию стандартный вывод)
+        @param log Журнал партий
+        @param snapshot_file Имя файла снимка недоигранной партии (пустая строка - не сохранять)
+        """
+        self.record = record
+        self.party = Party()
+        self.control = Control(self.party, settings, record)
+        self.control.telemetry_file = telemetry_file
+        if log is not None:
+            log.attach(self.party)
+        self.snapshot_file = snapshot_file
+        self.delay = delay
+        self.screen = screen if screen is not None else Screen()
+        self.message = ""
+        self.__started = time.monotonic()
+
+    def lines(self) -> list[str]:
+        """Построить строки экрана.
+        @return Строки доски, состояния хода, возможных ходов и идентификатор позиции
+        """
+        return board_lines(self.party.state) + [
+            "", self.__status(), self.__moves(),
+            f"Позиция: {self.party.state.position_id()}", self.message]
+
+    def __status(self) -> str:
+        """Построить строку состояния хода.
+        @return Строка с игроком, кубиками и номером хода
+        """
+        state = self.party.state
+        dice = f"{self.control.dice.first}:{self.control.dice.second}"
+        if self.party.stage == Stage.TOSS:
+            return f"Игрок {state.player + 1}, розыгрыш права первого хода, кости {dice}"
+        color = "белые" if state.player ^ state.color == 0 else "черные"
+        text = f"Игрок {state.player + 1} ({color}), кости {dice}, ход {state.move + 1}"
+        if self.party.stage == Stage.MOVE:
+            text += f" шаг {state.step + 1}/{state.left + state.step}"
+        elif self.party.stage == Stage.NEXT:
+            text += " сыгран"
+        return text
+
+    def __moves(self) -> str:
+        """Построить строку возможных шагов.
+        @return Возможные шаги в нумерации доски
+        """
+        if self.party.stage != Stage.MOVE or self.party.tree is None:
+            return ""
+        steps = sorted({(child.start, child.end)
+                        for items in self.party.tree.children for child in items})
+        return "Шаги: " + " ".join(step_text(start, end) for start, end in steps)
+
+    def __human_step(self) -> None:
+        """Прочитать и сделать шаг игрока-человека."""
+        text = self.screen.prompt(
+            "Шаг (откуда куда, off - снять шашку, u - отменить, r - повторить, q - выход): ")
+        words = text.lower().split()
+        if words == ["q"]:
+            self.control.exit()
+            return
+        if words in (["u"], ["r"]):
+            done = self.control.undo() if words == ["u"] else self.control.redo()
+            self.message = "" if done else "Нечего " + ("отменять" if words == ["u"] else "повторять")
+            return
+        state = self.party.state
+        color = state.player ^ state.color
+        try:
+            start = label_point(int(words[0]))
+            end = 24 if state.owner[24] == color else 25
+            if words[1] != "off":
+                end = label_point(int(words[1]))
+            if len(words) != 2 or not 0 <= start < 24 or not 0 <= end < 26:
+                raise ValueError(text)
+        except (ValueError, IndexError):
+            self.message = f"Не понят шаг: {text!r}"
+            return
+        if self.control.try_move(color, start, end):
+            self.message = ""
+        else:
+            self.message = f"Шаг {text} невозможен"
+
+    def __confirm(self) -> None:
+        """Подтвердить сыгранный ход игрока-человека, отменить или повторить шаг."""
+        text = self.screen.prompt(
+            "Ход сыгран (Enter - передать ход, u - отменить, r - повторить, q - выход): ")
+        words = text.lower().split()
+        if words == ["q"]:
+            self.control.exit()
+        elif words in (["u"], ["r"]):
+            done = self.control.undo() if words == ["u"] else self.control.redo()
+            self.message = "" if done else "Нечего " + ("отменять" if words == ["u"] else "повторять")
+        elif not words:
+            self.control.confirm_turn()
+            self.message = ""
+        else:
+            self.message = f"Не понята команда: {text!r}"
+
+    def __finish(self) -> None:
+        """Объявить победителя и предложить новую партию."""
+        state = self.party.state
+        color = "Белые" if state.player ^ state.color == 0 else "Черные"
+        self.message = f"{color} выиграли! Игрок {state.player + 1} побеждает"
+        self.screen.draw(self.lines())
+        if self.screen.prompt("Enter - новая партия, q - выход: ").strip().lower() == "q":
+            self.control.exit()
+            return
+        self.message = ""
+        self.party.new_party()
+        self.party.start_party()
+        self.control.dice.reset()
+        self.control.time = 0
+        self.__started = time.monotonic()
+
+    def run(self) -> None:
+        """Запустить игру.
+
+        Экран перерисовывается после каждого шага, кубики бросаются автоматически,
+        компьютер играет ход целиком, сыгранный ход человека передается после подтверждения.
+        """
+        if not self.snapshot_file or not self.control.load_snapshot(self.snapshot_file):
+            self.party.start_party()
+        self.__started = time.monotonic() - self.control.time
+        try:
+            while self.control.is_running():
+                self.control.time = int(time.monotonic() - self.__started)
+                stage = self.party.stage
+                if stage in [Stage.TOSS, Stage.ROLL]:
+                    self.control.roll_dice()
+                elif self.control.awaits_confirm():
+                    self.screen.draw(self.lines())
+                    self.__confirm()
+                elif stage == Stage.NEXT:
+                    self.control.confirm_turn()
+                elif stage == Stage.WIN:
+                    self.__finish()
+                elif self.control.settings.players[self.party.state.player] == Player.COMPUTER:
+                    self.control.play_turn()
+                    self.screen.draw(self.lines())
+                    time.sleep(self.delay)
+                else:
+                    self.screen.draw(self.lines())
+                    self.__human_step()
+        except (EOFError, KeyboardInterrupt):
+            self.control.exit()
+        if self.snapshot_file:
+            self.control.save_snapshot(self.snapshot_file)
+        elif self.control.save:
+            self.record.underplayed += 1
+        self.screen.close()
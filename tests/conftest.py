@@ -0,0 +1,55 @@
+"""Общие фикстуры тестов."""
+
+from __future__ import annotations
+
+import random
+from typing import Callable
+
+import pytest
+
+from nard import Control, Event, GameLog, Party, Player, Record, Settings, Stage
+
+
+@pytest.fixture
+def play() -> Callable[..., Control]:
+    """
+    Вернуть функцию, играющую партию компьютера с компьютером без представления.
+
+    @return: Функция play(party, seed, turns=None): turns - число ходов (None - до победы)
+    """
+    def play(party: Party, seed: int, turns: int | None = None) -> Control:
+        random.seed(seed)
+        control = Control(party, Settings([Player.COMPUTER, Player.COMPUTER]), Record())
+        party.start_party()
+        played = 0
+        while party.stage != Stage.WIN and (turns is None or played < turns):
+            if party.stage == Stage.TOSS:
+                control.roll_dice()
+            else:
+                control.play_turn()
+                played += 1
+        return control
+
+    return play
+
+
+@pytest.fixture
+def record(tmp_path, play) -> Callable[..., tuple[Party, list[tuple[int, int]], list[bytes]]]:
+    """
+    Вернуть функцию, играющую партию с журналом в tmp_path/games.bin.
+
+    @return: Функция record(seed, turns=None), возвращающая модель, шаги по событиям
+    модели и тела записей журнала
+    """
+    def record(seed: int, turns: int | None = None):
+        filename = str(tmp_path / "games.bin")
+        log = GameLog(filename)
+        party = Party()
+        log.attach(party)
+        steps: list[tuple[int, int]] = []
+        party.subscribe(Event.MOVE_APPLIED, lambda start, end: steps.append((start, end)))
+        play(party, seed, turns)
+        log.close()
+        return party, steps, list(GameLog.read(filename))
+
+    return record
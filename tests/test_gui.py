@@ -0,0 +1,89 @@
+"""Тесты основного цикла графического интерфейса без окна."""
+
+from pathlib import Path
+
+import pytest
+
+pygame = pytest.importorskip("pygame")
+
+from nard import Control, Player, Record, Settings, Speed, Stage  # noqa: E402
+
+gui = pytest.importorskip("gui")
+
+
+@pytest.fixture
+def frames(monkeypatch):
+    """
+    Вернуть функцию, выполняющую кадры партий компьютера с компьютером без окна.
+
+    @return: Функция frames(speed, count, wins): count - наибольшее число кадров, wins - число
+    партий до остановки; возвращает для каждого кадра число сыгранных ходов, бросков и партий
+    и флаг отрисовки
+    """
+    monkeypatch.chdir(Path(__file__).parent.parent)  # Изображения из resources
+    monkeypatch.setenv("SDL_VIDEODRIVER", "dummy")
+    monkeypatch.setattr(gui.Game, "BUDGET", 0.05)  # Партия растягивается на много кадров
+    counts = {"plays": 0, "rolls": 0, "wins": 0, "drawn": False}
+    play_turn, draw = Control.play_turn, gui.Display.draw
+
+    def counted_play_turn(control):
+        counts["plays"] += 1
+        counts["rolls"] += control.party.stage == Stage.ROLL
+        done = play_turn(control)
+        counts["wins"] += control.party.stage == Stage.WIN
+        return done
+
+    def counted_draw(display):
+        counts["drawn"] = True
+        return draw(display)
+
+    monkeypatch.setattr(Control, "play_turn", counted_play_turn)
+    monkeypatch.setattr(gui.Display, "draw", counted_draw)
+
+    def frames(speed: Speed, count: int, wins: int) -> list[dict]:
+        settings = Settings([Player.COMPUTER, Player.COMPUTER], speed=speed, speed_moves=5)
+        game = gui.Game(Record(), settings=settings, headless=True, games=wins + 1)
+        result = []
+        total = 0
+        while len(result) < count and total < wins:
+            counts.update(plays=0, rolls=0, wins=0, drawn=False)
+            game.frame()
+            result.append(dict(counts))
+            total += counts["wins"]
+        pygame.quit()
+        gui.clear_cache()
+        return result
+
+    return frames
+
+
+def test_normal_speed_does_not_fast_forward(frames):
+    assert all(frame["plays"] == 0 for frame in frames(Speed.NORMAL, 300, 1))
+
+
+def test_skip_plays_one_turn_per_frame(frames):
+    played = frames(Speed.SKIP, 300, 1)
+    assert max(frame["plays"] for frame in played) == 1
+    assert all(frame["drawn"] for frame in played if frame["plays"])
+
+
+def test_every_n_draws_each_portion(frames):
+    pending = 0
+    for frame in frames(Speed.EVERY_N, 3000, 1):
+        if not frame["plays"]:
+            continue
+        pending += frame["rolls"]
+        assert pending <= 5
+        assert frame["drawn"] == (pending == 5 or frame["wins"] == 1)
+        if frame["drawn"]:
+            pending = 0
+
+
+def test_final_draws_each_game_once(frames):
+    played = frames(Speed.FINAL, 20000, 2)
+    assert sum(frame["wins"] for frame in played) == 2
+    assert sum(frame["plays"] != 0 for frame in played) > 2  # Партия заняла несколько кадров
+    for frame in played:
+        assert frame["wins"] <= 1
+        if frame["plays"]:
+            assert frame["drawn"] == (frame["wins"] == 1)
@@ -0,0 +1,66 @@
+"""Тесты журнала партий."""
+
+import pytest
+
+from nard import GameLog, Party
+from replay import Replay
+
+
+def test_decode_matches_played_game(record):
+    party, steps, bodies = record(1)
+    assert len(bodies) == 1
+    game = GameLog.decode(bodies[0])
+    assert game.result == party.state.player
+    assert [step for _, turn in game.turns for step in turn] == steps
+
+
+def test_unfinished_game_is_written_on_close(record):
+    _, steps, bodies = record(2, 10)
+    game = GameLog.decode(bodies[0])
+    assert game.result == GameLog.UNFINISHED
+    assert len(game.turns) == 10
+    assert [step for _, turn in game.turns for step in turn] == steps
+
+
+@pytest.mark.parametrize("body", [
+    b"",
+    b"\x31",
+    bytes((0x31, 0x64, 2, 0, 6, GameLog.UNFINISHED)),  # Заявлено два шага, записан один
+    bytes((0x31, 0x64, 1, 30, 2, 0)),  # Шаг за пределы доски
+])
+def test_decode_rejects_truncated_records(body):
+    with pytest.raises(ValueError):
+        GameLog.decode(body)
+
+
+def test_read_skips_truncated_tail(tmp_path, record):
+    _, _, bodies = record(3)
+    filename = tmp_path / "games.bin"
+    data = filename.read_bytes()
+    filename.write_bytes(data + data[len(GameLog.MAGIC):-5])
+    assert list(GameLog.read(str(filename))) == bodies
+
+
+def test_read_rejects_other_files(tmp_path):
+    filename = tmp_path / "other.bin"
+    filename.write_bytes(b"not a log")
+    with pytest.raises(ValueError):
+        list(GameLog.read(str(filename)))
+
+
+@pytest.mark.parametrize("undo", [1, 7, 25])
+def test_undone_turns_leave_the_record(tmp_path, play, undo):
+    filename = str(tmp_path / "games.bin")
+    log = GameLog(filename)
+    party = Party()
+    log.attach(party)
+    control = play(party, 4, 12)
+    control.roll_dice()
+    for _ in range(undo):
+        party.undo()
+    log.close()
+    game = GameLog.decode(next(GameLog.read(filename)))
+    replay = Replay(game)
+    assert replay.validate() is None
+    final = replay.state_at(len(replay))
+    assert (final.checkers, final.owner) == (party.state.checkers, party.state.owner)
@@ -0,0 +1,172 @@
+"""Тесты модели партии: снимки, отмена и повтор шагов."""
+
+import pytest
+
+from nard import Party, Player, Stage, TreeMove
+
+
+def moves(tree: TreeMove) -> list[tuple[int, int]]:
+    """
+    Вернуть шаги узла дерева ходов.
+
+    @param tree: Узел дерева ходов
+    @return: Пары (начало, конец) дочерних узлов
+    """
+    return sorted((item.start, item.end) for items in tree.children for item in items)
+
+
+def position(party: Party) -> tuple:
+    """
+    Вернуть все, что восстанавливают отмена и снимок.
+
+    @param party: Модель
+    @return: Этап, позиция, игрок, номер хода, шаг, кубики и шаги узла дерева
+    """
+    state = party.state
+    return (party.stage, state.position_id(), state.player, state.move, state.step,
+            (state.dice.first, state.dice.second), sorted(state.remained_die),
+            state.played_head, moves(party.tree) if party.stage == Stage.MOVE else None)
+
+
+@pytest.mark.parametrize("seed", range(8))
+def test_snapshot_restore(play, seed):
+    party = Party()
+    control = play(party, seed, 5 + seed * 4)
+    control.roll_dice()
+    if party.stage == Stage.MOVE and seed % 2:
+        first = party.tree.children[0][0]
+        control.try_move(party.state.player ^ party.state.color, first.start, first.end)
+    restored = Party()
+    restored.restore(party.snapshot())
+    assert position(restored) == position(party)
+    assert (restored.state.dice.first, restored.state.dice.second) == \
+        (party.state.dice.first, party.state.dice.second)
+
+
+@pytest.mark.parametrize("data", [b"", b"\x05\x00\x00\x00AAAA", b"\x03\x01\x00\x65!!"])
+def test_restore_rejects_bad_snapshots(data):
+    with pytest.raises(ValueError):
+        Party().restore(data)
+
+
+@pytest.mark.parametrize("seed", range(8))
+def test_undo_redo_restores_steps(play, seed):
+    party = Party()
+    control = play(party, seed, 3 + seed * 5)
+    control.roll_dice()
+    if party.stage != Stage.MOVE:
+        pytest.skip("ход не выпал")
+    positions = [position(party)]
+    while party.stage == Stage.MOVE:
+        step = party.tree.children[0][-1]
+        party.apply_move(step)
+        positions.append(position(party))
+    undone = []
+    for _ in positions[1:]:
+        assert party.undo()
+        undone.append(position(party))
+    assert undone == positions[-2::-1]
+    while party.redo():
+        pass
+    assert position(party) == positions[-1]
+
+
+def test_new_step_clears_redo(play):
+    party = Party()
+    control = play(party, 11, 6)
+    control.roll_dice()
+    while party.stage != Stage.MOVE or sum(map(len, party.tree.children)) < 2:
+        control.play_turn()
+        control.roll_dice()
+    party.apply_move(party.tree.children[0][0])
+    assert party.undo() and party.can_redo()
+    party.apply_move(party.tree.children[0][-1])
+    assert not party.can_redo()
+
+
+@pytest.mark.parametrize("seed", range(6))
+def test_undo_redo_cross_turns(play, seed):
+    party = Party()
+    control = play(party, seed, 0)
+    while party.stage == Stage.TOSS:
+        control.roll_dice()
+    control.roll_dice()
+    positions = [position(party)]
+    for turn in range(8):
+        while party.stage == Stage.MOVE:
+            party.apply_move(party.tree.children[0][-1])
+            positions.append(position(party))
+        party.next_player()
+        if turn < 7:  # Последняя передача хода без броска тоже отменяется
+            control.roll_dice()
+        positions.append(position(party))
+    undone = []
+    while party.undo():
+        undone.append(position(party))
+    assert undone == positions[-2::-1]
+    redone = []
+    while party.redo():
+        redone.append(position(party))
+    assert redone == positions[1:]
+
+
+def test_new_roll_clears_redo(play):
+    party = Party()
+    control = play(party, 12, 4)
+    control.roll_dice()
+    assert party.undo() and party.stage == Stage.NEXT and party.can_redo()
+    party.next_player()
+    control.roll_dice()
+    assert not party.can_redo() and party.can_undo()
+
+
+@pytest.mark.parametrize("seed", range(4))
+def test_human_undoes_final_step(play, seed):
+    party = Party()
+    control = play(party, seed, 6 + seed)
+    player = party.state.player
+    control.settings.players[:] = [Player.HUMAN, Player.HUMAN]
+    control.roll_dice()
+    if party.stage != Stage.MOVE:
+        pytest.skip("ход не выпал")
+    before = position(party)
+    while party.stage == Stage.MOVE:
+        before = position(party)
+        step = party.tree.children[0][0]
+        assert control.try_move(player ^ party.state.color, step.start, step.end)
+    assert party.stage == Stage.NEXT
+    assert control.awaits_confirm() and not control.is_busy()
+    assert control.undo()
+    assert position(party) == before
+    assert control.redo() and control.confirm_turn()
+    # Подтверждение только передает ход: кубики не брошены, ход можно вернуть
+    assert party.stage == Stage.ROLL and party.state.player != player
+    assert control.undo()
+    assert position(party) == before
+
+
+@pytest.mark.parametrize("seed", range(4))
+def test_human_undo_skips_computer_turn(play, seed):
+    party = Party()
+    control = play(party, seed, 5 + seed)
+    human = party.state.player
+    control.settings.players[human] = Player.HUMAN
+    control.roll_dice()
+    before = None
+    while party.stage == Stage.MOVE:
+        before = position(party)
+        step = party.tree.children[0][0]
+        assert control.try_move(human ^ party.state.color, step.start, step.end)
+    if before is None:
+        pytest.skip("ход не выпал")
+    played = position(party)
+    control.confirm_turn()
+    control.play_turn()  # Ход компьютера
+    control.roll_dice()
+    assert party.state.player == human
+    assert control.undo()
+    assert position(party) == before
+    assert control.redo()
+    assert position(party) == played
+    assert control.redo()  # Ход компьютера и бросок человека повторяются целиком
+    assert party.state.player == human and party.stage in [Stage.MOVE, Stage.NEXT]
@@ -0,0 +1,67 @@
+"""Тесты воспроизведения партий из журнала."""
+
+import pytest
+
+from nard import Dice, GameLog, LoggedGame
+from replay import Replay, check_record
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_recorded_games_are_valid(record, seed):
+    _, _, bodies = record(seed)
+    game = GameLog.decode(bodies[0])
+    assert Replay(game).validate() is None
+    assert check_record((0, bodies[0])) == (0, None)
+
+
+def test_unfinished_game_is_valid(record):
+    _, _, bodies = record(5, 12)
+    assert Replay(GameLog.decode(bodies[0])).validate() is None
+
+
+def test_state_at_matches_played_positions(record):
+    party, _, bodies = record(6)
+    replay = Replay(GameLog.decode(bodies[0]), interval=4)
+    final = replay.state_at(len(replay))
+    assert final.checkers == party.state.checkers
+    assert final.owner == party.state.owner
+    assert final.is_win()
+    start = replay.state_at(0)
+    assert start.checkers[start.player * 12] == 15
+    # Переход от сохраненной позиции совпадает с проигрыванием с начала
+    for ply in range(len(replay) + 1):
+        linear = Replay(replay.game, interval=len(replay) + 1).state_at(ply)
+        assert replay.state_at(ply).position_id() == linear.position_id()
+    with pytest.raises(IndexError):
+        replay.state_at(len(replay) + 1)
+
+
+def test_validate_reports_illegal_step(record):
+    _, _, bodies = record(7)
+    game = GameLog.decode(bodies[0])
+    _, steps = game.turns[3]
+    start, _ = steps[0]
+    steps[0] = (start, (start + 7) % 24)  # Шаг, не совпадающий ни с одним кубиком
+    ply, step, _ = Replay(game).validate()
+    assert (ply, step) == (3, 0)
+
+
+def test_validate_reports_wrong_result(record):
+    _, _, bodies = record(8)
+    game = GameLog.decode(bodies[0])
+    game.result = 1 - game.result
+    assert Replay(game).validate()[0] == len(game.turns)
+
+
+def test_validate_rejects_doubled_toss():
+    game = LoggedGame(Dice(4, 4), [], GameLog.UNFINISHED)
+    assert Replay(game).validate()[0] == -1
+
+
+def test_state_at_fills_turn_dice():
+    game = LoggedGame(Dice(5, 2), [(Dice(5, 2), [(0, 5), (5, 7)]), (Dice(3, 3), [])],
+                      GameLog.UNFINISHED)
+    replay = Replay(game)
+    assert sorted(replay.state_at(0).remained_die) == [2, 5]
+    assert replay.state_at(1).remained_die == [3, 3, 3, 3]
+    assert replay.state_at(1).checkers[7] == 1
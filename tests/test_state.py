@@ -0,0 +1,146 @@
+"""Тесты состояния доски."""
+
+import pytest
+
+from nard import Dice, Party, Stage, State
+from perft import perft, plays
+
+
+def test_copy_is_isolated():
+    state = State()
+    state.init_players(0)
+    state.dice = Dice(6, 5)
+    state.fill_dice()
+    copy = State(state)
+    assert copy.right_move(0, 6)
+    assert state.checkers[0] == 15 and state.checkers[6] == 0
+    assert len(state.ind[0]) == 16 and state.ind[6] == [-1]
+    assert state.remained_die == [6, 5] and state.step == 0
+    assert copy.checkers[0] == 14 and copy.remained_die == [5]
+
+
+def test_position_id_roundtrip(play):
+    party = Party()
+    ids = set()
+    for turns in range(0, 60, 3):
+        party.new_party()
+        control = play(party, turns, turns)
+        control.roll_dice()  # Позиция с брошенными кубиками
+        state = party.state
+        position_id = state.position_id()
+        restored = State.from_position_id(position_id)
+        assert restored.position_id() == position_id
+        assert restored.checkers == state.checkers
+        assert restored.owner == state.owner
+        assert (restored.player, restored.color) == (state.player, state.color)
+        assert (restored.move == 0) == (state.move == 0)
+        assert sorted(restored.remained_die) == sorted(state.remained_die)
+        ids.add(position_id)
+    assert len(ids) > 10
+
+
+def test_position_id_of_opening():
+    state = State()
+    state.init_players(0)
+    state.dice = Dice(3, 5)
+    state.fill_dice()
+    restored = State.from_position_id(state.position_id())
+    assert restored.move == 0
+    assert sorted(restored.remained_die) == [3, 5]
+    assert restored.step == 0
+
+
+@pytest.mark.parametrize("position_id", ["", "4AfAAu", "____________", "a!b", "4AfAAuAAAAAAA"])
+def test_position_id_rejects_bad_ids(position_id):
+    with pytest.raises(ValueError):
+        State.from_position_id(position_id)
+
+
+def board(mine: dict[int, int], theirs: dict[int, int], dice: Dice, move: int = 1) -> State:
+    """
+    Расставить позицию первого игрока (белые, голова на поле 0) с брошенными кубиками.
+
+    @param mine: Число шашек игрока по полям
+    @param theirs: Число шашек соперника по полям
+    @param dice: Кубики
+    @param move: Номер хода
+    @return: Состояние доски
+    """
+    checkers, owner = [0] * 26, [-1] * 26
+    for side, points in enumerate((mine, theirs)):
+        for pos, count in points.items():
+            checkers[pos], owner[pos] = count, side
+        checkers[24 + side], owner[24 + side] = 15 - sum(points.values()), side
+    state = State()
+    state.set_board(checkers, owner)
+    state.move = move
+    state.dice = dice
+    state.fill_dice()
+    return state
+
+
+def test_perft_from_opening():
+    state = State()
+    state.init_players(0)
+    counts = [0, 0]
+    perft(state, 2, counts)
+    assert counts == [36, 1294]
+
+
+@pytest.mark.parametrize("first, leaves", [
+    (6, [{0: 13, 6: 2}]),  # 6:6 - вторая шашка с головы, дальше путь закрыт головой соперника
+    (5, [{0: 14, 20: 1}]),  # 5:5 - только одна шашка с головы
+    (4, [{0: 13, 8: 2}]),  # 4:4 - вторая шашка с головы, первую на 12-м поле держит голова соперника
+])
+def test_head_rule_on_opening(first, leaves):
+    state = State()
+    state.init_players(0)
+    state.dice = Dice(first, first)
+    state.fill_dice()
+    assert [{pos: count for pos, count in enumerate(leaf.checkers[:24]) if count and leaf.owner[pos] == 0}
+            for leaf in plays(state)] == leaves
+
+
+def test_second_head_checker_when_first_is_blocked():
+    # Ответ 4:4 на 5:5: шашка соперника на 8-м поле закрывает второй шаг первой шашки
+    state = State()
+    state.init_players(0)
+    state.dice = Dice(5, 5)
+    state.fill_dice()
+    [opened] = plays(state)
+    opened.next_player()
+    opened.dice = Dice(4, 4)
+    opened.fill_dice()
+    assert {(leaf.checkers[12], leaf.checkers[16]) for leaf in plays(opened)} == {(13, 2)}
+
+
+def test_one_head_checker_after_opening():
+    state = board({0: 10, 5: 5}, {12: 15}, Dice(2, 2))
+    # Не больше одной шашки с головы за ход
+    assert {leaf.checkers[0] for leaf in plays(state)} == {9, 10}
+
+
+@pytest.mark.parametrize("mine, start, allowed", [
+    ({22: 1, 18: 14}, 22, False),  # Большим кубиком нельзя снять, пока занято старшее поле
+    ({22: 1, 21: 14}, 22, False),
+    ({22: 14, 23: 1}, 22, True),
+    ({21: 1, 18: 14}, 21, True),  # Точный бросок снимает шашку всегда
+])
+def test_bear_off_with_larger_die(mine, start, allowed):
+    state = board(mine, {12: 15}, Dice(3 if start == 21 else 5, 1))
+    assert state.right_move(start, state.dice.first) == allowed
+
+
+@pytest.mark.parametrize("seed", range(6))
+def test_all_plays_use_most_dice(play, seed):
+    party = Party()
+    control = play(party, seed, 20 + seed * 10)
+    for _ in range(20):
+        if party.stage == Stage.WIN:
+            break
+        control.roll_dice()
+        state = State(party.state)
+        state.remained_die = []
+        state.fill_dice()
+        assert len({leaf.step for leaf in plays(state)}) == 1
+        control.play_turn()